@@ -11,6 +11,10 @@
  *          as well as code in MicroPython's objarray.c.
  *  @date   2022-Oct-29 JRR Added updated object type definition because uPy
  *          has a new model for this. See @c MP_DEFINE_CONST_OBJ_TYPE in here
+ *  @date   2026-Oct-18 Added @c put_from() and @c get_into(), which copy
+ *          blocks of items to and from buffers with @c memcpy()
+ *  @date   2026-Oct-18 Added @c StructQueue, which holds records of several
+ *          values packed as by the @c struct module
  *
  *  @copyright (c) 2019-2020 Zoltán Vörös
  *  @copyright (c) 2022 by JR Ridgely, released under the MIT License (MIT)
@@ -39,7 +43,144 @@
 #include <string.h>
 #include "py/obj.h"
 #include "py/objstr.h"
+#include "py/objtuple.h"
 #include "py/runtime.h"
+#include "py/binary.h"
+
+
+//=============================================================================
+// Functions used by all the queue classes to copy blocks of items between a
+// queue's ring buffer and a buffer given by the caller, such as an array, a
+// bytearray or a memoryview. The queue's pointers and counts are passed in by
+// address so that the same code works for every class.
+
+/** Find the block of items in a buffer which @c put_from() or @c get_into()
+ *  is to copy. The arguments from Python are the queue, the buffer, and
+ *  optionally the index of the first item and the number of items; by
+ *  default, all the items from the first to the end of the buffer are used.
+ *  A buffer of bytes is taken to hold items in the processor's byte order.
+ *  Any other buffer must hold items of the queue's own size and kind, so that
+ *  an array of floats can't be copied into an IntQueue, for example.
+ *  @param n_args The number of arguments, from 2 to 4
+ *  @param args The arguments
+ *  @param flags @c MP_BUFFER_READ or @c MP_BUFFER_WRITE
+ *  @param item_size The size in bytes of the queue's items
+ *  @param is_float Whether the queue holds floats
+ *  @param p_count Where to put the number of items in the block
+ *  @returns A pointer to the first byte of the block
+ */
+STATIC byte* ring_buffer_block(size_t n_args,
+                               const mp_obj_t *args,
+                               mp_uint_t flags,
+                               size_t item_size,
+                               bool is_float,
+                               size_t *p_count)
+{
+    mp_buffer_info_t bufinfo;
+    mp_get_buffer_raise(args[1], &bufinfo, flags);
+
+    size_t type_size = mp_binary_get_size('@', bufinfo.typecode, NULL);
+    if (type_size != 1 && (type_size != item_size
+                           || (bufinfo.typecode == 'f') != is_float))
+    {
+        mp_raise_TypeError(
+            (mp_rom_error_text_t)"Buffer type doesn't match queue");
+    }
+
+    size_t num_items = bufinfo.len / item_size;
+    mp_int_t start = (n_args > 2) ? mp_obj_get_int(args[2]) : 0;
+    mp_int_t count = (n_args > 3) ? mp_obj_get_int(args[3])
+                                  : (mp_int_t)num_items - start;
+    if (start < 0 || count < 0 || (size_t)(start + count) > num_items)
+    {
+        mp_raise_ValueError(
+            (mp_rom_error_text_t)"Block is outside the buffer");
+    }
+
+    *p_count = (size_t)count;
+    return (byte*)bufinfo.buf + start * item_size;
+}
+
+
+/** Copy a block of items into a queue's ring buffer with at most two calls to
+ *  @c memcpy(). If there isn't room for all the items, the oldest ones are
+ *  overwritten, leaving the queue just as if the items had been put in one at
+ *  a time.
+ *  @returns The number of items put into the queue
+ */
+STATIC size_t ring_put(byte *p_data, size_t item_size, size_t size,
+                       size_t *p_write, size_t *p_read, size_t *p_num,
+                       size_t *p_max, const byte *p_src, size_t count)
+{
+    size_t putted = count;
+    size_t total = *p_num + count;
+
+    // If there are more items than fit, only the last ones are kept, but the
+    // write pointer moves as if every item had been written
+    if (count > size)
+    {
+        p_src += (count - size) * item_size;
+        *p_write = (*p_write + count - size) % size;
+        count = size;
+    }
+
+    size_t first = size - *p_write;
+    if (first > count)
+    {
+        first = count;
+    }
+    memcpy(p_data + *p_write * item_size, p_src, first * item_size);
+    if (count > first)
+    {
+        memcpy(p_data, p_src + first * item_size, (count - first) * item_size);
+    }
+    *p_write = (*p_write + count) % size;
+
+    // Items which were overwritten are skipped by the read pointer
+    if (total > size)
+    {
+        *p_read = (*p_read + total - size) % size;
+        *p_num = size;
+    }
+    else
+    {
+        *p_num = total;
+    }
+    if (*p_num > *p_max)
+    {
+        *p_max = *p_num;
+    }
+    return putted;
+}
+
+
+/** Copy up to a given number of the oldest items out of a queue's ring
+ *  buffer with at most two calls to @c memcpy().
+ *  @returns The number of items gotten from the queue
+ */
+STATIC size_t ring_get(const byte *p_data, size_t item_size, size_t size,
+                       size_t *p_read, size_t *p_num, byte *p_dest,
+                       size_t count)
+{
+    if (count > *p_num)
+    {
+        count = *p_num;
+    }
+
+    size_t first = size - *p_read;
+    if (first > count)
+    {
+        first = count;
+    }
+    memcpy(p_dest, p_data + *p_read * item_size, first * item_size);
+    if (count > first)
+    {
+        memcpy(p_dest + first * item_size, p_data, (count - first) * item_size);
+    }
+    *p_read = (*p_read + count) % size;
+    *p_num -= count;
+    return count;
+}
 
 
 /** This structure holds the data of the IntQueue class.
@@ -247,6 +388,47 @@ STATIC mp_obj_t IntQueue_max_full(mp_obj_t self_in)
 MP_DEFINE_CONST_FUN_OBJ_1(IntQueue_max_full_obj, IntQueue_max_full);
 
 
+/** Put a block of integers from a buffer into the queue, overwriting the oldest
+ *  data if there isn't room. Arguments are the buffer and optionally the index
+ *  of the first item and the number of items to put in.
+ *  @returns The number of items put into the queue
+ */
+STATIC mp_obj_t IntQueue_put_from(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_IntQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    byte* p_src = ring_buffer_block(n_args, args, MP_BUFFER_READ,
+                                    sizeof(int32_t), false, &count);
+
+    count = ring_put((byte*)self->p_data, sizeof(int32_t), self->size,
+                     &self->write_idx, &self->read_idx, &self->num_items,
+                     &self->max_full, p_src, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(IntQueue_put_from_obj, 2, 4,
+                                    IntQueue_put_from);
+
+
+/** Get as many integers as are available, up to a limit, into a buffer.
+ *  Arguments are the buffer and optionally the index in the buffer of the
+ *  first item and the largest number of items to get.
+ *  @returns The number of items gotten from the queue
+ */
+STATIC mp_obj_t IntQueue_get_into(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_IntQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    byte* p_dest = ring_buffer_block(n_args, args, MP_BUFFER_WRITE,
+                                     sizeof(int32_t), false, &count);
+
+    count = ring_get((byte*)self->p_data, sizeof(int32_t), self->size,
+                     &self->read_idx, &self->num_items, p_dest, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(IntQueue_get_into_obj, 2, 4,
+                                    IntQueue_get_into);
+
+
 /** A dictionary of names and functions used to register the above functions
  *  with MicroPython
  */
@@ -259,6 +441,8 @@ STATIC const mp_rom_map_elem_t IntQueue_locals_dict_table[] =
     { MP_ROM_QSTR(MP_QSTR_get),       MP_ROM_PTR(&IntQueue_get_obj) },
     { MP_ROM_QSTR(MP_QSTR_available), MP_ROM_PTR(&IntQueue_available_obj) },
     { MP_ROM_QSTR(MP_QSTR_max_full),  MP_ROM_PTR(&IntQueue_max_full_obj) },
+    { MP_ROM_QSTR(MP_QSTR_put_from),  MP_ROM_PTR(&IntQueue_put_from_obj) },
+    { MP_ROM_QSTR(MP_QSTR_get_into),  MP_ROM_PTR(&IntQueue_get_into_obj) },
 };
 STATIC MP_DEFINE_CONST_DICT(IntQueue_locals_dict, IntQueue_locals_dict_table);
 
@@ -501,6 +685,47 @@ STATIC mp_obj_t FloatQueue_max_full(mp_obj_t self_in)
 MP_DEFINE_CONST_FUN_OBJ_1(FloatQueue_max_full_obj, FloatQueue_max_full);
 
 
+/** Put a block of floats from a buffer into the queue, overwriting the oldest
+ *  data if there isn't room. Arguments are the buffer and optionally the index
+ *  of the first item and the number of items to put in.
+ *  @returns The number of items put into the queue
+ */
+STATIC mp_obj_t FloatQueue_put_from(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_FloatQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    byte* p_src = ring_buffer_block(n_args, args, MP_BUFFER_READ,
+                                    sizeof(float), true, &count);
+
+    count = ring_put((byte*)self->p_data, sizeof(float), self->size,
+                     &self->write_idx, &self->read_idx, &self->num_items,
+                     &self->max_full, p_src, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(FloatQueue_put_from_obj, 2, 4,
+                                    FloatQueue_put_from);
+
+
+/** Get as many floats as are available, up to a limit, into a buffer.
+ *  Arguments are the buffer and optionally the index in the buffer of the
+ *  first item and the largest number of items to get.
+ *  @returns The number of items gotten from the queue
+ */
+STATIC mp_obj_t FloatQueue_get_into(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_FloatQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    byte* p_dest = ring_buffer_block(n_args, args, MP_BUFFER_WRITE,
+                                     sizeof(float), true, &count);
+
+    count = ring_get((byte*)self->p_data, sizeof(float), self->size,
+                     &self->read_idx, &self->num_items, p_dest, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(FloatQueue_get_into_obj, 2, 4,
+                                    FloatQueue_get_into);
+
+
 /** A dictionary of names and functions which is used to register functions so
  *  they can be called from MicroPython.
  */
@@ -513,6 +738,8 @@ STATIC const mp_rom_map_elem_t FloatQueue_locals_dict_table[] =
     { MP_ROM_QSTR(MP_QSTR_get),       MP_ROM_PTR(&FloatQueue_get_obj) },
     { MP_ROM_QSTR(MP_QSTR_available), MP_ROM_PTR(&FloatQueue_available_obj) },
     { MP_ROM_QSTR(MP_QSTR_max_full),  MP_ROM_PTR(&FloatQueue_max_full_obj) },
+    { MP_ROM_QSTR(MP_QSTR_put_from),  MP_ROM_PTR(&FloatQueue_put_from_obj) },
+    { MP_ROM_QSTR(MP_QSTR_get_into),  MP_ROM_PTR(&FloatQueue_get_into_obj) },
 };
 STATIC MP_DEFINE_CONST_DICT(FloatQueue_locals_dict,
                             FloatQueue_locals_dict_table);
@@ -749,6 +976,47 @@ STATIC mp_obj_t ByteQueue_max_full(mp_obj_t self_in)
 MP_DEFINE_CONST_FUN_OBJ_1(ByteQueue_max_full_obj, ByteQueue_max_full);
 
 
+/** Put a block of bytes from a buffer into the queue, overwriting the oldest
+ *  data if there isn't room. Arguments are the buffer and optionally the index
+ *  of the first item and the number of items to put in.
+ *  @returns The number of items put into the queue
+ */
+STATIC mp_obj_t ByteQueue_put_from(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_ByteQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    byte* p_src = ring_buffer_block(n_args, args, MP_BUFFER_READ,
+                                    sizeof(byte), false, &count);
+
+    count = ring_put((byte*)self->p_data, sizeof(byte), self->size,
+                     &self->write_idx, &self->read_idx, &self->num_items,
+                     &self->max_full, p_src, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(ByteQueue_put_from_obj, 2, 4,
+                                    ByteQueue_put_from);
+
+
+/** Get as many bytes as are available, up to a limit, into a buffer.
+ *  Arguments are the buffer and optionally the index in the buffer of the
+ *  first item and the largest number of items to get.
+ *  @returns The number of items gotten from the queue
+ */
+STATIC mp_obj_t ByteQueue_get_into(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_ByteQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    byte* p_dest = ring_buffer_block(n_args, args, MP_BUFFER_WRITE,
+                                     sizeof(byte), false, &count);
+
+    count = ring_get((byte*)self->p_data, sizeof(byte), self->size,
+                     &self->read_idx, &self->num_items, p_dest, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(ByteQueue_get_into_obj, 2, 4,
+                                    ByteQueue_get_into);
+
+
 /** A dictionary of names and functions which is used to register functions so
  *  they can be called from MicroPython.
  */
@@ -761,6 +1029,8 @@ STATIC const mp_rom_map_elem_t ByteQueue_locals_dict_table[] =
     { MP_ROM_QSTR(MP_QSTR_get),       MP_ROM_PTR(&ByteQueue_get_obj) },
     { MP_ROM_QSTR(MP_QSTR_available), MP_ROM_PTR(&ByteQueue_available_obj) },
     { MP_ROM_QSTR(MP_QSTR_max_full),  MP_ROM_PTR(&ByteQueue_max_full_obj) },
+    { MP_ROM_QSTR(MP_QSTR_put_from),  MP_ROM_PTR(&ByteQueue_put_from_obj) },
+    { MP_ROM_QSTR(MP_QSTR_get_into),  MP_ROM_PTR(&ByteQueue_get_into_obj) },
 };
 STATIC MP_DEFINE_CONST_DICT(ByteQueue_locals_dict,
                             ByteQueue_locals_dict_table);
@@ -779,10 +1049,435 @@ STATIC MP_DEFINE_CONST_OBJ_TYPE(
 );
 
 
+//=============================================================================
+
+/** This structure holds the data of the StructQueue class. Each item in the
+ *  queue is a record of several values packed into @c rec_size bytes, in the
+ *  way the @c struct module packs them.
+ */
+typedef struct _cqueue_StructQueue_obj_t
+{
+    mp_obj_base_t base;
+    size_t size;                   // Number of records the queue can hold
+    size_t write_idx;              // Index of the record to write next
+    size_t read_idx;               // Index of the record to read next
+    byte* p_data;                  // Pointer to array of records
+    size_t num_items;              // Number of records currently in the queue
+    size_t max_full;               // Maximum number of records in the queue
+    mp_obj_t format;               // The struct format string of a record
+    size_t rec_size;               // Size of one record in bytes
+    size_t num_fields;             // Number of values in one record
+    byte* p_scratch;               // Space in which a record is packed
+} cqueue_StructQueue_obj_t;
+
+
+STATIC const mp_obj_type_t cqueue_StructQueue_type;
+
+
+/** Get the byte order and alignment character from the start of a struct
+ *  format, moving past it if it's there. This works as in MicroPython's
+ *  @c struct module.
+ *  @param p_fmt A pointer to a pointer to the format string
+ *  @returns The byte order character, @c '@' if none is given
+ */
+STATIC char struct_fmt_type(const char **p_fmt)
+{
+    char fmt_type = **p_fmt;
+    switch (fmt_type)
+    {
+        case '!':
+            fmt_type = '>';
+            break;
+        case '@':
+        case '=':
+        case '<':
+        case '>':
+            break;
+        default:
+            return '@';
+    }
+    (*p_fmt)++;
+    return fmt_type;
+}
+
+
+/** Get a repeat count from a struct format, such as the 3 in @c '<3h'.
+ *  @param p_fmt A pointer to a pointer to the format string, which is moved
+ *         past the count
+ *  @returns The count, or 1 if there isn't one
+ */
+STATIC size_t struct_fmt_count(const char **p_fmt, const char *end)
+{
+    if (*p_fmt >= end || !unichar_isdigit(**p_fmt))
+    {
+        return 1;
+    }
+    size_t count = 0;
+    while (*p_fmt < end && unichar_isdigit(**p_fmt))
+    {
+        count = count * 10 + (*(*p_fmt)++ - '0');
+    }
+    return count;
+}
+
+
+/** Find the size of a record and the number of values in it. String and
+ *  padding codes aren't supported, since they don't hold one value each.
+ *  @param format A struct format string object
+ *  @param p_num_fields Where to put the number of values in a record
+ *  @returns The size of a record in bytes
+ */
+STATIC size_t struct_rec_size(mp_obj_t format, size_t *p_num_fields)
+{
+    GET_STR_DATA_LEN(format, fmt_data, fmt_len);
+    const char *fmt = (const char*)fmt_data;
+    const char *end = fmt + fmt_len;
+    char fmt_type = struct_fmt_type(&fmt);
+    size_t total = 0;
+    size_t fields = 0;
+
+    while (fmt < end)
+    {
+        size_t count = struct_fmt_count(&fmt, end);
+        if (fmt >= end)
+        {
+            break;
+        }
+        char code = *fmt++;
+        if (code == 's' || code == 'x' || code == 'P')
+        {
+            mp_raise_ValueError(
+                (mp_rom_error_text_t)"Unsupported format code");
+        }
+        size_t align = 1;
+        size_t item_size = mp_binary_get_size(fmt_type, code, &align);
+        if (fmt_type == '@')
+        {
+            total = (total + align - 1) & ~(align - 1);
+        }
+        total += item_size * count;
+        fields += count;
+    }
+    *p_num_fields = fields;
+    return total;
+}
+
+
+/** Make sure that a buffer given to @c put_from() or @c get_into() holds
+ *  bytes, since packed records can't be copied to or from anything else.
+ */
+STATIC void struct_check_bytes(mp_obj_t buffer)
+{
+    mp_buffer_info_t bufinfo;
+    mp_get_buffer_raise(buffer, &bufinfo, MP_BUFFER_READ);
+    if (mp_binary_get_size('@', bufinfo.typecode, NULL) != 1)
+    {
+        mp_raise_TypeError(
+            (mp_rom_error_text_t)"Buffer type doesn't match queue");
+    }
+}
+
+
+/** A way to print a StructQueue object; it's used for debugging.
+ */
+STATIC void StructQueue_print(const mp_print_t *print,
+                              mp_obj_t self_in,
+                              mp_print_kind_t kind)
+{
+    (void)kind;
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+    mp_print_str(print, "StructQueue[");
+    mp_obj_print_helper(print, mp_obj_new_int(self->size), PRINT_REPR);
+    mp_print_str(print, "]:");
+    mp_obj_print_helper(print, self->format, PRINT_REPR);
+    mp_print_str(print, " W:");
+    mp_obj_print_helper(print, mp_obj_new_int(self->write_idx), PRINT_REPR);
+    mp_print_str(print, ", R:");
+    mp_obj_print_helper(print, mp_obj_new_int(self->read_idx), PRINT_REPR);
+}
+
+
+/** Set internal variables to indicate an empty queue.
+ */
+STATIC mp_obj_t StructQueue_clear(mp_obj_t self_in)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+    self->write_idx = 0;
+    self->read_idx = 0;
+    self->num_items = 0;
+    self->max_full = 0;
+
+    return mp_const_none;
+}
+MP_DEFINE_CONST_FUN_OBJ_1(StructQueue_clear_obj, StructQueue_clear);
+
+
+/** Create a new queue, allocating memory in which to store the records. The
+ *  arguments are a struct format string and the number of records.
+ */
+STATIC mp_obj_t StructQueue_make_new(const mp_obj_type_t *type,
+                                     size_t n_args,
+                                     size_t n_kw,
+                                     const mp_obj_t *args)
+{
+    mp_arg_check_num(n_args, n_kw, 2, 2, true);
+    if (!mp_obj_is_str(args[0]))
+    {
+        mp_raise_TypeError((mp_rom_error_text_t)"Format string required");
+    }
+    cqueue_StructQueue_obj_t *self = m_new_obj(cqueue_StructQueue_obj_t);
+    self->base.type = &cqueue_StructQueue_type;
+
+    self->format = args[0];
+    self->rec_size = struct_rec_size(args[0], &self->num_fields);
+    self->size = mp_obj_get_int(args[1]);
+
+    StructQueue_clear (self);
+
+    self->p_data = m_new(byte, self->rec_size * self->size);
+    self->p_scratch = m_new(byte, self->rec_size);
+
+    return MP_OBJ_FROM_PTR(self);
+}
+
+
+/** Return True if there are any records in the queue, False if it's empty
+ */
+STATIC mp_obj_t StructQueue_any(mp_obj_t self_in)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+    return mp_obj_new_bool (self->num_items > 0);
+}
+MP_DEFINE_CONST_FUN_OBJ_1(StructQueue_any_obj, StructQueue_any);
+
+
+/** Return @c True if the queue is full or @c False if there's still room for
+ *  more records without overwriting old ones.
+ */
+STATIC mp_obj_t StructQueue_full(mp_obj_t self_in)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+    return mp_obj_new_bool (self->num_items >= self->size);
+}
+MP_DEFINE_CONST_FUN_OBJ_1(StructQueue_full_obj, StructQueue_full);
+
+
+/** Put a record into the queue. Overwrite the oldest record if the queue is
+ *  full. The arguments are the values in the record, in the order given by
+ *  the format. The values are packed into a scratch record first, so that if
+ *  one of them is of the wrong type, the queue isn't changed.
+ */
+STATIC mp_obj_t StructQueue_put(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    if (n_args - 1 != self->num_fields)
+    {
+        mp_raise_TypeError((mp_rom_error_text_t)"Wrong number of values");
+    }
+
+    GET_STR_DATA_LEN(self->format, fmt_data, fmt_len);
+    const char *fmt = (const char*)fmt_data;
+    const char *end = fmt + fmt_len;
+    char fmt_type = struct_fmt_type(&fmt);
+    byte *p_field = self->p_scratch;
+    size_t arg = 1;
+    while (fmt < end)
+    {
+        size_t count = struct_fmt_count(&fmt, end);
+        if (fmt >= end)
+        {
+            break;
+        }
+        char code = *fmt++;
+        while (count--)
+        {
+            mp_binary_set_val(fmt_type, code, args[arg++], self->p_scratch,
+                              &p_field);
+        }
+    }
+
+    ring_put(self->p_data, self->rec_size, self->size, &self->write_idx,
+             &self->read_idx, &self->num_items, &self->max_full,
+             self->p_scratch, 1);
+
+    return mp_const_none;
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(StructQueue_put_obj, 1, 255,
+                                    StructQueue_put);
+
+
+/** Get a record from the queue; return @c None if the queue is empty.
+ *  @returns A tuple holding the values in the oldest record, or @c None
+ */
+STATIC mp_obj_t StructQueue_get(mp_obj_t self_in)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+    // Make sure there's something to get
+    if (self->num_items == 0)
+    {
+        return mp_const_none;
+    }
+
+    mp_obj_tuple_t *tuple = MP_OBJ_TO_PTR(mp_obj_new_tuple(self->num_fields,
+                                                           NULL));
+    byte *p_record = self->p_data + self->read_idx * self->rec_size;
+    byte *p_field = p_record;
+
+    GET_STR_DATA_LEN(self->format, fmt_data, fmt_len);
+    const char *fmt = (const char*)fmt_data;
+    const char *end = fmt + fmt_len;
+    char fmt_type = struct_fmt_type(&fmt);
+    size_t field = 0;
+    while (fmt < end)
+    {
+        size_t count = struct_fmt_count(&fmt, end);
+        if (fmt >= end)
+        {
+            break;
+        }
+        char code = *fmt++;
+        while (count--)
+        {
+            tuple->items[field++] = mp_binary_get_val(fmt_type, code,
+                                                      p_record, &p_field);
+        }
+    }
+
+    self->read_idx++;
+    if (self->read_idx >= self->size)
+    {
+        self->read_idx = 0;
+    }
+    self->num_items--;
+
+    return MP_OBJ_FROM_PTR(tuple);
+}
+MP_DEFINE_CONST_FUN_OBJ_1(StructQueue_get_obj, StructQueue_get);
+
+
+/** Return the number of records in the queue.
+ */
+STATIC mp_obj_t StructQueue_available(mp_obj_t self_in)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+    return mp_obj_new_int (self->num_items);
+}
+MP_DEFINE_CONST_FUN_OBJ_1(StructQueue_available_obj, StructQueue_available);
+
+
+/** Return the maximum number of records which have been in the queue since
+ *  it was created or last cleared.
+ */
+STATIC mp_obj_t StructQueue_max_full(mp_obj_t self_in)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+    return mp_obj_new_int (self->max_full);
+}
+MP_DEFINE_CONST_FUN_OBJ_1(StructQueue_max_full_obj, StructQueue_max_full);
+
+
+/** Return the size in bytes of one record, which is needed to make a buffer
+ *  for @c get_into() and to unpack the records which it gets.
+ */
+STATIC mp_obj_t StructQueue_record_size(mp_obj_t self_in)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(self_in);
+
+    return mp_obj_new_int (self->rec_size);
+}
+MP_DEFINE_CONST_FUN_OBJ_1(StructQueue_record_size_obj,
+                          StructQueue_record_size);
+
+
+/** Put a block of packed records from a buffer of bytes into the queue,
+ *  overwriting the oldest records if there isn't room. Arguments are the
+ *  buffer and optionally the index of the first record and the number of
+ *  records to put in.
+ *  @returns The number of records put into the queue
+ */
+STATIC mp_obj_t StructQueue_put_from(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    struct_check_bytes(args[1]);
+    byte* p_src = ring_buffer_block(n_args, args, MP_BUFFER_READ,
+                                    self->rec_size, false, &count);
+
+    count = ring_put(self->p_data, self->rec_size, self->size,
+                     &self->write_idx, &self->read_idx, &self->num_items,
+                     &self->max_full, p_src, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(StructQueue_put_from_obj, 2, 4,
+                                    StructQueue_put_from);
+
+
+/** Get as many packed records as are available, up to a limit, into a buffer
+ *  of bytes. Arguments are the buffer and optionally the index in the buffer,
+ *  counted in records, of the first record and the largest number of records
+ *  to get.
+ *  @returns The number of records gotten from the queue
+ */
+STATIC mp_obj_t StructQueue_get_into(size_t n_args, const mp_obj_t *args)
+{
+    cqueue_StructQueue_obj_t *self = MP_OBJ_TO_PTR(args[0]);
+    size_t count;
+    struct_check_bytes(args[1]);
+    byte* p_dest = ring_buffer_block(n_args, args, MP_BUFFER_WRITE,
+                                     self->rec_size, false, &count);
+
+    count = ring_get(self->p_data, self->rec_size, self->size,
+                     &self->read_idx, &self->num_items, p_dest, count);
+    return mp_obj_new_int(count);
+}
+MP_DEFINE_CONST_FUN_OBJ_VAR_BETWEEN(StructQueue_get_into_obj, 2, 4,
+                                    StructQueue_get_into);
+
+
+/** A dictionary of names and functions which is used to register functions so
+ *  they can be called from MicroPython.
+ */
+STATIC const mp_rom_map_elem_t StructQueue_locals_dict_table[] =
+{
+    { MP_ROM_QSTR(MP_QSTR_clear),     MP_ROM_PTR(&StructQueue_clear_obj) },
+    { MP_ROM_QSTR(MP_QSTR_any),       MP_ROM_PTR(&StructQueue_any_obj) },
+    { MP_ROM_QSTR(MP_QSTR_full),      MP_ROM_PTR(&StructQueue_full_obj) },
+    { MP_ROM_QSTR(MP_QSTR_put),       MP_ROM_PTR(&StructQueue_put_obj) },
+    { MP_ROM_QSTR(MP_QSTR_get),       MP_ROM_PTR(&StructQueue_get_obj) },
+    { MP_ROM_QSTR(MP_QSTR_available), MP_ROM_PTR(&StructQueue_available_obj) },
+    { MP_ROM_QSTR(MP_QSTR_max_full),  MP_ROM_PTR(&StructQueue_max_full_obj) },
+    { MP_ROM_QSTR(MP_QSTR_record_size),
+                                    MP_ROM_PTR(&StructQueue_record_size_obj) },
+    { MP_ROM_QSTR(MP_QSTR_put_from),  MP_ROM_PTR(&StructQueue_put_from_obj) },
+    { MP_ROM_QSTR(MP_QSTR_get_into),  MP_ROM_PTR(&StructQueue_get_into_obj) },
+};
+STATIC MP_DEFINE_CONST_DICT(StructQueue_locals_dict,
+                            StructQueue_locals_dict_table);
+
+
+/** A type which contains the components of the @c cqueue.StructQueue class
+ *  in MicroPython.
+ */
+STATIC MP_DEFINE_CONST_OBJ_TYPE(
+    cqueue_StructQueue_type,
+    MP_QSTR_StructQueue,
+    MP_TYPE_FLAG_NONE,
+    print, StructQueue_print,
+    make_new, StructQueue_make_new,
+    locals_dict, &StructQueue_locals_dict
+);
+
+
 //=============================================================================
 
 // Designate a string for the version of this module
-STATIC MP_DEFINE_STR_OBJ(cqueue_version_obj, "0.6.2");
+STATIC MP_DEFINE_STR_OBJ(cqueue_version_obj, "0.8.0");
 
 // This table maps the symbols in the module to their names so Python can find
 // them
@@ -793,6 +1488,7 @@ STATIC const mp_rom_map_elem_t cqueue_globals_table[] = {
     { MP_ROM_QSTR(MP_QSTR_IntQueue),    MP_ROM_PTR(&cqueue_IntQueue_type) },
     { MP_ROM_QSTR(MP_QSTR_FloatQueue),  MP_ROM_PTR(&cqueue_FloatQueue_type) },
     { MP_ROM_QSTR(MP_QSTR_ByteQueue),   MP_ROM_PTR(&cqueue_ByteQueue_type) },
+    { MP_ROM_QSTR(MP_QSTR_StructQueue), MP_ROM_PTR(&cqueue_StructQueue_type) },
 };
 
 // The table above seems to have been in some odd format; make it a dictionary
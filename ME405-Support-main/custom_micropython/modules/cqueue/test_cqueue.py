@@ -1,82 +1,376 @@
 """!
 @file test_cqueue.py
-This file contains code to test the classes in the cqueue C module.
+This file contains code to test the classes in the cqueue C module and the
+Python versions of them in @c cqueue_py.py.
 
-This file must be used with a version of MicroPython 
+Both sets of queues are checked to behave the same way: overwriting the
+oldest items when full, returning @c None when empty, counting items with
+@c available() and @c max_full(), and taking strings as well as bytes in
+@c ByteQueue.put(), copying blocks of items with @c put_from() and
+@c get_into(), and packing records into a @c StructQueue. Then the time
+taken by each call to @c put() is measured for both, and the averages and
+maxima are printed side by side, followed by the number of items per second
+which can be moved one at a time and in blocks.
+
+To test the C queues, this file must be used with a version of MicroPython
+which has the cqueue module compiled in, with @c cqueue_py.py copied to the
+board. Without the C module, or on a PC, only the Python queues are tested:
+@code
+python test_cqueue.py
+@endcode
 """
+import array
 import gc
-import cqueue
-import utime
-import random
-from micropython import const
+import struct
+import sys
+
+try:
+    import utime
+    ticks_us = utime.ticks_us
+    ticks_diff = utime.ticks_diff
+except ImportError:
+    # On a PC, time in fractions of a microsecond, since a put() is quick
+    import os
+    import time
+    sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "..",
+                                      "..", "src"))
+
+    def ticks_us ():
+        return time.perf_counter_ns () / 1000
+
+    def ticks_diff (end, begin):
+        return end - begin
+
+import cqueue_py
+
+try:
+    import cqueue
+    if cqueue.IntQueue is cqueue_py.IntQueue:
+        cqueue = None                  # That was the Python fallback
+except ImportError:
+    cqueue = None
+
+TEST_SIZE = 2000
+
+## The number of times the timing test is run
+NUM_RUNS = 10
+
+## The number of items copied by each call to put_from() and get_into() in
+#  the throughput test
+BLOCK_SIZE = 200
+
+## The record format used to test StructQueue: an int16 position, a uint32
+#  time stamp and a float duty cycle
+RECORD = '<hLf'
+
+
+def check_semantics (module):
+    """!
+    Check that the queues in a module behave as the C queues do. An
+    @c AssertionError is raised if they don't.
+    @param module The @c cqueue or @c cqueue_py module
+    """
+    for (queue, items) in ((module.IntQueue (4), (1, -2, 3, -4, 5, 6)),
+                           (module.FloatQueue (4), (0.5, 1, -2.25, 4, 8, 16))):
+        assert queue.get () is None
+        assert not queue.any ()
+        for item in items[:3]:
+            queue.put (item)
+        assert queue.available () == 3
+        assert not queue.full ()
+        assert queue.get () == items[0]
+        for item in items[3:]:
+            queue.put (item)
+        assert queue.full ()
+        assert queue.max_full () == 4
+
+        # The queue was full when the last item went in, so the oldest item
+        # was overwritten
+        assert [queue.get () for n in range (4)] == list (items[2:])
+        assert queue.get () is None
+        assert queue.max_full () == 4
+        queue.clear ()
+        assert queue.max_full () == 0 and queue.available () == 0
+
+    floats = module.FloatQueue (2)
+    floats.put (3)
+    assert isinstance (floats.get (), float)
+
+    ints = module.IntQueue (2)
+    for bad in (1.5, "7", None):
+        try:
+            ints.put (bad)
+            assert False, "IntQueue took " + repr (bad)
+        except TypeError:
+            pass
+
+    chars = module.ByteQueue (8)
+    chars.put ("Hel")
+    chars.put (b"lo")
+    assert chars.available () == 5
+    assert chars.get () == b"H"
+    chars.put ("World!")                      # Overwrites "el"
+    assert chars.full () and chars.max_full () == 8
+    assert b"".join (chars.get () for n in range (8)) == b"loWorld!"
+    assert chars.get () is None
+    chars.put ("0123456789AB")               # Longer than the queue
+    assert chars.available () == 8
+    assert b"".join (chars.get () for n in range (8)) == b"456789AB"
+    for bad in (1.234, [0, 1, 2], bytearray (b"no"), chars):
+        try:
+            chars.put (bad)
+            assert False, "ByteQueue took " + repr (bad)
+        except TypeError:
+            pass
+
+
+def check_blocks (module):
+    """!
+    Check that copying blocks of items into and out of the queues in a module
+    leaves them just as copying the items one at a time does. An
+    @c AssertionError is raised if it doesn't.
+    @param module The @c cqueue or @c cqueue_py module
+    """
+    for (make, code) in ((module.IntQueue, 'i'), (module.FloatQueue, 'f')):
+        blocks = make (5)
+        singles = make (5)
+        items = array.array (code, range (-3, 9))
+        for (start, count) in ((0, 2), (2, 2), (4, 7), (11, 1)):
+            assert blocks.put_from (items, start, count) == count
+            for item in items[start:start + count]:
+                singles.put (item)
+            assert blocks.available () == singles.available ()
+            assert blocks.max_full () == singles.max_full ()
+        dest = array.array (code, (0 for n in range (8)))
+        assert blocks.get_into (dest, 1, 3) == 3
+        assert list (dest[1:4]) == [singles.get () for n in range (3)]
+        assert blocks.get_into (dest) == 2           # Only two are left
+        assert list (dest[:2]) == [singles.get () for n in range (2)]
+        assert blocks.get_into (dest) == 0
+
+        # A bytearray holds items in the processor's byte order
+        raw = bytearray (array.array (code, (5, 6, 7)))
+        assert blocks.put_from (raw) == 3
+        assert blocks.get () == 5
+        back = bytearray (8)
+        assert blocks.get_into (back) == 2
+        assert list (array.array (code, bytes (back))) == [6, 7]
 
-TEST_SIZE = const (2000)
+        for bad in (array.array ('f' if code == 'i' else 'i', (1, 2)),
+                    array.array ('h', (1, 2))):
+            try:
+                blocks.put_from (bad)
+                assert False, "put_from() took " + repr (bad)
+            except TypeError:
+                pass
+        for (start, count) in ((-1, 1), (0, 13), (12, 1)):
+            try:
+                blocks.put_from (items, start, count)
+                assert False, "put_from() took a block outside the buffer"
+            except ValueError:
+                pass
 
+    chars = module.ByteQueue (6)
+    assert chars.put_from (b"abcdefgh", 1) == 7       # Overwrites "b"
+    dest = bytearray (10)
+    assert chars.get_into (memoryview (dest)[2:]) == 6
+    assert bytes (dest[2:8]) == b"cdefgh"
 
-def main(run_number):
+
+def check_struct (module):
+    """!
+    Check that a @c StructQueue keeps the values in each record together,
+    overwrites whole records when full, refuses bad records without changing
+    what's in the queue, and copies packed records out with @c get_into().
+    An @c AssertionError is raised if it doesn't behave as expected.
+    @param module The @c cqueue or @c cqueue_py module
+    """
+    def record (n):
+        return (n - 100, 1000 * n, n / 4)
+
+    frames = module.StructQueue (RECORD, 4)
+    assert frames.record_size () == struct.calcsize (RECORD)
+    assert frames.get () is None
+    for n in range (3):
+        frames.put (*record (n))
+    assert frames.available () == 3
+    assert frames.get () == record (0)
+    for n in range (3, 7):
+        frames.put (*record (n))
+    assert frames.full () and frames.max_full () == 4
+    assert [frames.get () for n in range (4)] == [record (n)
+                                                  for n in range (3, 7)]
+    assert frames.get () is None
+
+    # A bad record is refused and the queue is left as it was
+    frames.put (*record (7))
+    for bad in ((1, 2), (1, 2, 3, 4), ("one", 2, 3.0), (1, 2.5, 3.0)):
+        try:
+            frames.put (*bad)
+            assert False, "StructQueue took " + repr (bad)
+        except (TypeError, struct.error):
+            pass
+    assert frames.available () == 1 and frames.get () == record (7)
+
+    # Packed records come out whole, and can be put back in
+    for n in range (8, 14):
+        frames.put (*record (n))
+    size = frames.record_size ()
+    packed = bytearray (3 * size + 1)
+    assert frames.get_into (packed) == 3
+    assert [struct.unpack_from (RECORD, packed, k * size)
+            for k in range (3)] == [record (n) for n in range (10, 13)]
+    assert frames.put_from (packed, 1, 2) == 2
+    assert [frames.get () for n in range (3)] == [record (n)
+                                                  for n in (13, 11, 12)]
+    try:
+        frames.get_into (array.array ('f', (0, 0, 0)))
+        assert False, "get_into() took an array of floats"
+    except TypeError:
+        pass
+
+    # Native formats are padded as the struct module pads them
+    native = module.StructQueue ('bif', 2)
+    assert native.record_size () == struct.calcsize ('bif')
+    native.put (-1, 70000, 0.5)
+    assert native.get () == (-1, 70000, 0.5)
+    try:
+        module.StructQueue ('<h4s', 2)
+        assert False, "StructQueue took a string format code"
+    except ValueError:
+        pass
+
+
+def time_puts (module):
     """!
-    Run the test.
-    @param run_number The number in a sequence of runs of this test
+    Time each call to @c put() for an integer, a float and a string queue.
+    @param module The @c cqueue or @c cqueue_py module
+    @returns A dictionary holding, for each kind of queue, the average and
+             maximum time taken by @c put() in microseconds
     """
-    # Say hello and make sure memory is as cleanly set up as possible
     gc.collect ()
-    print ('')
-    print (f"Memory before allocation: {gc.mem_free ()}")
-
-    # Create the queues, allocating memory for the data
-    inky = cqueue.IntQueue (TEST_SIZE)
-    foof = cqueue.FloatQueue (TEST_SIZE)
-
-    # Create lists to hold results of tests
-    int_durs = []
-    float_durs = []
-    none_durs = []
-
-    for index in range (TEST_SIZE):
-        dur = 0
-        begin = 0
-
-        to_ink = index + 1
-        begin = utime.ticks_us ()
-        inky.put (to_ink)
-        dur = utime.ticks_diff (utime.ticks_us (), begin)
-        int_durs.append (dur)
-
-        to_foof = float (index + 1)
-        begin = utime.ticks_us ()
-        foof.put (to_foof)
-        dur = utime.ticks_diff (utime.ticks_us (), begin)
-        float_durs.append (dur)
-
-        begin = utime.ticks_us ()
-        dur = utime.ticks_diff (utime.ticks_us (), begin)
-        none_durs.append (dur)
-
-    count = 0
-    while inky.any() and foof.any():
-        count += 1
-        ink0 = inky.get()
-        foof0 = foof.get()
+    queues = {"Ints" : (module.IntQueue (TEST_SIZE), lambda n: n + 1),
+              "Floats" : (module.FloatQueue (TEST_SIZE), lambda n: n + 1.0),
+              "Strings" : (module.ByteQueue (100),
+                           lambda n: chr (ord ('!') + n % 94))}
+    results = {}
+    for (kind, (queue, make)) in queues.items ():
+        total = 0
+        longest = 0
+        for index in range (TEST_SIZE):
+            item = make (index)
+            begin = ticks_us ()
+            queue.put (item)
+            dur = ticks_diff (ticks_us (), begin)
+            total += dur
+            longest = dur if dur > longest else longest
+        results[kind] = (total / TEST_SIZE, longest)
+
+    # Check that what went in comes out
+    ints, floats = queues["Ints"][0], queues["Floats"][0]
+    while ints.any () and floats.any ():
+        ink0 = ints.get ()
+        foof0 = floats.get ()
         if ((float (ink0) - foof0) / foof0) > 0.001:
             print (f"Error: {ink0} != {foof0}")
+    return results
 
-    print (f"Memory after test run #{run_number}: {gc.mem_free ()}")
-    print (f"Ints:   Num {len(int_durs)},"
-           + f" Avg {sum(int_durs) / len(int_durs):.1f},"
-           + f" Max {max (int_durs)}")
-    print (f"Floats: Num {len(float_durs)},"
-           + f" Avg {sum(float_durs) / len(float_durs):.1f},"
-           + f" Max {max (float_durs)}")
-    print (f"Nones:  Num {len(none_durs)},"
-           + f" Avg {sum(none_durs) / len(none_durs):.1f},"
-           + f" Max {max (none_durs)}")
 
+def time_blocks (module):
+    """!
+    Find how many items per second can be moved through an integer queue and
+    a float queue, one at a time with @c put() and @c get() and in blocks of
+    @c BLOCK_SIZE with @c put_from() and @c get_into().
+    @param module The @c cqueue or @c cqueue_py module
+    @returns A dictionary holding the rates in items per second
+    """
+    gc.collect ()
+    results = {}
+    rounds = TEST_SIZE // BLOCK_SIZE
+    for (kind, make, code) in (("Ints", module.IntQueue, 'i'),
+                               ("Floats", module.FloatQueue, 'f')):
+        queue = make (TEST_SIZE)
+        block = array.array (code, range (BLOCK_SIZE))
+
+        begin = ticks_us ()
+        for index in range (rounds * BLOCK_SIZE):
+            queue.put (index)
+        for index in range (rounds * BLOCK_SIZE):
+            queue.get ()
+        dur = ticks_diff (ticks_us (), begin)
+        results[kind + " one"] = rounds * BLOCK_SIZE * 1000000 / max (dur, 1)
+
+        begin = ticks_us ()
+        for index in range (rounds):
+            queue.put_from (block)
+        for index in range (rounds):
+            queue.get_into (block)
+        dur = ticks_diff (ticks_us (), begin)
+        results[kind + " block"] = (rounds * BLOCK_SIZE * 1000000
+                                    / max (dur, 1))
+
+    # Records go in one at a time, since each is made from separate values,
+    # and come out either one at a time or in packed blocks
+    frames = module.StructQueue (RECORD, TEST_SIZE)
+    packed = bytearray (BLOCK_SIZE * frames.record_size ())
+    for (kind, drain) in (("Records one", False), ("Records block", True)):
+        begin = ticks_us ()
+        for index in range (rounds * BLOCK_SIZE):
+            frames.put (index, index, 0.5)
+        if drain:
+            for index in range (rounds):
+                frames.get_into (packed)
+        else:
+            for index in range (rounds * BLOCK_SIZE):
+                frames.get ()
+        dur = ticks_diff (ticks_us (), begin)
+        results[kind] = rounds * BLOCK_SIZE * 1000000 / max (dur, 1)
+    return results
 
-for count in range (100):
+
+modules = [("Python", cqueue_py)]
+if cqueue is not None:
+    modules.insert (0, ("C", cqueue))
+else:
+    print ("The cqueue C module isn't available; testing only cqueue_py")
+
+for (label, module) in modules:
+    check_semantics (module)
+    check_blocks (module)
+    check_struct (module)
+    print (f"{label} queues behave as expected")
+
+# Keep the best average and the worst maximum over several runs, and the
+# best throughput
+best = {}
+rates = {}
+for count in range (NUM_RUNS):
     try:
-        main(count + 1)
-        utime.sleep_ms (200)
+        for (label, module) in modules:
+            for (kind, (avg, longest)) in time_puts (module).items ():
+                old_avg, old_max = best.get ((label, kind), (avg, longest))
+                best[(label, kind)] = (min (avg, old_avg),
+                                       max (longest, old_max))
+            for (kind, rate) in time_blocks (module).items ():
+                rates[(label, kind)] = max (rate, rates.get ((label, kind), 0))
     except KeyboardInterrupt:
         break
 
+print (f"\nTime for put() in us, {TEST_SIZE} calls per run, {NUM_RUNS} runs:")
+print ("         " + "".join (f"{label:>8s} Avg{label:>8s} Max"
+                              for (label, module) in modules))
+for kind in ("Ints", "Floats", "Strings"):
+    print (f"{kind:<9s}" + "".join (
+        f"{best[(label, kind)][0]:12.2f}{best[(label, kind)][1]:12.1f}"
+        for (label, module) in modules))
+
+print (f"\nItems per second, one at a time with put()/get() and in blocks of"
+       f" {BLOCK_SIZE} with put_from()/get_into():")
+print ("             "
+       + "".join (f"{label:>14s}" for (label, module) in modules))
+for kind in ("Ints one", "Ints block", "Floats one", "Floats block",
+             "Records one", "Records block"):
+    print (f"{kind:<13s}" + "".join (f"{rates[(label, kind)]:14.0f}"
+                                     for (label, module) in modules))
+
 print ("Test complete.")
@@ -0,0 +1,57 @@
+"""!
+@file bench_frozen_sched.py
+This file compares @c cotask.TaskList.pri_sched() with
+@c cotask.TaskList.frozen_sched(), which runs from flat dispatch tables made
+by @c freeze(), on a PC. It uses the task sets and timing code from
+@c bench_heap_sched.py. For 3 and 30 tasks it first checks that both
+schedulers run the tasks in exactly the same order, then prints the number of
+scheduler passes per second of real time for each.
+
+Under regular Python the difference shows how much work the interpreter
+saves; on a microcontroller, where @c frozen_sched() is compiled by the
+native code emitter, the numbers will differ but the comparison is the same.
+
+This program runs on a PC, not on a microcontroller:
+@code
+python bench_frozen_sched.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import bench_heap_sched
+
+## The numbers of tasks to try
+TASK_COUNTS = (3, 30)
+
+
+def same_order (num_tasks):
+    """!
+    Check that both schedulers run tasks in the same order.
+    @param num_tasks How many tasks to create
+    @returns @c True if the order in which tasks ran was the same
+    """
+    pri_order = []
+    frozen_order = []
+    bench_heap_sched.run ("pri_sched", num_tasks, read_cost=0,
+                          order=pri_order)
+    bench_heap_sched.run ("frozen_sched", num_tasks, read_cost=0,
+                          order=frozen_order)
+    return pri_order == frozen_order and len (pri_order) > 0
+
+
+if __name__ == "__main__":
+    for num_tasks in TASK_COUNTS:
+        print (f"Same order with {num_tasks} tasks: {same_order (num_tasks)}")
+    print ("")
+
+    print ("Tasks  Scheduler       Passes/s  Speedup")
+    for num_tasks in TASK_COUNTS:
+        base = None
+        for sched_name in ("pri_sched", "frozen_sched"):
+            rate = bench_heap_sched.run (sched_name, num_tasks)[0]
+            base = base or rate
+            print (f"{num_tasks:5d}  {sched_name:<13s}{rate:11.0f}"
+                   f"{rate / base:9.2f}")
@@ -0,0 +1,133 @@
+"""!
+@file bench_heap_sched.py
+This file compares @c cotask.TaskList.pri_sched() with the heap based
+@c cotask.TaskList.heap_sched() on a PC. The scheduler runs under regular
+Python with a simulated clock from @c sim_time.py, so each reading of the time
+costs a simulated microsecond as it would on a slow microcontroller. For 5, 50
+and 500 tasks this program prints the number of scheduler passes per second
+of real time, the number of clock readings per pass, and the average and
+maximum lateness (jitter) of the tasks in simulated time. Before that it
+checks that both schedulers run the tasks in exactly the same order.
+
+This program runs on a PC, not on a microcontroller:
+@code
+python bench_heap_sched.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+clock = sim_time.install ()
+import cotask
+
+## Periods, in milliseconds, which are handed out to the test tasks in turn
+PERIODS = (5, 10, 20, 50, 100)
+
+## Simulated time in microseconds which each run of a task body takes
+TASK_COST = 20
+
+## Simulated time in microseconds which each pass through the scheduler takes,
+#  not counting the time spent reading the clock or running tasks
+PASS_COST = 2
+
+## How long each benchmark runs, in simulated microseconds
+SIM_TIME = 1_000_000
+
+
+def make_tasks (num_tasks, order=None):
+    """!
+    Create a task list holding the given number of tasks.
+    @param num_tasks How many tasks to create
+    @param order A list into which each task puts its name when it runs, or
+           @c None if the order in which tasks run isn't needed
+    @returns A new @c cotask.TaskList holding the tasks
+    """
+    def task_fun (name):
+        while True:
+            clock.advance (TASK_COST)
+            if order is not None:
+                order.append (name)
+            yield 0
+
+    t_list = cotask.TaskList ()
+    for index in range (num_tasks):
+        name = f"T{index}"
+        t_list.append (cotask.Task (lambda name=name: task_fun (name),
+                                    name=name, priority=index % 4,
+                                    period=PERIODS[index % len (PERIODS)],
+                                    profile=True))
+    return t_list
+
+
+def run (sched_name, num_tasks, read_cost=1, order=None):
+    """!
+    Run one benchmark.
+    @param sched_name The name of the scheduler method to be tested
+    @param num_tasks How many tasks to create
+    @param read_cost Simulated microseconds taken by each reading of the clock
+    @param order A list in which to record the order in which tasks run
+    @returns A tuple of (passes per second, clock reads per pass, average
+             lateness in µs, maximum lateness in µs)
+    """
+    sim_time.install (sim_time.SimClock (read_cost=read_cost))
+    global clock
+    clock = sys.modules["utime"].clock
+
+    t_list = make_tasks (num_tasks, order)
+    sched = getattr (t_list, sched_name)
+
+    passes = 0
+    begin = time.perf_counter ()
+    while clock.now < SIM_TIME:
+        sched ()
+        clock.advance (PASS_COST)
+        passes += 1
+    elapsed = time.perf_counter () - begin
+
+    runs = 0
+    late_sum = 0
+    latest = 0
+    for pri in t_list.pri_list:
+        for task in pri[2:]:
+            runs += task._runs
+            late_sum += task._late_sum
+            latest = max (latest, task._latest)
+
+    return (passes / elapsed, clock.reads / passes,
+            late_sum / runs if runs else 0.0, latest)
+
+
+def check_order (num_tasks):
+    """!
+    Check that both schedulers run tasks in the same order when reading the
+    clock takes no time, so that both see the same tasks become ready.
+    @param num_tasks How many tasks to create
+    @returns @c True if the order in which tasks ran was the same
+    """
+    pri_order = []
+    heap_order = []
+    run ("pri_sched", num_tasks, read_cost=0, order=pri_order)
+    run ("heap_sched", num_tasks, read_cost=0, order=heap_order)
+    return pri_order == heap_order and len (pri_order) > 0
+
+
+if __name__ == "__main__":
+    for num_tasks in (5, 50):
+        print (f"Same order with {num_tasks} tasks: {check_order (num_tasks)}")
+    print ("")
+
+    print ("Tasks  Scheduler    Passes/s  Reads/pass  Avg late  Max late")
+    for num_tasks in (5, 50, 500):
+        for sched_name in ("pri_sched", "heap_sched"):
+            rate, reads, avg_late, max_late = run (sched_name, num_tasks)
+            print (f"{num_tasks:5d}  {sched_name:<10s}{rate:11.0f}"
+                   f"{reads:12.2f}{avg_late:10.1f}{max_late:10d}")
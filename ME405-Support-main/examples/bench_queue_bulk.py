@@ -0,0 +1,133 @@
+"""!
+@file bench_queue_bulk.py
+This file compares moving data through a @c task_share.Queue one item at a
+time with @c put() and @c get() against moving it in blocks with
+@c put_many() and @c get_many(), on a PC. Each transfer moves 1000 items
+into a queue and back out, starting at a place in the queue's buffer which
+makes the block wrap around its end. Before timing, the program checks that
+both ways give the same items in the same order, and that @c peek() shows
+the same items without taking them out.
+
+This program runs on a PC, not on a microcontroller:
+@code
+python bench_queue_bulk.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import array
+import os
+import sys
+import time
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import task_share
+
+## The number of items in each transfer
+BLOCK = 1000
+
+## The size of the queue, a little more than one block
+QUEUE_SIZE = 1024
+
+## How many transfers are timed for each method
+REPEATS = 200
+
+
+def make_queue (type_code):
+    """!
+    Make a queue whose next item will be written near the end of its buffer,
+    so that a block of items wraps around.
+    @param type_code The type code of the queue's items
+    @returns The new queue
+    """
+    queue = task_share.Queue (type_code, QUEUE_SIZE, thread_protect=True,
+                              name=f"Bulk {type_code}")
+    for index in range (QUEUE_SIZE - BLOCK // 2):
+        queue.put (0)
+        queue.get ()
+    return queue
+
+
+def per_item (queue, source, dest):
+    """!
+    Move a block of items through the queue one at a time.
+    @param queue The queue to use
+    @param source An array holding the items to put into the queue
+    @param dest An array into which the items are read back
+    """
+    for item in source:
+        if not queue.full ():
+            queue.put (item)
+    for index in range (len (dest)):
+        if queue.any ():
+            dest[index] = queue.get ()
+
+
+def bulk (queue, source, dest):
+    """!
+    Move a block of items through the queue with @c put_many() and
+    @c get_many().
+    @param queue The queue to use
+    @param source An array holding the items to put into the queue
+    @param dest An array into which the items are read back
+    """
+    queue.put_many (source)
+    queue.get_many (dest)
+
+
+def check (type_code):
+    """!
+    Check that both methods move the same items, and that @c peek() sees
+    the items in the queue in order.
+    @param type_code The type code of the queue's items
+    @returns @c True if everything matched
+    """
+    source = array.array (type_code, (n % 251 for n in range (BLOCK)))
+    results = []
+    for method in (per_item, bulk):
+        dest = array.array (type_code, bytes (source.itemsize * BLOCK))
+        method (make_queue (type_code), source, dest)
+        results.append (dest)
+
+    queue = make_queue (type_code)
+    queue.put_many (source)
+    (older, newer) = queue.peek ()
+    peeked = list (older) + list (newer)
+    skipped = queue.skip (BLOCK // 2)
+    return (results[0] == source and results[1] == source
+            and len (newer) > 0 and peeked == list (source)
+            and skipped == BLOCK // 2 and queue.num_in () == BLOCK // 2)
+
+
+def speed (type_code, method):
+    """!
+    Time a method of moving items through a queue.
+    @param type_code The type code of the queue's items
+    @param method @c per_item or @c bulk
+    @returns The average time in microseconds per transfer of a block
+    """
+    queue = make_queue (type_code)
+    source = array.array (type_code, (n % 251 for n in range (BLOCK)))
+    dest = array.array (type_code, bytes (source.itemsize * BLOCK))
+    begin = time.perf_counter ()
+    for repeat in range (REPEATS):
+        method (queue, source, dest)
+    return (time.perf_counter () - begin) / REPEATS * 1_000_000
+
+
+if __name__ == "__main__":
+    for type_code in ('B', 'L', 'f'):
+        print (f"Type {type_code}: same items {check (type_code)}")
+    print ("")
+
+    print ("Type  Per item us   Bulk us  Speedup")
+    for type_code in ('B', 'L', 'f'):
+        slow = speed (type_code, per_item)
+        fast = speed (type_code, bulk)
+        print (f"{type_code:>4s}{slow:13.1f}{fast:10.1f}{slow / fast:9.0f}x")
@@ -0,0 +1,110 @@
+"""!
+@file bench_share_wait.py
+This file compares two ways for a task to get data from a queue, on a PC with
+the simulated clock from @c sim_time.py:
+- @b Polling, the usual way: the consumer runs every 2 ms and checks
+  @c any() to see whether there's data
+- @b Waiting: the consumer yields a @c cotask.Wait for the queue and is run
+  only when @c put() wakes it
+
+A producer puts an item into the queue every 20 ms and another task does
+some background work every 5 ms. For each method the program prints how many
+times the consumer ran, how many of those runs found nothing to do, the
+average delay from @c put() to @c get(), the simulated processor time used
+by the consumer, and the number of scheduler passes per second of real time.
+
+This program runs on a PC, not on a microcontroller:
+@code
+python bench_share_wait.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+import task_share
+
+## Simulated time in microseconds which each run of any task body takes
+TASK_COST = 30
+
+## Simulated time in microseconds taken by each pass through the scheduler
+PASS_COST = 5
+
+## How long each benchmark runs, in simulated microseconds
+SIM_TIME = 10_000_000
+
+
+def run (waiting):
+    """!
+    Run the producer, consumer and background tasks.
+    @param waiting @c True to have the consumer wait on the queue, @c False
+           to have it poll the queue
+    @returns A dictionary of results
+    """
+    clock = sim_time.install (sim_time.SimClock (read_cost=1))
+    queue = task_share.Queue ('L', 16, name="Data")
+    stats = {"runs" : 0, "empty" : 0, "items" : 0, "delay" : 0}
+
+    def producer_fun ():
+        while True:
+            clock.advance (TASK_COST)
+            queue.put (clock.now & 0xFFFFFFFF)
+            yield 0
+
+    def consumer_fun ():
+        wait_data = cotask.Wait (queue)
+        while True:
+            clock.advance (TASK_COST)
+            stats["runs"] += 1
+            if not queue.any ():
+                stats["empty"] += 1
+            while queue.any ():
+                stats["delay"] += (clock.now & 0xFFFFFFFF) - queue.get ()
+                stats["items"] += 1
+            yield wait_data if waiting else 0
+
+    def background_fun ():
+        while True:
+            clock.advance (TASK_COST)
+            yield 0
+
+    t_list = cotask.TaskList ()
+    t_list.append (cotask.Task (producer_fun, name="Producer", priority=2,
+                                period=20, profile=True))
+    consumer = cotask.Task (consumer_fun, name="Consumer", priority=1,
+                            period=None if waiting else 2, profile=True)
+    t_list.append (consumer)
+    if waiting:
+        consumer.go ()                  # An untimed task needs a first push
+    t_list.append (cotask.Task (background_fun, name="Background",
+                                priority=0, period=5, profile=True))
+
+    passes = 0
+    begin = time.perf_counter ()
+    while clock.now < SIM_TIME:
+        t_list.pri_sched ()
+        clock.advance (PASS_COST)
+        passes += 1
+    stats["pass_rate"] = passes / (time.perf_counter () - begin)
+    stats["cpu"] = consumer._run_total
+    return stats
+
+
+if __name__ == "__main__":
+    print ("Method    Runs   Empty  Items  Avg delay  Consumer CPU  Passes/s")
+    for (name, waiting) in (("Polling", False), ("Waiting", True)):
+        stats = run (waiting)
+        avg_delay = stats["delay"] / stats["items"] if stats["items"] else 0
+        print (f"{name:<8s}{stats['runs']:6d}{stats['empty']:8d}"
+               f"{stats['items']:7d}{avg_delay:8.0f} us"
+               f"{stats['cpu'] / 1000:11.1f} ms{stats['pass_rate']:10.0f}")
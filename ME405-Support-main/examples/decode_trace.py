@@ -0,0 +1,102 @@
+"""!
+@file decode_trace.py
+This file decodes a binary dump of the state transition trace buffer made by
+@c cotask.TraceBuffer.dump() and prints a timeline for each task. It runs on
+a PC. The dump may be surrounded by other text, as happens when it is saved
+from a serial terminal, because the decoder looks for @c cotask.TRACE_MAGIC
+to find the start of the dump.
+
+On the microcontroller, after the scheduler has been stopped:
+@code
+import pyb
+cotask.trace_buffer.dump (pyb.USB_VCP ())
+@endcode
+Then on the PC, with the received bytes saved in a file:
+@code
+python decode_trace.py trace.bin
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import struct
+import sys
+
+## The bytes which mark the start of a trace dump; see @c cotask.TRACE_MAGIC
+TRACE_MAGIC = b'CTRC'
+
+
+def decode (data):
+    """!
+    Decode a trace buffer dump into a timeline for each task.
+    @param data The bytes received from @c TraceBuffer.dump(), possibly with
+           other stuff before them
+    @returns A dictionary whose keys are task names and whose values are lists
+             of (time in seconds, from state, to state) tuples. Times are
+             measured from the oldest record in the dump. The from state of a
+             task's first transition is @c None if older records were lost
+    """
+    start = data.find (TRACE_MAGIC)
+    if start < 0:
+        raise ValueError ("No trace dump found")
+    pos = start + len (TRACE_MAGIC)
+
+    num_tasks, size, count, idx, lost = struct.unpack_from ("<HHHHH", data,
+                                                            pos)
+    pos += 10
+
+    names = []
+    for _ in range (num_tasks):
+        length = data[pos]
+        names.append (data[pos + 1 : pos + 1 + length].decode ())
+        pos += 1 + length
+
+    times = struct.unpack_from (f"<{size}i", data, pos)
+    pos += 4 * size
+    states = struct.unpack_from (f"<{size}h", data, pos)
+    pos += 2 * size
+    ids = struct.unpack_from (f"<{size}B", data, pos)
+
+    # If some records were lost, we can't know the state from which each
+    # task made its first transition
+    timeline = {name : [] for name in names}
+    last_state = {}
+    total = 0
+    index = (idx - count) % size if size else 0
+    for num in range (count):
+        if num > 0:
+            total += times[index]
+        name = names[ids[index]]
+        state = states[index]
+        from_state = last_state.get (name, None if lost else 0)
+        timeline[name].append ((total / 1_000_000, from_state, state))
+        last_state[name] = state
+        index = (index + 1) % size
+
+    return timeline
+
+
+def format_timeline (timeline):
+    """!
+    Make a printable version of a timeline from @c decode().
+    @param timeline The dictionary of transitions made by @c decode()
+    @returns A string showing each task's transitions, one per line
+    """
+    lines = []
+    for name, transitions in timeline.items ():
+        lines.append (f"Task {name}:")
+        for (t_sec, from_state, to_state) in transitions:
+            from_str = "?" if from_state is None else f"{from_state:d}"
+            lines.append (f"{t_sec: 12.6f}: {from_str:>2s} -> {to_state:d}")
+    return "\n".join (lines)
+
+
+if __name__ == "__main__":
+    if len (sys.argv) != 2:
+        print ("Usage: python decode_trace.py <dump file>")
+        sys.exit (1)
+
+    with open (sys.argv[1], "rb") as dump_file:
+        print (format_timeline (decode (dump_file.read ())))
@@ -0,0 +1,118 @@
+"""!
+@file test_cotask_asyncio.py
+This file tests @c cotask_asyncio, which runs @c cotask tasks under Python's
+@c asyncio on a PC. A small task set, with two timer driven tasks and one
+which waits for data in a queue, is run for a few simulated seconds, and the
+test checks that:
+- Each timer driven task runs once per period
+- The waiting task runs once for each item put into its queue
+- Time charged with the clock's @c advance() shows up in the profile
+- @c print(task_list) shows the same table as on a microcontroller
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_cotask_asyncio.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask_asyncio
+import cotask
+import task_share
+
+## How long the task set runs, in seconds
+DURATION = 3.0
+
+## The timer driven tasks' names, periods in milliseconds and run times in
+#  microseconds
+TIMED = (("Fast", 10, 400), ("Slow", 15, 300))
+
+
+def make_tasks ():
+    """!
+    Make a task list holding two timer driven tasks, one of which puts a
+    number into a queue each time it runs, and a task which waits for the
+    numbers.
+    @returns A tuple holding the task list and a list into which the
+             waiting task writes the numbers it gets
+    """
+    t_list = cotask.TaskList ()
+    queue = task_share.Queue ('L', 16, thread_protect=False, name="Numbers")
+    got = []
+
+    def make_fun (name, cost):
+        def task_fun ():
+            count = 0
+            while True:
+                cotask_asyncio.clock ().advance (cost)
+                if name == "Slow":
+                    count += 1
+                    queue.put (count)
+                yield 0
+        return task_fun
+
+    def reader_fun ():
+        wait = cotask.Wait (queue)
+        while True:
+            while queue.any ():
+                got.append (queue.get ())
+            yield wait
+
+    for (name, period, cost) in TIMED:
+        t_list.append (cotask.Task (make_fun (name, cost), name=name,
+                                    priority=2, period=period, profile=True))
+    reader = cotask.Task (reader_fun, name="Reader", priority=1,
+                          profile=True)
+    reader.go ()
+    t_list.append (reader)
+    return t_list, got
+
+
+def test_run_counts ():
+    """!
+    Each timer driven task runs once per period, the waiting task gets every
+    number put into the queue, and the charged run times are profiled.
+    """
+    t_list, got = make_tasks ()
+    cotask_asyncio.run (t_list, DURATION, virtual=True)
+    tasks = {task.name : task for pri in t_list.pri_list for task in pri[2:]}
+    for (name, period, cost) in TIMED:
+        runs = tasks[name]._runs
+        assert abs (runs - DURATION * 1000 / period) <= 1, (name, runs)
+        assert tasks[name]._slowest == cost
+        assert tasks[name].next_run () is not None
+    assert got == list (range (1, tasks["Slow"]._runs + 1))
+    assert tasks["Reader"].is_parked ()
+
+
+def test_table ():
+    """!
+    The task list prints the standard header and a row for each task, the
+    same as @c str() of each task.
+    """
+    t_list, _ = make_tasks ()
+    cotask_asyncio.run (t_list, DURATION, virtual=True)
+    lines = str (t_list).splitlines ()
+    assert lines[0] == str (cotask.TaskList ()).splitlines ()[0]
+    rows = [str (task) for pri in t_list.pri_list for task in pri[2:]]
+    assert lines[1:] == rows
+    assert [row.split ()[0] for row in rows] == ["Fast", "Slow", "Reader"]
+
+
+if __name__ == "__main__":
+    for test in (test_run_counts, test_table):
+        test ()
+        print (f"{test.__name__}: passed")
+    t_list, _ = make_tasks ()
+    print ()
+    print (cotask_asyncio.run (t_list, DURATION))
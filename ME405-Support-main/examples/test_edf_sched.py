@@ -0,0 +1,149 @@
+"""!
+@file test_edf_sched.py
+This file tests the Earliest Deadline First scheduler @c edf_sched() and
+@c check_schedulable() of @c cotask.TaskList on a PC, using the simulated
+clock in @c sim_time.py. It checks that:
+- When two tasks are ready at once, the one whose deadline is sooner runs
+  first, even if its priority is lower
+- A task's deadline is set when the task is released and doesn't move if
+  the task is released again before it has run
+- @c check_schedulable() says no when the tasks need more than all of the
+  processor's time, and yes when they don't
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_edf_sched.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+
+
+def make_fun (log, name, clock, cost=0):
+    """!
+    Make a task function which writes its name into a log each time it runs
+    and takes a given time to run.
+    @param log The list into which names are written
+    @param name The name to write
+    @param clock The simulated clock
+    @param cost How long, in microseconds, each run takes
+    @returns A generator function for @c cotask.Task
+    """
+    def task_fun ():
+        while True:
+            log.append (name)
+            clock.advance (cost)
+            yield 0
+    return task_fun
+
+
+def run (t_list, clock, until, sched="edf_sched"):
+    """!
+    Run the scheduler until the simulated clock reaches a given time.
+    @param t_list The task list to run
+    @param clock The simulated clock
+    @param until The simulated time in microseconds at which to stop
+    @param sched The name of the scheduler method to use
+    """
+    sched = getattr (t_list, sched)
+    while clock.now < until:
+        sched ()
+        clock.advance (10)
+
+
+def test_earliest_first ():
+    """!
+    A low priority task whose deadline is sooner runs before a high priority
+    task which was released at the same time; the priority scheduler runs
+    them the other way around.
+    """
+    orders = {}
+    for sched in ("edf_sched", "pri_sched"):
+        clock = sim_time.install (sim_time.SimClock ())
+        log = []
+        t_list = cotask.TaskList ()
+        t_list.append (cotask.Task (make_fun (log, "Slow", clock),
+                                    name="Slow", priority=3, period=20))
+        t_list.append (cotask.Task (make_fun (log, "Fast", clock),
+                                    name="Fast", priority=1, period=10))
+
+        # At 20 ms both tasks come due; Fast's deadline is 30 ms and Slow's
+        # is 40 ms
+        run (t_list, clock, 20_000, sched)
+        assert log == ["Fast"]
+        log.clear ()
+        run (t_list, clock, 20_100, sched)
+        orders[sched] = log
+    assert orders["edf_sched"] == ["Fast", "Slow"]
+    assert orders["pri_sched"] == ["Slow", "Fast"]
+
+
+def test_deadline_fixed_at_release ():
+    """!
+    The deadline of a task which is released again before it runs stays at
+    the end of its first release's period, so the task doesn't look less
+    urgent the further behind it falls.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    log = []
+    late = cotask.Task (make_fun (log, "Late", clock), name="Late",
+                        period=10)
+    clock.now = 10_010
+    assert late.ready ()
+    assert late._deadline == 20_000
+    clock.now = 20_010
+    assert late.ready ()
+    assert late._next_run == 30_000
+    assert late._deadline == 20_000
+
+    # A higher priority task made now with a period of 5 ms is released
+    # just after 25 ms with a deadline just after 30 ms, later than Late's,
+    # so Late runs first
+    t_list = cotask.TaskList ()
+    t_list.append (late)
+    other = cotask.Task (make_fun (log, "Other", clock), name="Other",
+                         priority=2, period=5)
+    t_list.append (other)
+    clock.now = 25_010
+    run (t_list, clock, 25_100)
+    assert log == ["Late", "Other"]
+
+    # Once Late has run, its next release gets a new deadline
+    clock.now = 30_010
+    late.ready ()
+    assert late._deadline == 40_000
+
+
+def test_check_schedulable ():
+    """!
+    Two 10 ms tasks which each take 6 ms need 120% of the processor, which
+    @c check_schedulable() reports; at 4 ms each they fit.
+    """
+    for (cost, fits) in ((6000, False), (4000, True)):
+        clock = sim_time.install (sim_time.SimClock ())
+        log = []
+        t_list = cotask.TaskList ()
+        for name in ("One", "Two"):
+            t_list.append (cotask.Task (make_fun (log, name, clock, cost),
+                                        name=name, period=10, profile=True))
+        run (t_list, clock, 200_000)
+        assert abs (t_list.utilization () - 2 * cost / 10_000) < 0.01
+        assert t_list.check_schedulable () == fits
+
+
+if __name__ == "__main__":
+    for test in (test_earliest_first, test_deadline_fixed_at_release,
+                 test_check_schedulable):
+        test ()
+        print (f"{test.__name__}: passed")
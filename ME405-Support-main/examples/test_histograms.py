@@ -0,0 +1,137 @@
+"""!
+@file test_histograms.py
+This file tests the run time and lateness histograms kept by profiled
+@c cotask tasks on a PC, using the simulated clock in @c sim_time.py. A task
+is run with known run times and known lateness, and the test checks that:
+- @c Task.percentiles() gives the upper edges of the buckets holding the
+  50th, 95th and 99th percentiles
+- @c TaskList.hist_report() shows those edges in milliseconds, and a dash
+  for a task which hasn't run
+- @c TaskList.hist_csv() has a header of bucket edges and one row of counts
+  for each kind of histogram of each profiled task
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_histograms.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+
+## The period of the test task in milliseconds
+PERIOD = 10
+
+## Run times in microseconds. The first two runs aren't put into the run
+#  time histogram; of the rest, 50 go into the bucket from 64 to 127 µs, 45
+#  into the one from 512 to 1023 µs and 5 into the one from 4096 to 8191 µs
+RUN_TIMES = [100] * 2 + [100] * 50 + [1000] * 45 + [5000] * 5
+
+## How late each run starts, in microseconds: 60 runs in the bucket from 2
+#  to 3 µs, 40 in the one from 16 to 31 µs and 2 in the one from 256 to
+#  511 µs
+LATENESS = [3] * 60 + [20] * 40 + [300] * 2
+
+
+def run_known ():
+    """!
+    Run a profiled task with the known run times and lateness, and put it
+    into a task list with a profiled task which never runs and a task which
+    isn't profiled.
+    @returns A tuple holding the task list and the task which ran
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    runs = iter (RUN_TIMES)
+
+    def task_fun ():
+        while True:
+            clock.advance (next (runs))
+            yield 0
+
+    task = cotask.Task (task_fun, name="Known", period=PERIOD, profile=True)
+    for (index, late) in enumerate (LATENESS):
+        clock.now = (index + 1) * PERIOD * 1000 + late
+        assert task.schedule ()
+
+    t_list = cotask.TaskList ()
+    t_list.append (task)
+    t_list.append (cotask.Task (task_fun, name="Idle", priority=1,
+                                period=1000, profile=True))
+    t_list.append (cotask.Task (task_fun, name="Plain", priority=2,
+                                period=PERIOD))
+    return t_list, task
+
+
+def test_percentiles ():
+    """!
+    The percentiles are the upper edges of the buckets in which 50, 95 and
+    99 percent of the runs are reached.
+    """
+    _, task = run_known ()
+    assert task.percentiles (0.50) == (127, 3)
+    assert task.percentiles (0.95) == (1023, 31)
+    assert task.percentiles (0.99) == (8191, 511)
+    assert task._run_hist[7] == 50
+    assert task._run_hist[10] == 45
+    assert task._run_hist[13] == 5
+    assert sum (task._run_hist) == len (RUN_TIMES) - 2
+    assert sum (task._late_hist) == len (LATENESS)
+
+
+def test_hist_report ():
+    """!
+    The report has a row of percentiles in milliseconds for each profiled
+    task, with dashes for a task which has no data.
+    """
+    t_list, _ = run_known ()
+    lines = t_list.hist_report ().splitlines ()
+    assert lines[0].split () == ["TASK", "RUN", "P50", "RUN", "P95", "RUN",
+                                 "P99", "LATE", "P50", "LATE", "P95", "LATE",
+                                 "P99"]
+    assert lines[1] == ("Idle            " + "         -" * 6)
+    assert lines[2].split () == ["Known", "0.127", "1.023", "8.191",
+                                 "0.003", "0.031", "0.511"]
+    assert len (lines) == 3
+
+
+def test_hist_csv ():
+    """!
+    The CSV text has a header of bucket edges and a row of counts for the
+    run and lateness histograms of each profiled task.
+    """
+    t_list, task = run_known ()
+    rows = [line.split (",") for line in t_list.hist_csv ().splitlines ()]
+    assert rows[0][:2] == ["task", "kind"]
+    edges = [int (edge) for edge in rows[0][2:]]
+    assert len (edges) == cotask.HIST_BUCKETS
+    assert edges[:4] == [0, 1, 3, 7]
+    assert edges[-1] == (1 << (cotask.HIST_BUCKETS - 1)) - 1
+    assert [row[:2] for row in rows[1:]] == [["Idle", "run"],
+                                             ["Idle", "late"],
+                                             ["Known", "run"],
+                                             ["Known", "late"]]
+    assert rows[1][2:] == ["0"] * cotask.HIST_BUCKETS
+    run_counts = [int (count) for count in rows[3][2:]]
+    late_counts = [int (count) for count in rows[4][2:]]
+    assert run_counts == list (task._run_hist)
+    assert late_counts == list (task._late_hist)
+    assert (late_counts[2], late_counts[5], late_counts[9]) == (60, 40, 2)
+
+
+if __name__ == "__main__":
+    for test in (test_percentiles, test_hist_report, test_hist_csv):
+        test ()
+        print (f"{test.__name__}: passed")
+    t_list, _ = run_known ()
+    print ()
+    print (t_list.hist_report ())
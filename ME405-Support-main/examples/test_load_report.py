@@ -0,0 +1,163 @@
+"""!
+@file test_load_report.py
+This file tests the processor load accounting of @c cotask.TaskList on a PC,
+using the simulated clock in @c sim_time.py. Tasks and an idle hook which
+take known times to run are scheduled for a while, and the test checks that
+@c load_report() shows:
+- Each profiled task's share of the time, and a dash for a task which isn't
+  profiled
+- The total for all tasks, the time spent in the idle hook, and the rest,
+  which is the time taken by the scheduler itself
+- Only what has happened since @c reset_load() was called, once it has been
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_load_report.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+
+## The tasks' names, periods in milliseconds, run times in microseconds and
+#  whether they're profiled
+TASKS = (("Fast", 10, 1000, True), ("Slow", 20, 3000, True),
+         ("Plain", 50, 500, False))
+
+## Microseconds taken by each call to the idle hook
+IDLE_COST = 50
+
+## Microseconds taken by each pass through the scheduler, besides the tasks
+#  and the idle hook
+PASS_COST = 10
+
+
+def make_tasks ():
+    """!
+    Make the test tasks and an idle hook which take known times to run.
+    @returns A tuple holding the simulated clock, the task list and a dict
+             of the tasks by name
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    t_list = cotask.TaskList ()
+    tasks = {}
+    for (name, period, cost, profile) in TASKS:
+        def task_fun (cost=cost):
+            while True:
+                clock.advance (cost)
+                yield 0
+        tasks[name] = cotask.Task (task_fun, name=name, period=period,
+                                   profile=profile)
+        t_list.append (tasks[name])
+    t_list.set_idle_hook (lambda: clock.advance (IDLE_COST))
+    return clock, t_list, tasks
+
+
+def run (t_list, clock, until):
+    """!
+    Run the scheduler until the simulated clock reaches a given time.
+    @param t_list The task list to run
+    @param clock The simulated clock
+    @param until The simulated time in microseconds at which to stop
+    """
+    while clock.now < until:
+        t_list.pri_sched ()
+        clock.advance (PASS_COST)
+
+
+def parse (report):
+    """!
+    Split the rows of a load report into fields.
+    @param report The text from @c load_report()
+    @returns A dictionary holding the fields of each row after the name,
+             keyed by the name
+    """
+    rows = {}
+    for line in report.splitlines ()[1:]:
+        rows[line[:16].strip ()] = line[16:].split ()
+    return rows
+
+
+def check (report, elapsed, task_runs, idle_calls):
+    """!
+    Check a load report against the time each task and the idle hook were
+    charged for.
+    @param report The text from @c load_report()
+    @param elapsed The time in microseconds covered by the report
+    @param task_runs A dictionary of the number of runs of each task
+    @param idle_calls The number of calls to the idle hook
+    """
+    rows = parse (report)
+    busy = 0
+    for (name, period, cost, profile) in TASKS:
+        if profile:
+            busy += task_runs[name] * cost
+            expected = 100.0 * task_runs[name] * cost / elapsed
+            assert abs (float (rows[name][0]) - expected) < 0.006, name
+        else:
+            assert rows[name][0] == "-"
+    idle = idle_calls * IDLE_COST
+    assert abs (float (rows["All tasks"][0]) - 100.0 * busy / elapsed) < 0.006
+    assert abs (float (rows["Idle hook"][0]) - 100.0 * idle / elapsed) < 0.006
+    assert abs (float (rows["Scheduler"][0])
+                - 100.0 * (elapsed - busy - idle) / elapsed) < 0.006
+    assert float (rows["Scheduler"][0]) > 0
+
+
+def test_charged_costs ():
+    """!
+    Each task's share of the time, the idle hook's share and the
+    scheduler's share match the times they were charged for.
+    """
+    clock, t_list, tasks = make_tasks ()
+    run (t_list, clock, 1_000_000)
+    runs = {name : task._runs for (name, task) in tasks.items ()}
+    assert runs["Fast"] == 99
+    assert runs["Slow"] == 49
+    check (t_list.load_report (), clock.now, runs, t_list._idle_calls)
+
+
+def test_after_reset ():
+    """!
+    After @c reset_load(), the report covers only the time since then, and
+    the overrun counts start over.
+    """
+    clock, t_list, tasks = make_tasks ()
+
+    # Stall the scheduler once so that the fast task overruns before the
+    # reset
+    run (t_list, clock, 500_000)
+    clock.advance (25_000)
+    run (t_list, clock, 600_000)
+    assert tasks["Fast"]._overruns > 0
+
+    before = {name : task._runs for (name, task) in tasks.items ()}
+    t_list.reset_load ()
+    start = clock.now
+    run (t_list, clock, 1_400_000)
+    runs = {name : task._runs - before[name]
+            for (name, task) in tasks.items ()}
+    assert runs["Fast"] == 80
+    report = t_list.load_report ()
+    check (report, clock.now - start, runs, t_list._idle_calls)
+    assert parse (report)["Fast"][1:] == ["0", "0"]
+
+
+if __name__ == "__main__":
+    for test in (test_charged_costs, test_after_reset):
+        test ()
+        print (f"{test.__name__}: passed")
+    clock, t_list, _ = make_tasks ()
+    run (t_list, clock, 1_000_000)
+    print ()
+    print (t_list.load_report ())
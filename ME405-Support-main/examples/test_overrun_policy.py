@@ -0,0 +1,139 @@
+"""!
+@file test_overrun_policy.py
+This file tests the overrun policies of @c cotask.Task on a PC, using the
+simulated clock in @c sim_time.py. A task with a 10 ms period is stalled once
+for 55 ms, as might happen during a long @c print() or garbage collection, and
+the runs which follow are checked for each policy:
+- @c CATCH_UP runs the task back to back until it has made up every run
+- @c SKIP runs the task once, then goes back to the regular 10 ms schedule;
+  the stall covers five run times, so four runs are skipped
+- @c COALESCE does the same as @c SKIP and sends the number of skipped runs
+  into the task's generator
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_overrun_policy.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+
+## The period of the test task in milliseconds
+PERIOD = 10
+
+## How long, in microseconds, the task stalls on its tenth run
+STALL = 55_000
+
+## How long, in microseconds, each test runs
+SIM_TIME = 200_000
+
+
+def run_policy (policy):
+    """!
+    Run a task with the given overrun policy through a stall.
+    @param policy @c cotask.CATCH_UP, @c cotask.SKIP or @c cotask.COALESCE
+    @returns A tuple holding the task, a list of the times in microseconds at
+             which the task ran, and a list of the values sent into the
+             task's generator
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    run_times = []
+    received = []
+
+    def task_fun ():
+        runs = 0
+        while True:
+            runs += 1
+            run_times.append (clock.now)
+            if runs == 10:
+                clock.advance (STALL)
+            missed = yield 0
+            received.append (missed)
+
+    task = cotask.Task (task_fun, name="Stall", period=PERIOD, profile=True,
+                        overrun=policy)
+    t_list = cotask.TaskList ()
+    t_list.append (task)
+    while clock.now < SIM_TIME:
+        t_list.pri_sched ()
+        clock.advance (10)
+    return task, run_times, received
+
+
+def gaps (run_times):
+    """!
+    Find the times between runs which came after the stall.
+    @param run_times The times at which a task ran
+    @returns A list of times in microseconds between successive runs
+    """
+    return [later - earlier for (earlier, later)
+            in zip (run_times[9:], run_times[10:])]
+
+
+def test_catch_up ():
+    """!
+    After a stall, a catching-up task runs back to back, then runs at its
+    normal rate again. Every run is made up, none are skipped.
+    """
+    task, run_times, _ = run_policy (cotask.CATCH_UP)
+    after = gaps (run_times)
+    assert after[0] > STALL
+    assert all (gap < 100 for gap in after[1:5])
+    assert all (gap == PERIOD * 1000 for gap in after[6:])
+    assert task._skipped == 0
+    assert task._overruns >= 1
+    assert len (run_times) == SIM_TIME // (PERIOD * 1000) - 1
+
+
+def test_skip ():
+    """!
+    After a stall, a skipping task runs once and then continues at its normal
+    rate on its original time grid. The missed runs are counted.
+    """
+    task, run_times, received = run_policy (cotask.SKIP)
+    after = gaps (run_times)
+    assert after[0] > STALL
+    assert after[1] < PERIOD * 1000
+    assert all (gap == PERIOD * 1000 for gap in after[2:])
+    assert task._skipped == 4
+    assert task._missed == 0
+    assert all (missed is None for missed in received)
+    assert len (run_times) == SIM_TIME // (PERIOD * 1000) - 1 - 4
+
+
+def test_coalesce ():
+    """!
+    A coalescing task is scheduled like a skipping task, and the generator is
+    told how many runs it missed.
+    """
+    task, run_times, received = run_policy (cotask.COALESCE)
+    after = gaps (run_times)
+    assert all (gap == PERIOD * 1000 for gap in after[2:])
+    assert task._skipped == 4
+    assert received[9] == 4
+    assert sum (received) == 4
+
+
+if __name__ == "__main__":
+    for test in (test_catch_up, test_skip, test_coalesce):
+        test ()
+        print (f"{test.__name__}: passed")
+
+    for (name, policy) in (("CATCH_UP", cotask.CATCH_UP),
+                           ("SKIP", cotask.SKIP),
+                           ("COALESCE", cotask.COALESCE)):
+        _, run_times, received = run_policy (policy)
+        print (f"{name:<9s} gaps after stall (ms): "
+               + " ".join (f"{gap / 1000:.1f}"
+                           for gap in gaps (run_times)[:8]))
@@ -0,0 +1,247 @@
+"""!
+@file test_print_task.py
+This file tests @c print_task on a PC. It checks that integers and floats
+written by @c put_int() and @c put_float() come out the same as from an
+f-string, that the print task sends a line in one write rather than one
+character per run, that no write is longer than @c PT_CHUNK_SIZE, that text
+comes out whole and in order as the ring buffer wraps around, that a stream
+which writes only part of a chunk, or returns @c None, loses nothing, that
+strings which aren't ASCII come out as UTF-8, that integers too long for the
+digit buffer print whole, that a full buffer drops whole items and counts
+them, and that printing many numbers uses no more memory than printing a few.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_print_task.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import print_task
+
+
+class Recorder:
+    """!
+    A stream which keeps everything written to it and counts the writes.
+    """
+    def __init__ (self):
+        self.data = bytearray ()
+        self.writes = []
+
+    def write (self, chunk):
+        self.data += chunk
+        self.writes.append (len (chunk))
+        return len (chunk)
+
+
+class SlowStream (Recorder):
+    """!
+    A stream which takes only a few bytes at a time, as a UART with a full
+    transmit buffer does, and sometimes times out and returns @c None.
+    """
+    def __init__ (self, seed):
+        super ().__init__ ()
+        self._rand = random.Random (seed)
+
+    def write (self, chunk):
+        if self._rand.random () < 0.2:
+            return None
+        taken = self._rand.randint (0, len (chunk))
+        return super ().write (chunk[:taken])
+
+
+def printed (recorder=None):
+    """!
+    Run the print task until the print buffer is empty.
+    @param recorder The stream to print to, or @c None for a new recorder
+    @returns The recorder holding what was printed
+    """
+    if recorder is None:
+        recorder = Recorder ()
+    print_task.set_stream (recorder)
+    runner = print_task.print_task_function ()
+    while print_task.num_in ():
+        next (runner)
+    print_task.set_stream (None)
+    return recorder
+
+
+def test_numbers ():
+    """!
+    Integers and floats come out as an f-string would print them.
+    """
+    rand = random.Random (405)
+    expected = []
+    for n in range (300):
+        value = rand.randint (-10 ** rand.randint (0, 12), 10 ** 12)
+        width = rand.randint (0, 15)
+        print_task.put_int (value, width)
+        print_task.put (b" ")
+        expected.append (f"{value:{width}d} ")
+
+        # Stay away from halves, where the two may round differently
+        places = rand.randint (0, 6)
+        scale = 10 ** places
+        units = rand.randint (-10 ** 9, 10 ** 9)
+        value = (units + rand.choice ((0.2, 0.3, 0.7, 0.8))) / scale
+        print_task.put_float (value, places, width)
+        print_task.put ("\r\n")
+        expected.append (f"{value:{width}.{places}f}\r\n")
+        printed_text = printed ().data.decode ()
+        assert printed_text == "".join (expected), (value, places, width)
+        expected.clear ()
+
+    for (value, text) in ((0, "0.00"), (-0.001, "0.00"), (2.5, "2.50"),
+                          (float ("inf"), "inf"), (float ("-inf"), "-inf"),
+                          (float ("nan"), "nan"), (1e30, "inf")):
+        print_task.put_float (value)
+        assert printed ().data.decode () == text
+    print_task.put_int (0)
+    print_task.put_float (0.5, 0)
+    assert printed ().data.decode () == "01"
+
+
+def test_chunks ():
+    """!
+    A short line goes out in one write, and a long one in writes of at most
+    @c PT_CHUNK_SIZE bytes.
+    """
+    line = b"Position: 3300  Duty: 42.5\r\n"
+    print_task.put_bytes (line)
+    recorder = printed ()
+    assert recorder.writes == [len (line)]
+    assert recorder.data == line
+
+    text = "".join (chr (65 + n % 26) for n in range (300))
+    print_task.put (text)
+    recorder = printed ()
+    assert recorder.data.decode () == text
+    assert max (recorder.writes) <= print_task.PT_CHUNK_SIZE
+    assert len (recorder.writes) <= 300 // print_task.PT_CHUNK_SIZE + 2
+
+
+def test_wrap ():
+    """!
+    Text comes out whole and in order many times around the ring buffer.
+    """
+    rand = random.Random (1)
+    wanted = bytearray ()
+    got = bytearray ()
+    for n in range (2000):
+        word = bytes (rand.randint (48, 122)
+                      for m in range (rand.randint (1, 90)))
+        wanted += word
+        if n % 2:
+            print_task.put_bytes (word)
+        else:
+            print_task.put (word.decode ())
+        if rand.random () < 0.3:
+            got += printed ().data
+    got += printed ().data
+    assert got == wanted
+
+
+def test_partial_writes ():
+    """!
+    When the stream takes only part of each chunk or returns @c None, the
+    rest is sent later and the text comes out whole and in order.
+    """
+    rand = random.Random (2)
+    wanted = bytearray ()
+    for n in range (200):
+        word = bytes (rand.randint (48, 122)
+                      for m in range (rand.randint (1, 90)))
+        wanted += word
+        print_task.put_bytes (word)
+        if print_task.num_in () > print_task.PT_BUF_SIZE // 2:
+            assert printed (SlowStream (n)).data == wanted
+            wanted.clear ()
+    assert printed (SlowStream (0)).data == wanted
+
+
+def test_unicode ():
+    """!
+    Strings with characters outside ASCII come out as valid UTF-8, and a
+    full buffer drops them whole.
+    """
+    text = "Temp: 21.5 \u00b0C, \u00e9t\u00e9, 3 \u20ac, \U0001f600\r\n"
+    for n in range (20):
+        print_task.put (text)
+    assert printed ().data.decode () == text * 20
+
+    before = print_task.dropped ()
+    print_task.put ("x" * (print_task.PT_BUF_SIZE - 1))
+    print_task.put ("\u00e9")
+    assert print_task.dropped () - before == 2
+    assert printed ().data == b"x" * (print_task.PT_BUF_SIZE - 1)
+
+
+def test_huge_int ():
+    """!
+    Integers with more digits than the digit buffer holds are printed
+    whole, padded to the width.
+    """
+    for value in (10 ** 31 - 1, 10 ** 31, -10 ** 31, 7 ** 100, -7 ** 100):
+        for width in (0, 40, 100):
+            print_task.put_int (value, width)
+            assert printed ().data.decode () == f"{value:{width}d}"
+
+
+def test_full_drops ():
+    """!
+    When the buffer is full, whole items are dropped and counted.
+    """
+    before = print_task.dropped ()
+    word = b"0123456789abcdefghijklmnopq\r\n"
+    fit = print_task.PT_BUF_SIZE // len (word)
+    for n in range (fit + 5):
+        print_task.put_bytes (word)
+    room = print_task.PT_BUF_SIZE - fit * len (word)
+    print_task.put_int (10 ** room)
+    assert print_task.dropped () - before == 5 * len (word) + room + 1
+    print_task.put_int (10 ** (room - 1))
+    assert printed ().data == word * fit + str (10 ** (room - 1)).encode ()
+
+
+def test_constant_memory ():
+    """!
+    Printing 100 times as many numbers takes no more memory.
+    """
+    def print_many (count):
+        tracemalloc.start ()
+        for n in range (count):
+            print_task.put_int (n % 1000, 5)
+            print_task.put_float ((n % 1000) / 8, 3)
+            print_task.put (b"\r\n")
+            if print_task.num_in () > print_task.PT_BUF_SIZE // 2:
+                printed ()
+        peak = tracemalloc.get_traced_memory ()[1]
+        tracemalloc.stop ()
+        printed ()
+        return peak
+
+    short = print_many (100)
+    long = print_many (10_000)
+    assert long <= short + 512
+
+
+if __name__ == "__main__":
+    for test in (test_numbers, test_chunks, test_wrap, test_partial_writes,
+                 test_unicode, test_huge_int, test_full_drops,
+                 test_constant_memory):
+        test ()
+        print (f"{test.__name__}: passed")
+    print (f"Print buffer: {print_task.num_in ()} bytes waiting, "
+           f"{print_task.dropped ()} dropped")
@@ -0,0 +1,198 @@
+"""!
+@file test_queue_blocks.py
+This file tests the block copies @c put_many() and @c get_many() of
+@c task_share.Queue and @c task_share.SPSCQueue on a PC. It checks that a
+count which runs past the end of the buffer is cut short, that a bad start
+index raises an error before interrupts are turned off, that interrupts are
+turned back on when copying an item fails, and that items of another type
+are copied by value rather than as raw bits, including items from buffers
+which, like MicroPython's arrays, don't tell their type codes.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_queue_blocks.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import array
+import ctypes
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import pyb
+import task_share
+
+
+class IrqWatcher:
+    """!
+    Stands in for @c pyb.disable_irq() and @c pyb.enable_irq(), keeping
+    track of whether interrupts are turned off.
+    """
+    def __init__ (self):
+        self.disabled = 0
+
+    def __enter__ (self):
+        self._old = (pyb.disable_irq, pyb.enable_irq)
+        pyb.disable_irq = self.disable
+        pyb.enable_irq = self.enable
+        return self
+
+    def __exit__ (self, *args):
+        (pyb.disable_irq, pyb.enable_irq) = self._old
+
+    def disable (self):
+        self.disabled += 1
+        return True
+
+    def enable (self, state=True):
+        self.disabled -= 1
+
+
+def make_queues (type_code, size):
+    """!
+    Make one of each kind of queue, with interrupt protection where there
+    is any.
+    @returns A tuple holding a @c Queue and an @c SPSCQueue
+    """
+    return (task_share.Queue (type_code, size, thread_protect=True,
+                              name="Protected"),
+            task_share.SPSCQueue (type_code, size, name="Lock-free"))
+
+
+def test_counts_clamped ():
+    """!
+    A count which runs past the end of the source or destination is cut
+    short rather than raising an error.
+    """
+    for queue in make_queues ('L', 16):
+        with IrqWatcher () as irq:
+            source = array.array ('L', range (10))
+            assert queue.put_many (source, 6, 100) == 4
+            dest = array.array ('L', [0] * 3)
+            assert queue.get_many (dest, 1, 50) == 2
+            assert list (dest) == [0, 6, 7]
+            assert irq.disabled == 0
+
+
+def test_bad_start ():
+    """!
+    A start index outside the buffer raises an @c IndexError and leaves
+    interrupts on and the queue unchanged.
+    """
+    for queue in make_queues ('L', 16):
+        with IrqWatcher () as irq:
+            for start in (-1, 11):
+                try:
+                    queue.put_many (array.array ('L', range (10)), start)
+                    assert False, "put_many() took start " + str (start)
+                except IndexError:
+                    pass
+                try:
+                    queue.get_many (array.array ('L', range (10)), start)
+                    assert False, "get_many() took start " + str (start)
+                except IndexError:
+                    pass
+            assert irq.disabled == 0
+            assert queue.num_in () == 0
+
+
+def test_failed_copy ():
+    """!
+    When an item can't be put into the queue, the error comes out with
+    interrupts turned back on and nothing put into the queue.
+    """
+    for queue in make_queues ('B', 16):
+        with IrqWatcher () as irq:
+            try:
+                queue.put_many ([1, 2, 300, 4])
+                assert False, "put_many() took a byte of 300"
+            except (OverflowError, ValueError):
+                pass
+            assert irq.disabled == 0
+            assert queue.num_in () == 0
+
+
+def test_types_by_value ():
+    """!
+    Floats put into an integer queue, or integers into a float queue, are
+    copied by value; the bits of one type aren't taken as the other.
+    """
+    for queue in make_queues ('L', 8):
+        queue.put_many (array.array ('L', (1, 2, 3)))
+        dest = array.array ('f', [0.0] * 3)
+        assert queue.get_many (dest) == 3
+        assert list (dest) == [1.0, 2.0, 3.0]
+        try:
+            queue.put_many (array.array ('f', (1.5,)))
+            assert False, "An integer queue took a float"
+        except TypeError:
+            pass
+    for queue in make_queues ('f', 8):
+        queue.put_many (array.array ('l', (-4, 5)))
+        dest = [0, 0]
+        queue.get_many (dest)
+        assert dest == [-4.0, 5.0]
+
+
+class NoFormatView:
+    """!
+    Stands in for a MicroPython memoryview, which has no @c format, so that
+    @c task_share has to work out whether the items match the queue.
+    """
+    def __init__ (self, items):
+        self._view = memoryview (items)
+
+    def __getitem__ (self, index):
+        return self._view[index]
+
+
+def test_no_type_code ():
+    """!
+    Items in a buffer with no type code are copied as raw memory only if
+    they're the same kind of number, the same size and in the queue's range.
+    Items of another size or signedness are copied by value.
+    """
+    task_share.memoryview = NoFormatView
+    try:
+        for (ctype, code, values, fast) in (
+                (ctypes.c_int32, 'i', (1, 2), True),
+                (ctypes.c_int16, 'i', (1, 2), False),
+                (ctypes.c_uint32, 'i', (0xFFFFFFFF,), False),
+                (ctypes.c_int32, 'I', (-1,), False),
+                (ctypes.c_double, 'd', (1.5,), True),
+                (ctypes.c_float, 'd', (1.5,), False),
+                (ctypes.c_double, 'q', (1.5,), False)):
+            items = (ctype * len (values)) (*values)
+            view = task_share._same_type_view (items, code, 0)
+            assert (view is not None) == fast, (ctype, code)
+    finally:
+        del task_share.memoryview
+
+    # Here the buffers do tell their formats, and items which don't match
+    # the queue are copied by value
+    for queue in make_queues ('L', 8):
+        queue.put_many ((ctypes.c_int16 * 3) (1, 2, 3))
+        assert [queue.get () for n in range (3)] == [1, 2, 3]
+    for queue in make_queues ('d', 8):
+        queue.put_many ((ctypes.c_float * 2) (1.5, 2.5))
+        assert [queue.get () for n in range (2)] == [1.5, 2.5]
+    for queue in make_queues ('i', 8):
+        queue.put_many ((ctypes.c_int * 2) (5, -6))
+        dest = (ctypes.c_short * 2) ()
+        assert queue.get_many (dest) == 2
+        assert list (dest) == [5, -6]
+
+
+if __name__ == "__main__":
+    for test in (test_counts_clamped, test_bad_start, test_failed_copy,
+                 test_types_by_value, test_no_type_code):
+        test ()
+        print (f"{test.__name__}: passed")
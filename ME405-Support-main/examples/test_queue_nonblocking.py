@@ -0,0 +1,134 @@
+"""!
+@file test_queue_nonblocking.py
+This file tests the ways of getting and putting queue items which don't
+block the scheduler, on a PC with the simulated clock in @c sim_time.py:
+- @c try_get() and @c try_put() give up at once when there's nothing to get
+  or no room, returning @c NO_DATA or @c False
+- With a timeout, they wait until an item or room shows up, as an interrupt
+  callback might provide, or until the time is up
+- A task which gets items with @c get_async() lets other tasks run while it
+  waits, and gets every item in order
+- Each of these counts the times a caller would have been blocked
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_queue_nonblocking.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+import task_share
+
+
+class InterruptClock (sim_time.SimClock):
+    """!
+    A simulated clock which calls a function, standing in for an interrupt
+    callback, once the time reaches a given value.
+    """
+
+    def __init__ (self, at, callback):
+        """!
+        Create the clock.
+        @param at The time in microseconds at which to call the callback
+        @param callback The function to call
+        """
+        super ().__init__ (read_cost=1)
+        self._at = at
+        self._callback = callback
+
+    def ticks_us (self):
+        if self._callback is not None and self.now >= self._at:
+            callback = self._callback
+            self._callback = None
+            callback ()
+        return super ().ticks_us ()
+
+
+def test_try_no_wait ():
+    """!
+    Without a timeout, trying to get from an empty queue or put into a full
+    one gives up at once, and each try is counted.
+    """
+    sim_time.install (sim_time.SimClock (read_cost=1))
+    queue = task_share.Queue ('h', 2, name="Try")
+    assert queue.try_get () is task_share.NO_DATA
+    assert queue.try_put (1) and queue.try_put (2)
+    assert not queue.try_put (3)
+    assert queue.try_get () == 1
+    assert queue.blocked () == (1, 1)
+
+
+def test_try_timeout ():
+    """!
+    With a timeout, a get waits until an item arrives from an interrupt, or
+    gives up once the time is up.
+    """
+    queue = task_share.Queue ('h', 4, name="Timeout")
+    clock = sim_time.install (InterruptClock (300, lambda: queue.put (42)))
+    assert queue.try_get (timeout_us=1000) == 42
+    assert 300 <= clock.now < 1000
+
+    clock = sim_time.install (sim_time.SimClock (read_cost=1))
+    assert queue.try_get (timeout_us=500) is task_share.NO_DATA
+    assert clock.now >= 500
+    assert queue.blocked () == (2, 0)
+
+    for item in range (4):
+        queue.put (item)
+    clock = sim_time.install (InterruptClock (200, queue.get))
+    assert queue.try_put (9, timeout_us=1000)
+    assert queue.blocked () == (2, 1)
+
+
+def test_get_async ():
+    """!
+    A consumer task using @c get_async() gets every item in order while the
+    producer keeps running on schedule.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    queue = task_share.Queue ('L', 8, name="Async")
+    received = []
+
+    def producer_fun ():
+        count = 0
+        while True:
+            count += 1
+            queue.put (count)
+            yield 0
+
+    def consumer_fun ():
+        wait_data = cotask.Wait (queue)
+        while True:
+            item = yield from queue.get_async (wait_data)
+            received.append (item)
+
+    t_list = cotask.TaskList ()
+    producer = cotask.Task (producer_fun, name="Producer", priority=1,
+                            period=10)
+    consumer = cotask.Task (consumer_fun, name="Consumer", priority=2)
+    t_list.append (producer)
+    t_list.append (consumer)
+    consumer.go ()
+    while clock.now < 200_000:
+        t_list.pri_sched ()
+        clock.advance (10)
+    assert received == list (range (1, len (received) + 1))
+    assert len (received) == 19
+    assert queue.blocked ()[0] == 20
+
+
+if __name__ == "__main__":
+    for test in (test_try_no_wait, test_try_timeout, test_get_async):
+        test ()
+        print (f"{test.__name__}: passed")
@@ -0,0 +1,100 @@
+"""!
+@file test_queue_stats.py
+This file tests the statistics kept by @c task_share.Queue on a PC, using the
+simulated clock in @c sim_time.py. It checks the counts of items put and
+gotten, the count of items overwritten in a full queue (and that the oldest
+ones are the ones lost), the time for which a queue is at least 75% full,
+the suggested queue size, and that @c task_share.stats_all() gives data which
+can be sent to a PC as JSON.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_queue_stats.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import task_share
+
+
+def test_counts ():
+    """!
+    Puts and gets are counted, one item at a time or in blocks.
+    """
+    sim_time.install (sim_time.SimClock ())
+    queue = task_share.Queue ('h', 10, name="Counts")
+    for item in range (4):
+        queue.put (item)
+    queue.get ()
+    queue.put_many ([7, 8, 9])
+    queue.get_many ([0] * 2)
+    stats = queue.stats ()
+    assert (stats['puts'], stats['gets'], stats['num_in']) == (7, 3, 4)
+    assert stats['max_full'] == 6 and stats['overflows'] == 0
+    assert queue.recommended_size () == 8
+
+
+def test_overwrite ():
+    """!
+    A full queue which may overwrite data loses its oldest items, counts
+    them, and suggests a bigger size.
+    """
+    sim_time.install (sim_time.SimClock ())
+    queue = task_share.Queue ('h', 4, overwrite=True, name="Overwrite")
+    for item in range (7):
+        queue.put (item)
+    assert [queue.get () for n in range (4)] == [3, 4, 5, 6]
+    assert queue.stats ()['overflows'] == 3
+    assert queue.recommended_size () == 8
+
+
+def test_high_time ():
+    """!
+    The time for which the queue is at least 75% full is added up.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    queue = task_share.Queue ('h', 8, name="High")
+    for item in range (6):
+        queue.put (item)
+    clock.advance (30_000)
+    queue.get ()
+    clock.advance (50_000)
+    queue.put (1)
+    clock.advance (20_000)
+    stats = queue.stats ()
+    assert stats['high_ms'] == 50
+    assert stats['high_count'] == 1
+    assert stats['elapsed_ms'] == 100
+    assert ">75% 50.0%" in task_share.show_all ()
+
+
+def test_stats_all ():
+    """!
+    The statistics of all queues and shares can be turned into JSON.
+    """
+    sim_time.install (sim_time.SimClock ())
+    task_share.Queue ('B', 16, name="A queue")
+    task_share.Share ('f', name="A share")
+    task_share.RecordShare ('<hf', name="A record")
+    all_stats = json.loads (json.dumps (task_share.stats_all ()))
+    kinds = {stats['name'] : stats['kind'] for stats in all_stats}
+    assert kinds["A share"] == "Share"
+    assert kinds["A record"] == "RecordShare"
+    assert kinds["A queue"] == "Queue"
+
+
+if __name__ == "__main__":
+    for test in (test_counts, test_overwrite, test_high_time, test_stats_all):
+        test ()
+        print (f"{test.__name__}: passed")
@@ -0,0 +1,158 @@
+"""!
+@file test_record_share.py
+This file tests @c task_share.RecordShare on a PC. It checks that records
+are read back as written, whether by @c put() or as packed records by
+@c put_packed(), that a read which is interrupted by two writes is repeated
+and still gives a whole record, and, with a writer thread and a reader
+thread running at the same time, that no reader ever gets values from two
+different records.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_record_share.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import struct
+import sys
+import threading
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import task_share
+
+## The record format used by the tests: position, velocity, time, duty cycle
+FORMAT = '<lfLh'
+
+
+def record (n):
+    """!
+    Make the @c n-th test record, whose values can all be worked out from
+    any one of them.
+    @param n The record number
+    @returns A tuple of values in the order given by @c FORMAT
+    """
+    return (n, n / 4, 3 * n, n % 200 - 100)
+
+
+def consistent (values):
+    """!
+    Check that the values in a record were all written together.
+    @param values A tuple read from the share
+    @returns @c True if all values come from the same record
+    """
+    return values == record (values[0])
+
+
+def test_round_trip ():
+    """!
+    A record comes back as it was written, and the sequence number counts
+    the writes.
+    """
+    share = task_share.RecordShare (FORMAT, name="Round trip")
+    assert share.get () == (0, 0.0, 0, 0)
+    for n in range (1, 6):
+        share.put (*record (n))
+        assert share.get () == record (n)
+    assert share.sequence () == 5
+
+
+def test_put_packed ():
+    """!
+    A record packed ahead of time, as an interrupt callback would do it,
+    comes back the same as one written with @c put(), and a buffer of the
+    wrong size is refused without changing the share.
+    """
+    share = task_share.RecordShare (FORMAT, name="Packed")
+    packed = bytearray (share.record_size ())
+    for n in range (1, 6):
+        struct.pack_into (FORMAT, packed, 0, *record (n))
+        share.put_packed (packed)
+        assert share.get () == record (n)
+    try:
+        share.put_packed (bytearray (share.record_size () + 1))
+        assert False, "put_packed() took a record of the wrong size"
+    except ValueError:
+        pass
+    assert share.sequence () == 5 and share.get () == record (5)
+
+
+def test_interrupted_read ():
+    """!
+    If the writer runs twice while a read is in progress, as an interrupt
+    callback could, the read is repeated and gives the newest record.
+    """
+    share = task_share.RecordShare (FORMAT, name="Interrupted")
+    share.put (*record (1))
+    real_struct = task_share.struct
+    interrupts = [2]
+
+    class InterruptingStruct:
+        """! Writes two records during the first read only. """
+        pack_into = staticmethod (real_struct.pack_into)
+
+        @staticmethod
+        def unpack_from (fmt, buffer, offset=0):
+            values = real_struct.unpack_from (fmt, buffer, offset)
+            while interrupts[0] > 0:
+                share.put (*record (interrupts[0] + 10))
+                interrupts[0] -= 1
+            return values
+
+    task_share.struct = InterruptingStruct
+    try:
+        values = share.get ()
+    finally:
+        task_share.struct = real_struct
+    assert values == record (11)
+    assert share._retries == 1
+
+
+def test_threads ():
+    """!
+    A reader thread which runs while a writer thread is writing never sees
+    values from two different records.
+    """
+    share = task_share.RecordShare (FORMAT, name="Threads")
+    done = threading.Event ()
+    bad = []
+
+    def writer ():
+        for n in range (200_000):
+            share.put (*record (n))
+        done.set ()
+
+    def reader ():
+        while not done.is_set ():
+            values = share.get ()
+            if not consistent (values):
+                bad.append (values)
+
+    old_interval = sys.getswitchinterval ()
+    sys.setswitchinterval (1e-6)
+    try:
+        threads = [threading.Thread (target=writer),
+                   threading.Thread (target=reader)]
+        for thread in threads:
+            thread.start ()
+        for thread in threads:
+            thread.join ()
+    finally:
+        sys.setswitchinterval (old_interval)
+    assert bad == []
+    assert consistent (share.get ())
+
+
+if __name__ == "__main__":
+    for test in (test_round_trip, test_put_packed, test_interrupted_read,
+                 test_threads):
+        test ()
+        print (f"{test.__name__}: passed")
+    print (task_share.show_all ())
@@ -0,0 +1,154 @@
+"""!
+@file test_sample_queue.py
+This file tests @c task_share.SampleQueue on a PC. It logs a simulated step
+response as frames of time, position and duty cycle, and checks that frames
+come back whole and in order through @c get() and through @c drain_into()
+when the frames wrap around the end of the buffer, that a full queue drops
+or overwrites frames as asked, that decimation keeps every Nth frame, and
+that logging a long run uses no more memory than logging a short one.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_sample_queue.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import struct
+import sys
+import tracemalloc
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import task_share
+
+## The frame format used by the tests: time in ms, position, duty cycle
+FORMAT = '<Llf'
+
+
+def frame (n):
+    """!
+    Make the @c n-th frame of a simulated step response run every 10 ms.
+    @param n The frame number
+    @returns A tuple of values in the order given by @c FORMAT
+    """
+    return (10 * n, 3300 - 3300 // (n + 1), (n % 8) * 12.5)
+
+
+def test_round_trip ():
+    """!
+    Frames come back whole and in order, also after wrapping around.
+    """
+    log = task_share.SampleQueue (FORMAT, 8, name="Round trip")
+    assert log.frame_size () == struct.calcsize (FORMAT)
+    n = 0
+    for rounds in range (5):
+        for k in range (5):
+            log.put (*frame (n + k))
+        assert log.num_in () == 5
+        for k in range (5):
+            assert log.get () == frame (n)
+            n += 1
+        assert log.empty ()
+    assert log.stats ()['puts'] == log.stats ()['gets'] == 25
+
+
+def test_drain_wraps ():
+    """!
+    Draining copies whole frames, splitting the copy where the frames wrap
+    around the end of the buffer, and a small buffer gets only what fits.
+    """
+    log = task_share.SampleQueue (FORMAT, 10, name="Drain")
+    for n in range (6):
+        log.put (*frame (n))
+    for n in range (6):
+        log.get ()
+    for n in range (6, 15):               # These wrap after the fourth
+        log.put_frame (frame (n))
+
+    upload = bytearray (4 * log.frame_size () + 5)
+    count = log.drain_into (upload)
+    assert count == 4 * log.frame_size ()
+    assert list (struct.iter_unpack (FORMAT, upload[:count])) \
+        == [frame (n) for n in range (6, 10)]
+
+    upload = bytearray (2 + 20 * log.frame_size ())
+    count = log.drain_into (upload, start=2)
+    assert count == 5 * log.frame_size ()
+    assert list (struct.iter_unpack (FORMAT, upload[2:2 + count])) \
+        == [frame (n) for n in range (10, 15)]
+    assert log.empty ()
+    assert log.drain_into (upload) == 0
+
+
+def test_full ():
+    """!
+    A full queue drops new frames, or overwrites old ones if asked to.
+    """
+    log = task_share.SampleQueue (FORMAT, 4, name="Drop")
+    for n in range (6):
+        log.put (*frame (n))
+    assert [log.get () for n in range (4)] == [frame (n) for n in range (4)]
+    assert log.stats ()['dropped'] == 2
+
+    log = task_share.SampleQueue (FORMAT, 4, overwrite=True, name="Overwrite")
+    for n in range (6):
+        log.put (*frame (n))
+    assert [log.get () for n in range (4)] == [frame (n) for n in range (2, 6)]
+    assert log.stats ()['dropped'] == 2
+
+
+def test_decimate ():
+    """!
+    Decimation keeps the first frame and every Nth one after it.
+    """
+    log = task_share.SampleQueue (FORMAT, 10, decimate=3, name="Decimate")
+    for n in range (10):
+        log.put (*frame (n))
+    assert [log.get ()[0] for n in range (log.num_in ())] == [0, 30, 60, 90]
+    assert log.stats ()['decimated'] == 6
+
+
+def log_run (log, frames):
+    """!
+    Log a run, draining the queue into a fixed upload buffer as it fills, as
+    a printing task would.
+    @param log The sample queue to use
+    @param frames How many frames to log
+    @returns The peak memory, in bytes, allocated while logging
+    """
+    upload = bytearray (16 * log.frame_size ())
+    values = [0, 0, 0.0]
+    tracemalloc.start ()
+    for n in range (frames):
+        values[0] = 10 * n
+        values[1] = n
+        log.put_frame (values)
+        if log.full ():
+            log.drain_into (upload)
+    peak = tracemalloc.get_traced_memory ()[1]
+    tracemalloc.stop ()
+    return peak
+
+
+def test_constant_memory ():
+    """!
+    Logging 100 times as many frames takes no more memory.
+    """
+    short = log_run (task_share.SampleQueue (FORMAT, 16, name="Short"), 200)
+    long = log_run (task_share.SampleQueue (FORMAT, 16, name="Long"), 20_000)
+    assert long <= short + 512
+
+
+if __name__ == "__main__":
+    for test in (test_round_trip, test_drain_wraps, test_full, test_decimate,
+                 test_constant_memory):
+        test ()
+        print (f"{test.__name__}: passed")
+    print (task_share.show_all ())
@@ -0,0 +1,144 @@
+"""!
+@file test_spsc_queue.py
+This file tests @c task_share.SPSCQueue on a PC. Python threads stand in for
+an interrupt callback which puts items into the queue and a task which takes
+them out; the threads are switched very often, so each end is interrupted at
+every possible point. The tests check that every item arrives once and in
+order, one at a time and in blocks, that the queue holds exactly as many
+items as its size, and that interrupts are never disabled.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_spsc_queue.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import array
+import os
+import sys
+import threading
+import time
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import pyb
+import task_share
+
+## The number of items sent through the queue in each stress test
+NUM_ITEMS = 100_000
+
+## The size of the queue used in the stress tests, small so it's often full
+QUEUE_SIZE = 7
+
+
+def no_irq ():
+    """!
+    Stands in for @c pyb.disable_irq() to show that it's never called.
+    """
+    raise AssertionError ("SPSCQueue disabled interrupts")
+
+
+def run_threads (producer, consumer):
+    """!
+    Run a producer and a consumer in two threads which are switched very
+    often, with @c pyb.disable_irq() replaced by @c no_irq().
+    @param producer The function run by the producer thread
+    @param consumer The function run by the consumer thread
+    """
+    old_interval = sys.getswitchinterval ()
+    old_disable = pyb.disable_irq
+    sys.setswitchinterval (1e-5)
+    pyb.disable_irq = no_irq
+    try:
+        threads = [threading.Thread (target=producer),
+                   threading.Thread (target=consumer)]
+        for thread in threads:
+            thread.start ()
+        for thread in threads:
+            thread.join ()
+    finally:
+        sys.setswitchinterval (old_interval)
+        pyb.disable_irq = old_disable
+
+
+def test_capacity ():
+    """!
+    The queue holds exactly as many items as its size, and no more.
+    """
+    queue = task_share.SPSCQueue ('h', 4, name="Capacity")
+    for item in range (4):
+        assert queue.try_put (item)
+    assert queue.full () and queue.num_in () == 4
+    assert not queue.try_put (9)
+    assert [queue.get () for n in range (4)] == [0, 1, 2, 3]
+    assert queue.empty ()
+    assert queue.stats ()['size'] == 4
+
+
+def test_stress_items ():
+    """!
+    Items put one at a time by one thread all arrive in order in another.
+    """
+    queue = task_share.SPSCQueue ('L', QUEUE_SIZE, name="Items")
+    received = []
+
+    # When there's no room or nothing to get, each thread lets the other one
+    # run rather than spinning, which would only waste time on a PC
+    def producer ():
+        for item in range (NUM_ITEMS):
+            while not queue.try_put (item):
+                time.sleep (0)
+
+    def consumer ():
+        while len (received) < NUM_ITEMS:
+            item = queue.try_get ()
+            if item is task_share.NO_DATA:
+                time.sleep (0)
+            else:
+                received.append (item)
+
+    run_threads (producer, consumer)
+    assert received == list (range (NUM_ITEMS))
+    assert queue.empty ()
+    assert queue.stats ()['max_full'] <= QUEUE_SIZE
+
+
+def test_stress_blocks ():
+    """!
+    Items put in blocks by one thread all arrive in order in another, which
+    takes them out in blocks of a different size.
+    """
+    queue = task_share.SPSCQueue ('L', QUEUE_SIZE, name="Blocks")
+    source = array.array ('L', range (NUM_ITEMS))
+    received = array.array ('L', [0]) * NUM_ITEMS
+
+    def producer ():
+        sent = 0
+        while sent < NUM_ITEMS:
+            count = queue.put_many (source, sent, min (5, NUM_ITEMS - sent))
+            if count == 0:
+                time.sleep (0)
+            sent += count
+
+    def consumer ():
+        got = 0
+        while got < NUM_ITEMS:
+            count = queue.get_many (received, got, min (3, NUM_ITEMS - got))
+            if count == 0:
+                time.sleep (0)
+            got += count
+
+    run_threads (producer, consumer)
+    assert received == source
+
+
+if __name__ == "__main__":
+    for test in (test_capacity, test_stress_items, test_stress_blocks):
+        test ()
+        print (f"{test.__name__}: passed")
@@ -0,0 +1,191 @@
+"""!
+@file test_task_control.py
+This file tests adding, removing, suspending and resuming tasks and changing
+their priorities while the scheduler runs, on a PC with the simulated clock in
+@c sim_time.py. It checks that:
+- A task whose generator returns is retired and taken out of the task list
+- @c reset_load() starts the load figures of retired tasks over too
+- Removing a task, even from inside a running task, keeps the round-robin
+  order of the other tasks at the same priority
+- @c set_priority() moves a task to its new priority
+- A suspended task doesn't run under @c pri_sched(), @c heap_sched() or
+  @c frozen_sched(), and runs again once resumed
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_task_control.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+
+## How long, in microseconds, each test runs
+SIM_TIME = 200_000
+
+
+def make_fun (log, name, runs=None):
+    """!
+    Make a task function which writes its name into a log each time it runs.
+    @param log The list into which names are written
+    @param name The name to write
+    @param runs The number of runs after which the generator returns, or
+           @c None to run forever
+    @returns A generator function for @c cotask.Task
+    """
+    def task_fun ():
+        count = 0
+        while runs is None or count < runs:
+            count += 1
+            log.append (name)
+            yield 0
+    return task_fun
+
+
+def run (t_list, clock, until, sched="pri_sched"):
+    """!
+    Run the scheduler until the simulated clock reaches a given time.
+    @param t_list The task list to run
+    @param clock The simulated clock
+    @param until The simulated time in microseconds at which to stop
+    @param sched The name of the scheduler method to use
+    """
+    sched = getattr (t_list, sched)
+    while clock.now < until:
+        sched ()
+        clock.advance (10)
+
+
+def test_retire ():
+    """!
+    A task whose generator returns is taken out of the task list, leaving no
+    empty priority list behind, and the other tasks keep running.
+    """
+    for sched in ("pri_sched", "heap_sched", "edf_sched", "frozen_sched"):
+        clock = sim_time.install (sim_time.SimClock ())
+        log = []
+        t_list = cotask.TaskList ()
+        short = cotask.Task (make_fun (log, "Short", runs=5), name="Short",
+                             priority=2, period=10)
+        t_list.append (short)
+        t_list.append (cotask.Task (make_fun (log, "Long"), name="Long",
+                                    priority=1, period=10))
+        run (t_list, clock, SIM_TIME, sched)
+        assert short.done
+        assert log.count ("Short") == 5
+        assert log.count ("Long") == SIM_TIME // 10_000 - 1
+        assert [pri[0] for pri in t_list.pri_list] == [1]
+
+
+def test_reset_load_after_retire ():
+    """!
+    After a task retires and @c reset_load() is called, the load report
+    shows nothing for the retired task, and the totals stay within 100%.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    t_list = cotask.TaskList ()
+
+    def busy_fun (runs):
+        def task_fun ():
+            for count in range (runs):
+                clock.advance (5000)
+                yield 0
+        return task_fun
+
+    once = cotask.Task (busy_fun (100), name="Once", priority=2, period=10,
+                        profile=True)
+    t_list.append (once)
+    t_list.append (cotask.Task (busy_fun (1_000_000), name="Steady",
+                                period=10, profile=True))
+    run (t_list, clock, 1_500_000)
+    assert once.done
+
+    t_list.reset_load ()
+    assert once._run_total == 0
+    run (t_list, clock, 2_000_000)
+    rows = {line[:16].strip () : line[16:].split ()
+            for line in t_list.load_report ().splitlines ()[1:]}
+    assert float (rows["Once"][0]) == 0.0
+    assert abs (float (rows["Steady"][0]) - 50.0) < 1.0
+    assert abs (float (rows["All tasks"][0]) - 50.0) < 1.0
+    assert abs (float (rows["Scheduler"][0]) - 50.0) < 1.0
+
+
+def test_remove_keeps_order ():
+    """!
+    Tasks of equal priority which are always ready take turns; when one of
+    them retires while running, the others still take turns in order.
+    """
+    for sched in ("pri_sched", "frozen_sched"):
+        clock = sim_time.install (sim_time.SimClock ())
+        log = []
+        t_list = cotask.TaskList ()
+        for (name, runs) in (("A", None), ("B", 3), ("C", None), ("D", None)):
+            t_list.append (cotask.Task (make_fun (log, name, runs), name=name,
+                                        period=0.01))
+        run (t_list, clock, 20_000, sched)
+        assert log[:8] == ["A", "B", "C", "D"] * 2
+        after = log[log.index ("B", 8) + 1:]
+        assert "B" not in after
+        assert after[:9] == ["C", "D", "A"] * 3
+
+
+def test_set_priority ():
+    """!
+    A task whose priority is raised runs before the others.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    log = []
+    t_list = cotask.TaskList ()
+    tasks = [cotask.Task (make_fun (log, name), name=name, priority=pri,
+                          period=10)
+             for (name, pri) in (("Low", 1), ("Mid", 2), ("High", 3))]
+    for task in tasks:
+        t_list.append (task)
+    t_list.set_priority (tasks[0], 5)
+    assert [pri[0] for pri in t_list.pri_list] == [5, 3, 2]
+    run (t_list, clock, 10_100)
+    assert log == ["Low", "High", "Mid"]
+
+
+def test_suspend_resume ():
+    """!
+    A suspended task doesn't run; once resumed, it runs on its period again.
+    """
+    for sched in ("pri_sched", "heap_sched", "frozen_sched"):
+        clock = sim_time.install (sim_time.SimClock ())
+        log = []
+        t_list = cotask.TaskList ()
+        paused = cotask.Task (make_fun (log, "Paused"), name="Paused",
+                              priority=2, period=10)
+        t_list.append (paused)
+        t_list.append (cotask.Task (make_fun (log, "Other"), name="Other",
+                                    priority=1, period=10))
+        run (t_list, clock, 50_000, sched)
+        before = log.count ("Paused")
+        paused.suspend ()
+        paused.go ()
+        run (t_list, clock, 100_000, sched)
+        assert log.count ("Paused") == before
+        paused.resume ()
+        run (t_list, clock, 150_000, sched)
+        assert log.count ("Paused") == before + 5
+        assert log.count ("Other") == 150_000 // 10_000 - 1
+
+
+if __name__ == "__main__":
+    for test in (test_retire, test_reset_load_after_retire,
+                 test_remove_keeps_order, test_set_priority,
+                 test_suspend_resume):
+        test ()
+        print (f"{test.__name__}: passed")
@@ -0,0 +1,171 @@
+"""!
+@file test_task_frame.py
+This file tests @c cotask.TaskFrame on a PC, using the simulated clock in
+@c sim_time.py. A task set like the lab's, with two tasks at 10 ms and one at
+15 ms, is profiled and then aligned, and the test checks that:
+- The frame's tick is 5 ms and its hyperperiod 30 ms
+- The two heavy 10 ms tasks are put in different ticks, so they never come
+  due together, and they're released at their offsets once the scheduler
+  runs
+- @c load_report() shows the tick, the hyperperiod and the worst tick
+- A frame whose hyperperiod holds more than @c FRAME_MAX_TICKS ticks raises
+  a @c ValueError rather than making a huge table
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_task_frame.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+
+## The tasks' names, priorities, periods in milliseconds and run times in
+#  microseconds
+TASKS = (("Task_1", 2, 10, 2000), ("Task_2", 3, 10, 1500),
+         ("Task_3", 1, 15, 1000))
+
+
+def make_tasks (log=None):
+    """!
+    Make the test tasks and profile them for a while, so that the frame can
+    weigh them by their slowest run times.
+    @param log A list into which each run's task name and time are written,
+           or @c None
+    @returns A tuple holding the simulated clock, the task list and a list
+             of the tasks
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    t_list = cotask.TaskList ()
+    tasks = []
+    for (name, pri, period, cost) in TASKS:
+        def task_fun (name=name, cost=cost):
+            while True:
+                if log is not None:
+                    log.append ((name, clock.now))
+                clock.advance (cost)
+                yield 0
+        tasks.append (cotask.Task (task_fun, name=name, priority=pri,
+                                   period=period, profile=True))
+        t_list.append (tasks[-1])
+    run (t_list, clock, 100_000)
+    return clock, t_list, tasks
+
+
+def run (t_list, clock, until):
+    """!
+    Run the scheduler until the simulated clock reaches a given time.
+    @param t_list The task list to run
+    @param clock The simulated clock
+    @param until The simulated time in microseconds at which to stop
+    """
+    while clock.now < until:
+        t_list.pri_sched ()
+        clock.advance (10)
+
+
+def test_tick_and_hyperperiod ():
+    """!
+    Periods of 10, 10 and 15 ms give a 5 ms tick and a 30 ms hyperperiod,
+    and aren't harmonic.
+    """
+    _, _, tasks = make_tasks ()
+    frame = cotask.TaskFrame (tasks)
+    assert frame.tick () == 5000
+    assert frame.hyperperiod () == 30_000
+    assert not frame.is_harmonic ()
+    assert cotask.TaskFrame ().tick () == 0
+
+
+def test_heavy_tasks_apart ():
+    """!
+    The two 10 ms tasks get offsets an odd number of ticks apart, so no tick
+    holds both of them, and once the scheduler runs they're released one
+    tick apart.
+    """
+    log = []
+    clock, t_list, tasks = make_tasks (log)
+    frame = cotask.TaskFrame (tasks)
+    start = 200_000
+    frame.align (start)
+    (first, second, _) = frame.offsets
+    assert (second - first) % 10_000 == 5000
+    for (slot_tasks, load) in frame.tick_loads ():
+        assert not (tasks[0] in slot_tasks and tasks[1] in slot_tasks)
+        assert load == sum (task._slowest for task in slot_tasks)
+    assert len (frame.tick_loads ()) == 6
+
+    for (task, offset) in zip (tasks, frame.offsets):
+        assert task.next_run () == start + offset
+    log.clear ()
+    run (t_list, clock, start + 60_000)
+    for (task, offset) in zip (tasks[:2], frame.offsets):
+        times = [when for (name, when) in log if name == task.name]
+        assert times[0] - (start + offset) <= 20
+        assert all (later - earlier == task.period for (earlier, later)
+                    in zip (times, times[1:]))
+
+
+def test_load_report ():
+    """!
+    The report names the tick and hyperperiod, has a row for each tick and
+    ends with the worst tick's load.
+    """
+    _, _, tasks = make_tasks ()
+    frame = cotask.TaskFrame (tasks)
+    frame.align ()
+    lines = frame.load_report ().splitlines ()
+    assert lines[0] == ("Frame: tick 5.0 ms, hyperperiod 30.0 ms "
+                        "(not harmonic)")
+    assert len (lines) == 2 + 6 + 1
+    worst = max (load for (_, load) in frame.tick_loads ())
+    assert lines[-1].startswith (f"Worst tick: {worst} ")
+
+
+def test_too_many_ticks ():
+    """!
+    Periods which barely divide each other need a table too large to keep,
+    so aligning them raises an error; a frame right at the limit is fine.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+
+    def task_fun ():
+        while True:
+            yield 0
+
+    def frame_of (*periods):
+        return cotask.TaskFrame ([cotask.Task (task_fun, period=period)
+                                  for period in periods])
+
+    for frame in (frame_of (10.007, 10.009), frame_of (1, 2001)):
+        for method in (frame.align, frame.tick_loads):
+            try:
+                method ()
+                assert False, "A frame with too many ticks was made"
+            except ValueError:
+                pass
+    frame = frame_of (1, cotask.FRAME_MAX_TICKS)
+    frame.align ()
+    assert len (frame.tick_loads ()) == cotask.FRAME_MAX_TICKS
+
+
+if __name__ == "__main__":
+    for test in (test_tick_and_hyperperiod, test_heavy_tasks_apart,
+                 test_load_report, test_too_many_ticks):
+        test ()
+        print (f"{test.__name__}: passed")
+    _, _, tasks = make_tasks ()
+    frame = cotask.TaskFrame (tasks)
+    frame.align ()
+    print ()
+    print (frame.load_report ())
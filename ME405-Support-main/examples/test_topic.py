@@ -0,0 +1,184 @@
+"""!
+@file test_topic.py
+This file tests @c task_share.Topic on a PC. It checks that every subscriber
+gets every item in order, that a subscriber which falls behind drops only the
+items which were overwritten and counts them, that @c latest() gives the
+newest item, that sequence numbers can wrap around, that a task waiting on a
+subscription is woken by @c publish(), and, with a publisher thread and a
+subscriber thread running at the same time, that no item is ever read twice
+or out of order.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_topic.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+import task_share
+
+
+def test_fan_out ():
+    """!
+    Three subscribers reading at different times each get every item.
+    """
+    topic = task_share.Topic ('l', 8, name="Fan out")
+    subs = [topic.subscribe (name) for name in ("Control", "Log", "GUI")]
+    got = {sub.name : [] for sub in subs}
+    for n in range (100):
+        topic.publish (n - 50)
+        got["Control"].append (subs[0].latest ())
+        if n % 3 == 2:
+            while subs[1].any ():
+                got["Log"].append (subs[1].get ())
+        if n % 7 == 6:
+            while subs[2].any ():
+                got["GUI"].append (subs[2].get ())
+    for sub in subs[1:]:
+        while sub.any ():
+            got[sub.name].append (sub.get ())
+    for sub in subs:
+        assert got[sub.name] == list (range (-50, 50))
+        assert sub.stats ()['dropped'] == 0
+    assert subs[2].stats ()['max_lag'] == 7
+
+
+def test_slow_subscriber ():
+    """!
+    A subscriber which falls behind skips to the oldest item still kept and
+    counts the rest as dropped, without holding up the other subscriber.
+    """
+    topic = task_share.Topic ('H', 8, name="Slow")
+    fast = topic.subscribe ("Fast")
+    slow = topic.subscribe ("Slow")
+    for n in range (20):
+        topic.publish (n)
+        assert fast.get () == n
+    assert slow.lag () == 20
+    assert slow.num_in () == 8
+    assert [slow.get () for n in range (8)] == list (range (12, 20))
+    assert slow.try_get () is task_share.NO_DATA
+    assert slow.stats ()['dropped'] == 12
+    assert fast.stats ()['dropped'] == 0
+
+
+def test_latest ():
+    """!
+    @c latest() gives the newest item and skips the others without counting
+    them as dropped.
+    """
+    topic = task_share.Topic ('f', 4, name="Latest")
+    sub = topic.subscribe ()
+    assert sub.latest () is task_share.NO_DATA
+    for n in range (10):
+        topic.publish (n / 2)
+    assert sub.latest () == 4.5
+    assert not sub.any ()
+    assert sub.stats ()['dropped'] == 0
+
+
+def test_sequence_wraps ():
+    """!
+    Items keep coming through in order when the sequence numbers wrap.
+    """
+    topic = task_share.Topic ('L', 4, name="Wrap")
+    topic._seq = task_share._SEQ_MASK - 2
+    sub = topic.subscribe ()
+    for n in range (10):
+        topic.publish (n)
+        assert sub.lag () == 1
+        assert sub.get () == n
+    assert topic._seq == 7
+
+
+def test_wait ():
+    """!
+    A task which waits on a subscription runs once for each item published.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    topic = task_share.Topic ('L', 8, name="Wait")
+    sub = topic.subscribe ("Waiter")
+    received = []
+
+    def producer_fun ():
+        count = 0
+        while True:
+            count += 1
+            topic.publish (count)
+            yield 0
+
+    def consumer_fun ():
+        wait_data = cotask.Wait (sub)
+        while True:
+            while sub.any ():
+                received.append (sub.get ())
+            yield wait_data
+
+    t_list = cotask.TaskList ()
+    t_list.append (cotask.Task (producer_fun, name="Producer", priority=1,
+                                period=10))
+    consumer = cotask.Task (consumer_fun, name="Consumer", priority=2)
+    t_list.append (consumer)
+    consumer.go ()
+    while clock.now < 200_000:
+        t_list.pri_sched ()
+        clock.advance (10)
+    assert received == list (range (1, 20))
+
+
+def test_threads ():
+    """!
+    A subscriber reading while the publisher is writing in another thread
+    gets items in order with no repeats, and every gap is counted as dropped.
+    """
+    topic = task_share.Topic ('L', 16, name="Threads")
+    sub = topic.subscribe ("Reader")
+    received = []
+    count = 50_000
+
+    def publisher ():
+        for n in range (count):
+            topic.publish (n)
+            if n % 64 == 0:
+                time.sleep (0)
+
+    def reader ():
+        while len (received) + sub._dropped < count:
+            item = sub.try_get ()
+            if item is not task_share.NO_DATA:
+                received.append (item)
+
+    old_interval = sys.getswitchinterval ()
+    sys.setswitchinterval (1e-5)
+    try:
+        threads = [threading.Thread (target=publisher),
+                   threading.Thread (target=reader)]
+        for thread in threads:
+            thread.start ()
+        for thread in threads:
+            thread.join ()
+    finally:
+        sys.setswitchinterval (old_interval)
+    assert all (a < b for (a, b) in zip (received, received[1:]))
+    assert len (received) + sub._dropped == count
+
+
+if __name__ == "__main__":
+    for test in (test_fan_out, test_slow_subscriber, test_latest,
+                 test_sequence_wraps, test_wait, test_threads):
+        test ()
+        print (f"{test.__name__}: passed")
+    print (task_share.show_all ())
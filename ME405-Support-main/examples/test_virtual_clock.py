@@ -0,0 +1,109 @@
+"""!
+@file test_virtual_clock.py
+This file tests @c sim_time.VirtualClock with @c cotask on a PC. It replays
+ten minutes of a task set like the one in the lab's @c main.py, with two
+tasks at 10 ms and one at 15 ms, and checks that the profiling results are
+exactly the same each time and match the declared task costs. Use it as a
+pattern for regression tests of changes to the scheduler.
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_virtual_clock.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import cotask
+
+## Declared run costs of the tasks in microseconds
+COSTS = {"Task_1" : 400, "Task_2" : 50, "Task_3" : 300}
+
+## How long to replay, in microseconds
+REPLAY_TIME = 10 * 60 * 1_000_000
+
+
+def task_fun ():
+    """!
+    A task which flips between two states.
+    """
+    state = 0
+    while True:
+        state = 1 - state
+        yield state
+
+
+def replay (sched="pri_sched", scale=None):
+    """!
+    Replay ten minutes of the test task set.
+    @param sched The name of the scheduler method to use
+    @param scale If not @c None, measure task costs and scale them by this
+    @returns A tuple holding the task list and a list of each task's number
+             of runs, total run time, total lateness and maximum lateness
+    """
+    clock = sim_time.VirtualClock (read_cost=1, pass_cost=5, scale=scale)
+    cotask.set_clock (clock)
+    t_list = cotask.TaskList ()
+    for (name, pri, period) in (("Task_1", 2, 10), ("Task_2", 3, 10),
+                                ("Task_3", 1, 15)):
+        t_list.append (cotask.Task (task_fun, name=name, priority=pri,
+                                    period=period, profile=True))
+    clock.attach (t_list, None if scale else COSTS)
+    clock.run (t_list, REPLAY_TIME, sched)
+    cotask.set_clock (None)
+
+    results = [(task._runs, task._run_total, task._late_sum, task._latest)
+               for pri in t_list.pri_list for task in pri[2:]]
+    return t_list, results
+
+
+def test_reproducible ():
+    """!
+    Two replays with declared costs give exactly the same results.
+    """
+    _, first = replay ()
+    _, second = replay ()
+    assert first == second
+
+
+def test_costs_charged ():
+    """!
+    Each task's measured run times come from its declared cost, plus the
+    simulated cost of reading the clock, and every run is made.
+    """
+    t_list, _ = replay ()
+    for pri in t_list.pri_list:
+        for task in pri[2:]:
+            assert task._slowest == COSTS[task.name] + 1
+            assert task._runs == REPLAY_TIME // task.period - 1
+
+
+def test_heap_sched_matches ():
+    """!
+    The heap scheduler runs the same tasks the same number of times.
+    """
+    _, pri_results = replay ("pri_sched")
+    _, heap_results = replay ("heap_sched")
+    assert [r[0] for r in pri_results] == [r[0] for r in heap_results]
+
+
+if __name__ == "__main__":
+    for test in (test_reproducible, test_costs_charged,
+                 test_heap_sched_matches):
+        test ()
+        print (f"{test.__name__}: passed")
+
+    begin = time.perf_counter ()
+    t_list, _ = replay ()
+    print (f"\nTen minutes replayed in {time.perf_counter () - begin:.2f} s")
+    print (t_list)
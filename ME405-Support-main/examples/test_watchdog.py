@@ -0,0 +1,174 @@
+"""!
+@file test_watchdog.py
+This file tests the run time budgets, heartbeats and watchdog feeding of
+@c cotask on a PC, using the simulated clock in @c sim_time.py and its fake
+@c pyb.WDT. These things are checked:
+- A run which takes longer than the task's budget is counted and flagged
+- The watchdog is fed while all the critical tasks keep running
+- The watchdog isn't fed once a critical task stops running, here because it
+  waits for a share which never changes
+- A task which spins inside one run, as in @c Queue.get() on an empty queue,
+  keeps everything else from running and the watchdog goes off
+
+The tests can be run with @c pytest or as a program:
+@code
+python test_watchdog.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import os
+import sys
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..", "src"))
+
+import sim_time
+sim_time.install ()
+import pyb
+import cotask
+import task_share
+
+## The watchdog's timeout in milliseconds
+WDT_TIMEOUT = 50
+
+## How long, in microseconds, each test runs
+SIM_TIME = 1_000_000
+
+## Simulated time in microseconds which each normal run of a task takes
+TASK_COST = 200
+
+
+def run (t_list, clock, wdt, until=SIM_TIME):
+    """!
+    Run the scheduler, feeding the watchdog through the task list after each
+    pass as a program on the microcontroller would.
+    @param t_list The task list to run
+    @param clock The simulated clock
+    @param wdt The fake watchdog
+    @param until The simulated time at which to stop
+    @returns The number of passes in which the watchdog wasn't fed
+    """
+    t_list.set_watchdog (wdt)
+    hungry = 0
+    while clock.now < until:
+        t_list.pri_sched ()
+        if not t_list.feed_watchdog ():
+            hungry += 1
+        clock.advance (10)
+    wdt.check ()
+    return hungry
+
+
+def make_fun (clock, stall_run=None, stall=0, wait_after=None, share=None):
+    """!
+    Make a task function which takes @c TASK_COST microseconds per run.
+    @param clock The simulated clock
+    @param stall_run The number of the run which takes extra time, if any
+    @param stall How many extra microseconds that run takes
+    @param wait_after After this many runs, wait forever for @c share
+    @param share The share on which to wait
+    @returns A generator function for @c cotask.Task
+    """
+    def task_fun ():
+        runs = 0
+        while True:
+            runs += 1
+            clock.advance (TASK_COST)
+            if runs == stall_run:
+                clock.advance (stall)
+            if runs == wait_after:
+                yield cotask.Wait (share)
+            yield 0
+    return task_fun
+
+
+def test_budget ():
+    """!
+    A run which is longer than the budget is counted and flags the task;
+    a task which stays within its budget isn't flagged.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    t_list = cotask.TaskList ()
+    slow = cotask.Task (make_fun (clock, stall_run=5, stall=3000),
+                        name="Slow", period=10, budget=1)
+    fast = cotask.Task (make_fun (clock), name="Fast", period=10, budget=1)
+    t_list.append (slow)
+    t_list.append (fast)
+    run (t_list, clock, pyb.WDT (timeout=WDT_TIMEOUT))
+    assert slow.over_budget and not fast.over_budget
+    assert slow._budget_runs == 1
+    assert slow._budget_worst == TASK_COST + 3000
+
+
+def test_healthy_feeds ():
+    """!
+    While all critical tasks run, the watchdog is fed on every pass.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    wdt = pyb.WDT (timeout=WDT_TIMEOUT)
+    t_list = cotask.TaskList ()
+    t_list.append (cotask.Task (make_fun (clock), name="Control", period=10,
+                                critical=True))
+    t_list.append (cotask.Task (make_fun (clock), name="Logger", period=15))
+    hungry = run (t_list, clock, wdt)
+    assert hungry == 0
+    assert wdt.feeds > 0 and not wdt.fired
+    assert t_list.stalled () == []
+
+
+def test_stalled_task_starves ():
+    """!
+    When a critical task stops running, the watchdog isn't fed any more and
+    goes off, even though other tasks keep running.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    wdt = pyb.WDT (timeout=WDT_TIMEOUT)
+    never = task_share.Share ('h', name="Never")
+    t_list = cotask.TaskList ()
+    control = cotask.Task (make_fun (clock, wait_after=20, share=never),
+                           name="Control", period=10, critical=True)
+    t_list.append (control)
+    t_list.append (cotask.Task (make_fun (clock), name="Logger", period=15))
+    hungry = run (t_list, clock, wdt)
+    assert hungry > 0
+    assert wdt.fired
+    assert t_list.stalled () == [control]
+
+
+def test_spin_starves ():
+    """!
+    A task which spins for a long time inside one run keeps the scheduler
+    from feeding the watchdog; it's flagged as over budget once it returns.
+    """
+    clock = sim_time.install (sim_time.SimClock ())
+    wdt = pyb.WDT (timeout=WDT_TIMEOUT)
+    t_list = cotask.TaskList ()
+    spinner = cotask.Task (make_fun (clock, stall_run=30, stall=200_000),
+                           name="Spinner", period=10, budget=2, critical=True)
+    t_list.append (spinner)
+    run (t_list, clock, wdt)
+    assert wdt.fired
+    assert spinner.over_budget
+
+
+if __name__ == "__main__":
+    for test in (test_budget, test_healthy_feeds, test_stalled_task_starves,
+                 test_spin_starves):
+        test ()
+        print (f"{test.__name__}: passed")
+
+    clock = sim_time.install (sim_time.SimClock ())
+    never = task_share.Share ('h', name="Never")
+    t_list = cotask.TaskList ()
+    t_list.append (cotask.Task (make_fun (clock, wait_after=20, share=never),
+                                name="Control", period=10, critical=True,
+                                budget=1))
+    t_list.append (cotask.Task (make_fun (clock, stall_run=5, stall=3000),
+                                name="Logger", period=15, budget=1,
+                                profile=True))
+    run (t_list, clock, pyb.WDT (timeout=WDT_TIMEOUT))
+    print ()
+    print (t_list.watchdog_report ())
@@ -27,9 +27,74 @@
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
-import gc                              # Memory allocation garbage collector
+import array                           # Compact arrays for the trace buffer
+import struct                          # Packs the trace buffer's header
 import utime                           # Micropython version of time library
 import micropython                     # This shuts up incorrect warnings
+from micropython import const
+
+
+## The clock used for all timing by tasks and the scheduler. By default it's
+#  the @c utime module; see @c set_clock().
+_clock = utime
+
+
+## Use a different clock for timing tasks.
+#
+#  A clock is any object which, like the @c utime module, has methods
+#  @c ticks_us(), which returns the time in microseconds, @c ticks_diff(),
+#  which subtracts two times, and @c sleep_us(). On a PC, a simulated clock
+#  such as @c sim_time.VirtualClock lets the scheduler run much faster than
+#  real time and gives exactly the same results every time. The clock should
+#  be set before any tasks are created, since tasks read the time when they're
+#  created; or call @c TaskList.restart() after setting the clock.
+#  @param new_clock The clock to be used, or @c None to go back to @c utime
+def set_clock(new_clock):
+    global _clock
+    _clock = utime if new_clock is None else new_clock
+
+
+## Get the clock which is being used for timing tasks.
+#  @return The clock object, which is the @c utime module unless the clock has
+#          been changed with @c set_clock()
+def get_clock():
+    return _clock
+
+
+## Overrun policy for a timer driven task which has fallen behind: run once for
+#  every period which has passed, so the task fires back to back until it has
+#  caught up. This is the default.
+CATCH_UP = const(0)
+
+## Overrun policy: run once, then skip the runs which were missed so that the
+#  next run comes at the next time slot which is still in the future. The
+#  number of skipped runs is counted.
+SKIP = const(1)
+
+## Overrun policy: like @c SKIP, but the number of runs which were skipped is
+#  sent into the task's generator, where it's the value of the @c yield
+#  expression: <tt>missed = yield state</tt>.
+COALESCE = const(2)
+
+
+## The number of state transitions kept by the trace buffer which is created
+#  automatically when the first task with tracing turned on is created.
+TRACE_SIZE = 500
+
+## The number of buckets in each run time and lateness histogram. Bucket 0
+#  counts times of 0 µs, and bucket @c N counts times from 2**(N-1) up to but
+#  not including 2**N µs; the last bucket also counts all longer times.
+HIST_BUCKETS = 24
+
+## A marker which begins a binary dump of the trace buffer, so that a program
+#  on a PC can find the dump among other text sent through a serial port.
+TRACE_MAGIC = b'CTRC'
+
+## The largest number of ticks in a hyperperiod for which a @c TaskFrame will
+#  keep a table of tick loads. Periods which barely divide each other, such
+#  as 10007 and 10009 µs, would need a table far too large for the memory of
+#  a microcontroller.
+FRAME_MAX_TICKS = 2000
 
 
 ## Implements multitasking with scheduling and some performance logging.
@@ -81,12 +146,27 @@ class Task:
     #         The time can be given in a @c float or @c int; it will be 
     #         converted to microseconds for internal use by the scheduler.
     #  @param profile Set to @c True to enable run-time profiling 
-    #  @param trace Set to @c True to generate a list of transitions between
-    #         states. @b Note: This slows things down and allocates memory.
+    #  @param trace Set to @c True to record transitions between states in
+    #         the shared trace buffer @c cotask.trace_buffer, which is created
+    #         with @c TRACE_SIZE records if it doesn't already exist
     #  @param shares A list or tuple of shares and queues used by this task.
     #         If no list is given, no shares are passed to the task
+    #  @param overrun What to do when a timer driven task has fallen more than
+    #         a period behind: @c CATCH_UP (the default), @c SKIP or 
+    #         @c COALESCE
+    #  @param budget The longest time in milliseconds which one run of the
+    #         task should take, or @c None if there's no limit. A run which
+    #         takes longer is counted and the task is flagged; see
+    #         @c over_budget
+    #  @param critical Set to @c True if the system can't work without this
+    #         task, so the hardware watchdog must not be fed unless it has
+    #         run recently; see @c TaskList.feed_watchdog()
+    #  @param window How long in milliseconds a critical task may go without
+    #         finishing a run. If @c None, it's twice the task's period; a
+    #         critical task with no period must be given a window
     def __init__(self, run_fun, name="NoName", priority=0, period=None,
-                 profile=False, trace=False, shares=()):
+                 profile=False, trace=False, shares=(), overrun=CATCH_UP,
+                 budget=None, critical=False, window=None):
         # The function which is run to implement this task's code. Since it 
         # is a generator, we "run" it here, which doesn't actually run it but
         # gets it going as a generator which is ready to yield values
@@ -109,7 +189,7 @@ class Task:
         #  @c go() method. 
         if period != None:
             self.period = int(period * 1000)
-            self._next_run = utime.ticks_us() + self.period
+            self._next_run = _clock.ticks_us() + self.period
         else:
             self.period = period
             self._next_run = None
@@ -123,16 +203,76 @@ class Task:
         # for and track state transitions.
         self._prev_state = 0
 
-        # If transition tracing has been enabled, create an empty list in 
-        # which to store transition (time, to-state) stamps
+        # If transition tracing has been enabled, get an ID number from the
+        # trace buffer which all traced tasks share, creating it if needed
         self._trace = trace
-        self._tr_data = []
-        self._prev_time = utime.ticks_us()
+        self._trace_id = 0
+        if trace:
+            global trace_buffer
+            if trace_buffer is None:
+                trace_buffer = TraceBuffer()
+            self._trace_id = trace_buffer.add_task(self.name)
 
         ## Flag which is set true when the task is ready to be run by the
         #  scheduler
         self.go_flag = False
 
+        # The absolute deadline of a timer driven task's pending release, set
+        # when the task is released and used by edf_sched()
+        self._deadline = self._next_run
+
+        # What to do about missed runs, and the number of missed runs which
+        # haven't yet been sent to the generator if the policy is COALESCE
+        self._overrun = overrun
+        self._missed = 0
+        self._started = False
+
+        # When the task yields a Wait, it's parked until the share or queue
+        # it's waiting on gets new data or the time given by _wake_at comes
+        self._parked = False
+        self._wait_share = None
+        self._wake_at = None
+
+        # Used by TaskList.heap_sched(): the task's deadline as a number which
+        # never wraps around, and whether the task is waiting in the heap
+        self._hkey = 0
+        self._in_heap = False
+
+        # The longest time in microseconds which one run should take, or 0
+        # if runs aren't checked; the number of runs which took longer, and
+        # the longest of those
+        self._budget = 0 if budget is None else int(budget * 1000)
+        self._budget_runs = 0
+        self._budget_worst = 0
+
+        ## Flag which is set when a run of the task has taken longer than its
+        #  budget. It stays set until the program clears it.
+        self.over_budget = False
+
+        ## @c True if the watchdog is fed only while this task keeps running
+        self.critical = critical
+        if window is None:
+            if critical and self.period is None:
+                raise ValueError(f'Critical task {name} needs a window')
+            window = 0 if self.period is None else 2 * self.period / 1000
+        self._window = int(window * 1000)
+
+        # The heartbeat: the time at which the task last finished a run. It
+        # starts at the time the task was created, so each critical task has
+        # one window in which to get going
+        self._heartbeat = _clock.ticks_us()
+
+        # The task list which holds this task, and whether the task has been
+        # suspended so that the scheduler passes it by
+        self._task_list = None
+        self._suspended = False
+
+        ## Flag which is set when the task's generator has finished, by
+        #  returning or raising @c StopIteration. A finished task is taken
+        #  out of its task list and never runs again, but its list keeps it in
+        #  @c TaskList.retired so that it still shows up in reports.
+        self.done = False
+
 
     ## This method is called by the scheduler; it attempts to run this task.
     #  If the task is not yet ready to run, this method returns @c False
@@ -142,52 +282,87 @@ class Task:
     #  @return @c True if the task ran or @c False if it did not
     def schedule(self) -> bool:
         if self.ready():
-
-            # Reset the go flag for the next run
-            self.go_flag = False
-
-            # If profiling, save the start time
-            if self._prof:
-                stime = utime.ticks_us()
-
-            # Run the method belonging to the state which should be run next
-            curr_state = next(self._run_gen)
-
-            # If profiling or tracing, save timing data
-            if self._prof or self._trace:
-                etime = utime.ticks_us()
-
-            # If profiling, save timing data
-            if self._prof:
-                self._runs += 1
-                runt = utime.ticks_diff(etime, stime)
-                if self._runs > 2:
-                    self._run_sum += runt
-                    if runt > self._slowest:
-                        self._slowest = runt
-
-            # If transition logic tracing is on, record a transition; if not,
-            # ignore the state. If out of memory, switch tracing off and 
-            # run the memory allocation garbage collector
-            if self._trace:
-                try:
-                    if curr_state != self._prev_state:
-                        self._tr_data.append(
-                            (utime.ticks_diff(etime, self._prev_time),
-                             curr_state))
-                except MemoryError:
-                    self._trace = False
-                    gc.collect()
-
-                self._prev_state = curr_state
-                self._prev_time = etime
-
+            self._run()
             return True
 
         else:
             return False
 
 
+    ## This method runs the task's generator up to its next @c yield and
+    #  keeps profiling and trace data. It is called by @c schedule() once the
+    #  task has been found ready, and directly by schedulers such as
+    #  @c TaskList.heap_sched() which have already released the task.
+    def _run(self):
+        # Reset the go flag for the next run
+        self.go_flag = False
+
+        # If the task had been waiting for something, it's done waiting
+        if self._parked:
+            self._unpark()
+
+        # If profiling or checking the run time, save the start time
+        if self._prof or self._budget:
+            stime = _clock.ticks_us()
+
+        # Run the method belonging to the state which should be run next. If
+        # missed runs are being coalesced, tell the generator how many runs
+        # it missed; a newly started generator can only be sent None. A
+        # generator which has finished retires the task
+        try:
+            if self._overrun == COALESCE and self._started:
+                curr_state = self._run_gen.send(self._missed)
+                self._missed = 0
+            else:
+                curr_state = next(self._run_gen)
+                self._started = True
+        except StopIteration:
+            self._retire()
+            return
+
+        # If the task asked to wait for something, park it until that happens.
+        # Waiting isn't a change of state
+        if type(curr_state) is Wait:
+            self._park(curr_state)
+            curr_state = self._prev_state
+
+        # If profiling, tracing or watching the task, save the time at which
+        # the run finished; for a critical task, it's the heartbeat
+        if self._prof or self._trace or self._budget or self.critical:
+            etime = _clock.ticks_us()
+            self._heartbeat = etime
+
+        # If the run took longer than the budget, count it and flag the task.
+        # Nothing is printed here, as printing could hold up the scheduler;
+        # the count is shown by the task's row in the task list and by
+        # watchdog_report()
+        if self._budget:
+            runt = _clock.ticks_diff(etime, stime)
+            if runt > self._budget:
+                self._budget_runs += 1
+                if runt > self._budget_worst:
+                    self._budget_worst = runt
+                self.over_budget = True
+
+        # If profiling, save timing data
+        if self._prof:
+            self._runs += 1
+            runt = _clock.ticks_diff(etime, stime)
+            self._run_total += runt
+            if self._runs > 2:
+                self._run_sum += runt
+                if runt > self._slowest:
+                    self._slowest = runt
+                self._run_hist[_log2_bucket(runt)] += 1
+
+        # If transition logic tracing is on, record a transition in the trace
+        # buffer; if not, ignore the state
+        if self._trace:
+            if curr_state != self._prev_state:
+                trace_buffer.record(self._trace_id, curr_state, etime)
+            self._prev_state = curr_state
+
+
     ## This method checks if the task is ready to run.
     #  If the task runs on a timer, this method checks what time it is; if not,
     #  this method checks the flag which indicates that the task is ready to
@@ -195,25 +370,111 @@ class Task:
     #  some other behavior.
     @micropython.native
     def ready(self) -> bool:
+        # A suspended task is never ready
+        if self._suspended:
+            return False
+
+        # A parked task is ready only when what it's waiting for has happened
+        if self._parked:
+            return self._check_wake()
+
         # If this task uses a timer, check if it's time to run run() again. If
         # so, set go flag and set the timer to go off at the next run time
         if self.period != None:
-            late = utime.ticks_diff(utime.ticks_us(), self._next_run)
+            late = _clock.ticks_diff(_clock.ticks_us(), self._next_run)
             if late > 0:
+                released = not self.go_flag
                 self.go_flag = True
-                self._next_run = utime.ticks_diff(self.period, 
+                self._next_run = _clock.ticks_diff(self.period, 
                                                   -self._next_run)
 
+                # A run which starts more than a whole period late is an
+                # overrun; the task has missed at least one deadline. Unless
+                # catching up, skip the missed runs
+                if late > self.period:
+                    self._overruns += 1
+                    if self._overrun != CATCH_UP:
+                        missed = late // self.period
+                        self._next_run = _clock.ticks_diff(
+                            missed * self.period, -self._next_run)
+                        self._skipped += missed
+                        if self._overrun == COALESCE:
+                            self._missed += missed
+
+                # The deadline belongs to the release which hasn't run yet;
+                # releasing the task again before it runs doesn't move it
+                if released:
+                    self._deadline = self._next_run
+
                 # If keeping a latency profile, record the data
                 if self._prof:
                     self._late_sum += late
                     if late > self._latest:
                         self._latest = late
+                    self._late_hist[_log2_bucket(late)] += 1
 
         # If the task doesn't use a timer, we rely on go_flag to signal ready
         return self.go_flag
 
 
+    ## Park the task so that it won't run until the thing it's waiting for
+    #  happens. 
+    #  @param wait The @c Wait object which the task yielded
+    def _park(self, wait):
+        self._parked = True
+        if wait.share is not None:
+            self._wait_share = wait.share
+            wait.share._add_waiter(self)
+        if wait.timeout is not None:
+            self._wake_at = _clock.ticks_diff(wait.timeout, -_clock.ticks_us())
+
+
+    ## Stop waiting, taking the task off the list of tasks which are waiting
+    #  for a share or queue.
+    def _unpark(self):
+        self._parked = False
+        if self._wait_share is not None:
+            self._wait_share._remove_waiter(self)
+            self._wait_share = None
+        self._wake_at = None
+
+
+    ## Check whether a parked task should wake up. It wakes up when its 
+    #  @c go() method is called, which a share or queue does when it gets new
+    #  data, or when its time to wait has run out. A timer driven task keeps
+    #  its place in time while parked, so that it doesn't rush to make up
+    #  the runs which it skipped while waiting.
+    #  @return @c True if the task should be run now
+    @micropython.native
+    def _check_wake(self) -> bool:
+        if self.period != None or self._wake_at is not None:
+            now = _clock.ticks_us()
+            if self.period != None:
+                late = _clock.ticks_diff(now, self._next_run)
+                if late > 0:
+                    self._next_run = _clock.ticks_diff(
+                        (late // self.period + 1) * self.period, 
+                        -self._next_run)
+            if self._wake_at is not None \
+                    and _clock.ticks_diff(now, self._wake_at) >= 0:
+                self.go_flag = True
+        return self.go_flag
+
+
+    ## Find out whether the task is parked, waiting for a share or queue to
+    #  get new data or for a time to pass.
+    #  @return @c True if the task is waiting
+    def is_parked(self) -> bool:
+        return self._parked
+
+
+    ## Get the time at which a timer driven task is next due to be released.
+    #  @return The time from the clock's @c ticks_us(), or @c None if the task
+    #          has no period
+    def next_run(self):
+        return self._next_run
+
+
     ## This method sets the period between runs of the task to the given
     #  number of milliseconds, or @c None if the task is triggered by calls
     #  to @c go() rather than time.
@@ -227,34 +488,104 @@ class Task:
 
     ## This method resets the variables used for execution time profiling.
     #  This method is also used by @c __init__() to create the variables.
+    #  The histograms of run times and lateness are allocated the first time
+    #  and only cleared after that.
     def reset_profile(self):
         self._runs = 0
         self._run_sum = 0
+        self._run_total = 0
+        self._overruns = 0
+        self._skipped = 0
         self._slowest = 0
         self._late_sum = 0
         self._latest = 0
+        if self._prof:
+            try:
+                for index in range(HIST_BUCKETS):
+                    self._run_hist[index] = 0
+                    self._late_hist[index] = 0
+            except AttributeError:
+                self._run_hist = array.array('L', [0] * HIST_BUCKETS)
+                self._late_hist = array.array('L', [0] * HIST_BUCKETS)
+
+
+    ## This method estimates percentiles of the task's run time and lateness
+    #  from their histograms. Since the histogram buckets are powers of two
+    #  wide, each result is the upper edge of the bucket holding the given
+    #  fraction of the runs; the true value is at most that and more than
+    #  half of it. 
+    #  @param fraction The fraction of runs, such as 0.95 for the 95th
+    #         percentile, which took no longer than the returned time
+    #  @return A tuple holding the run time and lateness percentiles in
+    #          microseconds, or @c None for either one which has no data
+    def percentiles(self, fraction):
+        if not self._prof:
+            return (None, None)
+        return (_hist_percentile(self._run_hist, fraction),
+                _hist_percentile(self._late_hist, fraction))
 
 
     ## This method returns a string containing the task's transition trace.
-    #  The trace is a set of tuples, each of which contains a time and the
-    #  states from and to which the system transitioned. 
+    #  Each line shows a time in seconds, measured from the oldest transition
+    #  still held in the trace buffer by any task, and the states from and to
+    #  which this task transitioned. 
     #  @return A possibly quite large string showing state transitions
     def get_trace(self):
         tr_str = 'Task ' + self.name + ':'
         if self._trace:
             tr_str += '\n'
-            last_state = 0
-            total_time = 0.0
-            for item in self._tr_data:
-                total_time += item[0] / 1000000.0
-                tr_str += '{: 12.6f}: {: 2d} -> {:d}\n'.format (total_time, 
-                    last_state, item[1])
-                last_state = item[1]
+            last_state = None if trace_buffer.wrapped() else 0
+            for (t_us, t_id, state) in trace_buffer.records():
+                if t_id == self._trace_id:
+                    if last_state is not None:
+                        tr_str += '{: 12.6f}: {: 2d} -> {:d}\n'.format(
+                            t_us / 1000000.0, last_state, state)
+                    last_state = state
         else:
             tr_str += ' not traced'
         return tr_str
 
 
+    ## Stop running the task until @c resume() is called. The task stays in
+    #  its task list, but the scheduler passes it by, and a suspended critical
+    #  task doesn't keep the watchdog from being fed. Calls to @c go() while
+    #  the task is suspended are remembered, so the task runs soon after it's
+    #  resumed if one came in.
+    def suspend(self):
+        self._suspended = True
+        if self._task_list is not None:
+            self._task_list._heap = None
+
+
+    ## Let a suspended task run again. A timer driven task starts its
+    #  schedule over, with its next run one period from now.
+    def resume(self):
+        if not self._suspended or self.done:
+            return
+        self._suspended = False
+        now = _clock.ticks_us()
+        self._heartbeat = now
+        if self.period != None:
+            self._next_run = _clock.ticks_diff(self.period, -now)
+
+        # The heap used by heap_sched() doesn't hold suspended tasks
+        if self._task_list is not None:
+            self._task_list._heap = None
+
+
+    ## Retire a task whose generator has finished, taking it out of its task
+    #  list so that the scheduler no longer spends time on it.
+    def _retire(self):
+        self.done = True
+        self._suspended = True
+        self.go_flag = False
+        if self._parked:
+            self._unpark()
+        if self._task_list is not None:
+            self._task_list.retired.append(self)
+            self._task_list.remove(self)
+
+
     ## Method to set a flag so that this task indicates that it's ready to run.
     #  This method may be called from an interrupt service routine or from
     #  another task which has data that this task needs to process soon.
@@ -280,6 +611,10 @@ class Task:
             rst += f"{avg_dur: 10.3f}{(self._slowest / 1000.0): 10.3f}"
             if self.period != None:
                 rst += f"{avg_late: 10.3f}{(self._latest / 1000.0): 10.3f}"
+        if self._budget_runs:
+            rst += f"  {self._budget_runs} over budget"
+        if self.done:
+            rst += "  done"
         return rst
 
 
@@ -295,7 +630,7 @@ class Task:
 #  The task list is sorted by priority so that the scheduler can efficiently
 #  look through the list to find the highest priority task which is ready to
 #  run at any given time. Tasks can also be scheduled in a simpler
-#  "round-robin" fashion.
+#  "round-robin" fashion or by Earliest Deadline First with @c edf_sched().
 class TaskList:
 
     ## Initialize the task list. This creates the list of priorities in
@@ -308,30 +643,107 @@ class TaskList:
         #  that priority. 
         self.pri_list = []
 
+        ## Tasks whose generators have finished and which have been taken
+        #  out of the list. They no longer run, but the reports still show
+        #  their profiling data.
+        self.retired = []
+
+        # The deadline-ordered heap of timer driven tasks and a list of the
+        # tasks which only run when go() is called, both used by heap_sched().
+        # They're built when heap_sched() is first run after tasks are added
+        self._heap = None
+        self._aperiodic = []
+        self._num_released = 0
+
+        # The flat dispatch tables used by frozen_sched(), made by freeze()
+        self._frozen = None
+
+        ## A function, such as @c pyb.wfi, which is called by the scheduler
+        #  when no task is ready to run, or @c None if there isn't one. Set it
+        #  with @c set_idle_hook().
+        self.idle_hook = None
+
+        ## The hardware watchdog, such as a @c pyb.WDT object, which is fed
+        #  by @c feed_watchdog(), or @c None if there isn't one
+        self.watchdog = None
+
+        # Times used to measure how busy the processor is; see load_report()
+        self.reset_load()
+
 
     ## Append a task to the task list. The list will be sorted by task 
     #  priorities so that the scheduler can quickly find the highest priority
     #  task which is ready to run at any given time. 
     #  @param task The task to be appended to the list
     def append(self, task):
+        self._thaw()
+
         # See if there's a tasklist with the given priority in the main list
         new_pri = task.priority
-        for pri in self.pri_list:
+        for (index, pri) in enumerate(self.pri_list):
             # If a tasklist with this priority exists, add this task to it.
             if pri[0] == new_pri:
                 pri.append(task)
                 break
 
-        # If the priority isn't in the list, this else clause starts a new 
-        # priority list with this task as first one. A priority list has the
-        # priority as element 0, an index into the list of tasks (used for
-        # round-robin scheduling those tasks) as the second item, and tasks
-        # after those
+            # Once the lists with higher priorities have been passed, start a
+            # new priority list here so that the main list (of lists at each
+            # priority) stays sorted. A priority list has the priority as
+            # element 0, an index into the list of tasks (used for round-robin
+            # scheduling those tasks) as the second item, and tasks after those
+            if pri[0] < new_pri:
+                self.pri_list.insert(index, [new_pri, 2, task])
+                break
+
+        # If the priority is lower than all the others, this else clause
+        # starts a new priority list at the end with this task as first one
         else:
             self.pri_list.append([new_pri, 2, task])
 
-        # Make sure the main list (of lists at each priority) is sorted
-        self.pri_list.sort(key=lambda pri: pri[0], reverse=True)
+        task._task_list = self
+
+        # The heap used by heap_sched() must be rebuilt to hold the new task
+        self._heap = None
+
+
+    ## Remove a task from the task list, so that it's no longer run. This may
+    #  be done at any time, including by the task itself while it's running.
+    #  The round-robin order of the other tasks at the same priority is kept.
+    #  @param task The task to be removed
+    def remove(self, task):
+        self._thaw()
+        for (index, pri) in enumerate(self.pri_list):
+            if pri[0] == task.priority and task in pri[2:]:
+                place = pri.index(task, 2)
+                del pri[place]
+
+                # The round-robin index points at the next task to be run; if
+                # a task before it was removed, it moves back one place
+                if place < pri[1]:
+                    pri[1] -= 1
+                if pri[1] >= len(pri):
+                    pri[1] = 2
+
+                # Don't keep a priority list which holds no tasks
+                if len(pri) <= 2:
+                    del self.pri_list[index]
+                break
+        else:
+            raise ValueError(f'Task {task.name} is not in the task list')
+
+        task._task_list = None
+        self._heap = None
+
+
+    ## Change the priority of a task in the task list. The task goes to the
+    #  end of the round-robin order at its new priority.
+    #  @param task The task whose priority is to be changed
+    #  @param priority The new priority, with higher numbers meaning higher
+    #         priority
+    def set_priority(self, task, priority):
+        self.remove(task)
+        task.priority = int(priority)
+        self.append(task)
 
 
     ## Run tasks in order, ignoring the tasks' priorities.
@@ -362,34 +774,995 @@ class TaskList:
         for pri in self.pri_list:
             # Within each priority list, run tasks in round-robin order
             # Each priority list is [priority, index, task, task, ...] where
-            # index is the index of the next task in the list to be run
+            # index is the index of the next task in the list to be run. The
+            # index is moved along before the task runs, since a task may
+            # remove itself or others from the list
+            tries = 2
+            length = len(pri)
+            while tries < length:
+                task = pri[pri[1]]
+                tries += 1
+                pri[1] += 1
+                if pri[1] >= length:
+                    pri[1] = 2
+                if task.schedule():
+                    return
+
+        # No task was ready, so let the processor idle if we've been asked to
+        if self.idle_hook is not None:
+            self._idle()
+
+
+    ## Compile the task list into flat tables for @c frozen_sched().
+    #
+    #  The tables hold each task's bound @c ready() and @c _run() methods in
+    #  priority order, the index at which each priority's tasks begin and
+    #  end, and a round-robin index for each priority in a preallocated
+    #  array. They're made again automatically the next time
+    #  @c frozen_sched() runs after tasks have been added or removed or their
+    #  priorities changed, but it's best to call this method once after all
+    #  the tasks have been created, so that the memory is allocated before
+    #  the scheduler starts.
+    def freeze(self):
+        ready = []
+        run = []
+        starts = array.array('H')
+        ends = array.array('H')
+        for pri in self.pri_list:
+            starts.append(len(ready))
+            for task in pri[2:]:
+                ready.append(task.ready)
+                run.append(task._run)
+            ends.append(len(ready))
+
+        # The round-robin index of each priority starts at the task which
+        # pri_sched() would run next
+        cursors = array.array('H', starts)
+        for (index, pri) in enumerate(self.pri_list):
+            cursors[index] = starts[index] + pri[1] - 2
+
+        self._frozen = (tuple(ready), tuple(run), starts, ends, cursors,
+                        len(starts))
+
+
+    ## Throw away the tables made by @c freeze(), first copying the
+    #  round-robin indices back into @c pri_list so that the order in which
+    #  tasks take turns isn't disturbed. This is done whenever the list of
+    #  tasks changes.
+    def _thaw(self):
+        if self._frozen is not None:
+            (_, _, starts, _, cursors, num_pri) = self._frozen
+            for index in range(num_pri):
+                self.pri_list[index][1] = cursors[index] - starts[index] + 2
+            self._frozen = None
+
+
+    ## Run tasks according to their priorities using flat dispatch tables.
+    #
+    #  This scheduler picks the same task as @c pri_sched(), but instead of
+    #  going through the lists in @c pri_list and calling each task's
+    #  @c schedule() method, it uses tables made by @c freeze() which hold
+    #  bound methods and plain numbers. A pass looks up nothing by name
+    #  except the tables themselves and allocates no memory, which makes it
+    #  faster than @c pri_sched(), especially when compiled by MicroPython's
+    #  native code emitter. While this scheduler is in use, the round-robin
+    #  indices in @c pri_list are only brought up to date when tasks are
+    #  added or removed.
+    @micropython.native
+    def frozen_sched(self):
+        frozen = self._frozen
+        if frozen is None:
+            self.freeze()
+            frozen = self._frozen
+        (ready, run, starts, ends, cursors, num_pri) = frozen
+
+        # Go down the priorities, beginning with the highest; within each
+        # priority, try the tasks in round-robin order
+        pri = 0
+        while pri < num_pri:
+            start = starts[pri]
+            end = ends[pri]
+            index = cursors[pri]
+            tries = end - start
+            while tries > 0:
+                tries -= 1
+                task = index
+                index += 1
+                if index >= end:
+                    index = start
+                if ready[task]():
+                    cursors[pri] = index
+                    run[task]()
+                    return
+            pri += 1
+
+        # No task was ready, so let the processor idle if we've been asked to
+        if self.idle_hook is not None:
+            self._idle()
+
+
+    ## Run the ready task whose deadline comes soonest.
+    #
+    #  This scheduler uses the Earliest Deadline First policy. Each time it
+    #  is called, it checks every task and runs the ready task whose deadline
+    #  is nearest. The deadline of a timer driven task is the time at which
+    #  its next run was due when it was released, so a task with a short
+    #  period doesn't fall behind just because another task has a higher
+    #  priority. Tasks with equal deadlines are run in order of priority.
+    #  Tasks which have no period, and therefore no deadline, only run when
+    #  no timer driven task is ready.
+    #
+    #  Earliest Deadline First can meet every deadline as long as the tasks
+    #  don't need more than all of the processor's time; use
+    #  @c check_schedulable() to find out if that's the case.
+    @micropython.native
+    def edf_sched(self):
+        now = _clock.ticks_us()
+        best = None
+        best_slack = 0
+        untimed = None
+        for pri in self.pri_list:
+            index = 2
+            length = len(pri)
+            while index < length:
+                task = pri[index]
+                index += 1
+                if task.ready():
+                    if task.period != None:
+                        slack = _clock.ticks_diff(task._deadline, now)
+                        if best is None or slack < best_slack:
+                            best = task
+                            best_slack = slack
+                    elif untimed is None:
+                        untimed = task
+
+        if best is None:
+            best = untimed
+        if best is not None:
+            best._run()
+        elif self.idle_hook is not None:
+            self._idle()
+
+
+    ## Start the tasks' schedules over from the current time. Each timer
+    #  driven task's next run is set one period from now. This is useful
+    #  after changing the clock with @c set_clock().
+    def restart(self):
+        now = _clock.ticks_us()
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                if task.period != None:
+                    task._next_run = _clock.ticks_diff(task.period, -now)
+                task._heartbeat = now
+        self._heap = None
+        self.reset_load()
+
+
+    ## Set a function to be called whenever the scheduler finds that no task
+    #  is ready to run. The function should return quickly. A good choice is
+    #  @c pyb.wfi, which puts the processor to sleep until the next interrupt
+    #  (such as the millisecond system tick) to save power. The time spent in
+    #  the idle function is measured and shown by @c load_report(). 
+    #  @param hook The function to call, or @c None to call nothing
+    def set_idle_hook(self, hook):
+        self.idle_hook = hook
+
+
+    ## Call the idle hook and measure how long it took.
+    def _idle(self):
+        start = _clock.ticks_us()
+        self.idle_hook()
+        self._idle_time += _clock.ticks_diff(_clock.ticks_us(), start)
+        self._idle_calls += 1
+
+
+    ## Set the hardware watchdog which is fed by @c feed_watchdog().
+    #
+    #  A task which never yields, for example one stuck in @c Queue.get()
+    #  waiting for data which never comes, freezes the whole system, and no
+    #  code in the scheduler can notice since it never gets to run again. A
+    #  hardware watchdog resets the microcontroller if it isn't fed in time.
+    #  Feed it from the main loop through @c feed_watchdog(), so it's fed
+    #  only while the critical tasks keep running:
+    #  @code
+    #     cotask.task_list.set_watchdog(pyb.WDT(timeout=500))
+    #     while True:
+    #         cotask.task_list.pri_sched()
+    #         cotask.task_list.feed_watchdog()
+    #  @endcode
+    #  Once started, a watchdog can't be stopped, so the board will reset
+    #  soon after the program is stopped with ^C.
+    #  @param wdt An object with a @c feed() method, or @c None
+    def set_watchdog(self, wdt):
+        self.watchdog = wdt
+
+
+    ## Find the critical tasks which haven't finished a run within their
+    #  windows. This includes a task which is stuck inside a run, since its
+    #  heartbeat isn't updated until the run finishes.
+    #  @return A list of the critical tasks which have stalled, empty if all
+    #          is well
+    def stalled(self):
+        now = _clock.ticks_us()
+        stuck = []
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                if task.critical and not task._suspended and \
+                        _clock.ticks_diff(now, task._heartbeat) > task._window:
+                    stuck.append(task)
+        return stuck
+
+
+    ## Feed the hardware watchdog, but only if every critical task has
+    #  finished a run within its window. If some task has stalled, the
+    #  watchdog is left hungry, and it will reset the microcontroller if the
+    #  task doesn't recover in time.
+    #  @return @c True if all critical tasks are running, @c False if not
+    @micropython.native
+    def feed_watchdog(self) -> bool:
+        now = _clock.ticks_us()
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                if task.critical and not task._suspended and \
+                        _clock.ticks_diff(now, task._heartbeat) > task._window:
+                    return False
+        if self.watchdog is not None:
+            self.watchdog.feed()
+        return True
+
+
+    ## Create a table showing which tasks are watched and how they're doing.
+    #  For each task it shows the run time budget, the number of runs which
+    #  took longer than the budget and the longest of them, whether the task
+    #  is critical, and the time since the task last finished a run. A star
+    #  marks critical tasks which have stalled.
+    #  @return A string holding the table
+    def watchdog_report(self):
+        now = _clock.ticks_us()
+        ret_str = ('TASK            BUDGET ms  OVER  WORST ms  CRITICAL  '
+                   'LAST RUN ms\n')
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                ret_str += f"{task.name:<16s}"
+                if task._budget:
+                    ret_str += f"{(task._budget / 1000.0): 9.3f}" \
+                        f"{task._budget_runs: 6d}" \
+                        f"{(task._budget_worst / 1000.0): 10.3f}"
+                else:
+                    ret_str += '        -     -         -'
+                ret_str += f"{'yes' if task.critical else 'no':>10s}"
+                since = _clock.ticks_diff(now, task._heartbeat)
+                if task._prof or task._trace or task._budget or task.critical:
+                    ret_str += f"{(since / 1000.0): 13.1f}"
+                else:
+                    ret_str += '            -'
+                if task.critical and not task._suspended \
+                        and since > task._window:
+                    ret_str += ' *'
+                ret_str += '\n'
+        return ret_str
+
+
+    ## Begin measuring processor load from now. The total run time of each
+    #  task, including retired ones, and the time spent in the idle hook are
+    #  set to zero.
+    def reset_load(self):
+        self._load_start = _clock.ticks_us()
+        self._idle_time = 0
+        self._idle_calls = 0
+        for task in self._all_tasks():
+            task._run_total = 0
+            task._overruns = 0
+            task._skipped = 0
+
+
+    ## Create a table showing how the processor's time has been spent since
+    #  the task list was created or @c reset_load() was called. For each
+    #  task it shows the percentage of time spent running the task, the
+    #  number of overruns (runs which started more than one period late) and
+    #  the number of runs skipped because of the task's overrun policy.
+    #  Then it shows the totals for all tasks, the time spent in the idle
+    #  hook, and the rest, which is time spent by the scheduler checking
+    #  whether tasks are ready. Only profiled tasks' run times are measured.
+    #  @return A string holding the table
+    def load_report(self):
+        elapsed = _clock.ticks_diff(_clock.ticks_us(), self._load_start)
+        if elapsed <= 0:
+            elapsed = 1
+        busy = 0
+        ret_str = 'TASK                CPU %  OVERRUNS   SKIPPED\n'
+        for task in self._all_tasks():
+            busy += task._run_total
+            ret_str += f"{task.name:<16s}"
+            if task._prof:
+                ret_str += f"{(100.0 * task._run_total / elapsed): 9.2f}"
+            else:
+                ret_str += '        -'
+            ret_str += f"{task._overruns: 10d}{task._skipped: 10d}\n"
+        ret_str += f"{'All tasks':<16s}{(100.0 * busy / elapsed): 9.2f}\n"
+        ret_str += f"{'Idle hook':<16s}" \
+            f"{(100.0 * self._idle_time / elapsed): 9.2f}\n"
+        ret_str += f"{'Scheduler':<16s}" \
+            f"{(100.0 * (elapsed - busy - self._idle_time) / elapsed): 9.2f}\n"
+        return ret_str
+
+
+    ## Estimate the fraction of processor time which the tasks need.
+    #
+    #  For each timer driven task, the longest run time measured by profiling
+    #  is divided by the task's period, and these fractions are added up. If
+    #  the total is more than 1.0, no scheduler can keep all the tasks on
+    #  time. Tasks which aren't profiled haven't measured their run times, so
+    #  they don't count toward the total; profile all timer driven tasks and
+    #  let them run for a while before calling this method.
+    #  @return The estimated utilization, where 1.0 means 100% of the time
+    def utilization(self):
+        total = 0.0
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                if task.period:
+                    total += task._slowest / task.period
+        return total
+
+
+    ## Check if the tasks can all be run on time.
+    #
+    #  This method calls @c utilization() and prints a warning if the tasks
+    #  need more than all of the processor's time.
+    #  @return @c True if the tasks' total utilization is 100% or less
+    def check_schedulable(self):
+        util = self.utilization()
+        if util > 1.0:
+            print(f"Warning: tasks need {util * 100.0:.1f}% of CPU time; "
+                  "some deadlines will be missed")
+            return False
+        return True
+
+
+    ## Run tasks according to their priorities, keeping timer driven tasks in
+    #  a heap sorted by their next run times.
+    #
+    #  This scheduler picks the same task as @c pri_sched() would: the
+    #  highest priority task which is ready, with round-robin order among
+    #  tasks of equal priority. Instead of asking every task whether it is
+    #  ready, which means reading the time once per task, it reads the time
+    #  once and looks only at the task whose next run time comes first. Tasks
+    #  whose time has come are taken out of the heap until they've run, so
+    #  a task which has fallen behind still runs once per period, as it does
+    #  under @c pri_sched(). This saves a lot of time when there are many
+    #  tasks and few of them are ready at any one time.
+    #
+    #  Tasks which have no period are checked for a @c go() call every time.
+    #  A call to @c go() for a task which does have a period, including the
+    #  wakeup of such a task waiting on a share or queue, is noticed the next
+    #  time some timer driven task comes due. Tasks which wait for data are
+    #  best given no period.
+    #  @param idle If @c True and no task is ready, sleep until the next run
+    #         time of a timer driven task. Only use this if no tasks are 
+    #         triggered by calls to @c go() from interrupts, as they will have
+    #         to wait until the sleep is over
+    @micropython.native
+    def heap_sched(self, idle=False):
+        heap = self._heap
+        if heap is None:
+            heap = self._build_heap()
+
+        # Release each timer driven task whose time to run has come, taking
+        # it out of the heap until it has run
+        now = _clock.ticks_us()
+        while heap:
+            task = heap[0]
+            if _clock.ticks_diff(now, task._next_run) <= 0:
+                break
+
+            # A suspended task leaves the heap; it's put back by resume()
+            if task._suspended:
+                task._in_heap = False
+                last = heap.pop()
+                if heap:
+                    heap[0] = last
+                    _heap_down(heap, 0)
+                continue
+            old_next = task._next_run
+            task.ready()
+            task._hkey += _clock.ticks_diff(task._next_run, old_next)
+
+            # A task which is parked waiting for data isn't released; it just
+            # moves to its next place in the heap
+            if not task.go_flag:
+                _heap_down(heap, 0)
+                continue
+            task._in_heap = False
+            self._num_released += 1
+            last = heap.pop()
+            if heap:
+                heap[0] = last
+                _heap_down(heap, 0)
+
+        # If nothing has been released and no untimed task has been told to
+        # go, there's nothing to do
+        if self._num_released == 0:
+            for task in self._aperiodic:
+                if task.ready():
+                    break
+            else:
+                if idle and heap:
+                    wait = _clock.ticks_diff(heap[0]._next_run,
+                                            _clock.ticks_us())
+                    if wait > 0:
+                        _clock.sleep_us(wait)
+                elif self.idle_hook is not None:
+                    self._idle()
+                return
+
+        # Find the highest priority task which is ready, the same way that
+        # pri_sched() does, and run it
+        for pri in self.pri_list:
             tries = 2
             length = len(pri)
             while tries < length:
-                ran = pri[pri[1]].schedule()
+                task = pri[pri[1]]
                 tries += 1
                 pri[1] += 1
                 if pri[1] >= length:
                     pri[1] = 2
-                if ran:
+                if task.go_flag and not task._suspended:
+                    task._run()
+
+                    # A released timer driven task goes back into the heap,
+                    # unless it has just been taken out of the task list
+                    if task.period != None and not task._in_heap \
+                            and task._task_list is self:
+                        self._num_released -= 1
+                        task._in_heap = True
+                        heap.append(task)
+                        _heap_up(heap, len(heap) - 1)
                     return
 
 
+    ## Build the heap of timer driven tasks and the list of untimed tasks
+    #  used by @c heap_sched().
+    #  @return The newly built heap
+    def _build_heap(self):
+        heap = []
+        self._aperiodic = []
+        self._num_released = 0
+        now = _clock.ticks_us()
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                if task._suspended:
+                    task._in_heap = False
+                elif task.period != None:
+                    task._hkey = _clock.ticks_diff(task._next_run, now)
+
+                    # A task which was released but hasn't run yet stays out
+                    # of the heap until it runs
+                    if task.go_flag:
+                        task._in_heap = False
+                        self._num_released += 1
+                    else:
+                        task._in_heap = True
+                        heap.append(task)
+                        _heap_up(heap, len(heap) - 1)
+                else:
+                    task._in_heap = False
+                    self._aperiodic.append(task)
+        self._heap = heap
+        return heap
+
+
+    ## Go through the tasks in the list, in order of priority, followed by
+    #  the retired tasks, for the reports.
+    def _all_tasks(self):
+        for pri in self.pri_list:
+            for task in pri[2:]:
+                yield task
+        for task in self.retired:
+            yield task
+
+
+    ## Create a table showing the 50th, 95th and 99th percentiles of each
+    #  profiled task's run time and lateness, in milliseconds. The numbers
+    #  come from histograms whose buckets are powers of two wide; see
+    #  @c Task.percentiles().
+    #  @return A string holding the table
+    def hist_report(self):
+        ret_str = 'TASK               RUN P50   RUN P95   RUN P99  LATE P50' \
+            '  LATE P95  LATE P99\n'
+        for task in self._all_tasks():
+            if not task._prof:
+                continue
+            ret_str += f"{task.name:<16s}"
+            for which in (0, 1):
+                for fraction in (0.50, 0.95, 0.99):
+                    value = task.percentiles(fraction)[which]
+                    if value is None:
+                        ret_str += '         -'
+                    else:
+                        ret_str += f"{(value / 1000.0): 10.3f}"
+            ret_str += '\n'
+        return ret_str
+
+
+    ## Create comma separated text holding each profiled task's histograms,
+    #  for use by a program on a PC. The first line is a header giving the
+    #  upper edge of each bucket in microseconds. Each following line holds
+    #  a task name, @c run or @c late, and the counts in each bucket.
+    #  @return A string holding the histograms, one per line
+    def hist_csv(self):
+        ret_str = 'task,kind,' + ','.join(
+            str((1 << bucket) - 1) for bucket in range(HIST_BUCKETS)) + '\n'
+        for task in self._all_tasks():
+            if not task._prof:
+                continue
+            for (kind, hist) in (('run', task._run_hist),
+                                 ('late', task._late_hist)):
+                ret_str += task.name + ',' + kind + ',' \
+                    + ','.join(str(count) for count in hist) + '\n'
+        return ret_str
+
+
     ## Create some diagnostic text showing the tasks in the task list.
     def __repr__(self):
         ret_str = 'TASK             PRI    PERIOD    RUNS   AVG DUR   MAX ' \
             'DUR  AVG LATE  MAX LATE\n'
-        for pri in self.pri_list:
-            for task in pri[2:]:
-                ret_str += str(task) + '\n'
+        for task in self._all_tasks():
+            ret_str += str(task) + '\n'
 
         return ret_str
 
 
-## This is @b the main task list which is created for scheduling when 
-#  @c cotask.py is imported into a program. 
-task_list = TaskList()
+## A group of timer driven tasks whose releases are lined up on one frame.
+#
+#  Each task reads the time when it's created, so tasks which are created one
+#  after another start their schedules a little apart, and tasks with
+#  different periods never line up in any planned way. Sometimes several
+#  heavy tasks then come due in the same scheduler tick and the ones with
+#  lower priority run late.
+#
+#  A task frame fixes this. It finds the base tick, the greatest common
+#  divisor of the tasks' periods, and the hyperperiod, their least common
+#  multiple, after which the pattern of releases repeats. When @c align() is
+#  called, each task is given a release offset, a whole number of ticks from
+#  the start of the frame, chosen so that the heaviest tasks are spread over
+#  different ticks. The weight of each task is the slowest run time found by
+#  profiling, so the frame works best when it's aligned after the tasks have
+#  run for a while; tasks which haven't been profiled are all given the same
+#  weight and simply spread out evenly.
+#
+#  Periods which divide each other, such as 5, 10 and 20 ms, give the
+#  shortest hyperperiod and the most room for staggering. Periods which don't,
+#  such as the 10 and 15 ms of the lab tasks, still work, but the hyperperiod
+#  is longer and the tick is shorter. If the hyperperiod holds more than
+#  @c FRAME_MAX_TICKS ticks, the frame can't be aligned and a @c ValueError
+#  is raised.
+#
+#  @b Example:
+#    @code
+#       frame = cotask.TaskFrame((task1, task2, task3))
+#       frame.align()
+#       print(frame.load_report())
+#    @endcode
+class TaskFrame:
+
+    ## Create a task frame.
+    #  @param tasks The timer driven tasks to be aligned together
+    def __init__(self, tasks=()):
+        ## The tasks in the frame
+        self.tasks = []
+
+        ## The release offset of each task from the start of the frame in
+        #  microseconds, kept in the same order as @c tasks
+        self.offsets = []
+
+        for task in tasks:
+            self.add(task)
+
+
+    ## Add a task to the frame. The task will be lined up with the others
+    #  the next time @c align() is called.
+    #  @param task A task which has a period
+    def add(self, task):
+        if task.period is None:
+            raise ValueError(f'Task {task.name} has no period to align')
+        self.tasks.append(task)
+        self.offsets.append(0)
+
+
+    ## Find the base tick of the frame.
+    #  @return The greatest common divisor of the tasks' periods in
+    #          microseconds, or 0 if there are no tasks
+    def tick(self):
+        tick = 0
+        for task in self.tasks:
+            tick = _gcd(tick, task.period)
+        return tick
+
+
+    ## Find the hyperperiod of the frame, after which the tasks' releases
+    #  repeat.
+    #  @return The least common multiple of the tasks' periods in
+    #          microseconds, or 0 if there are no tasks
+    def hyperperiod(self):
+        hyper = 0
+        for task in self.tasks:
+            hyper = (task.period if hyper == 0
+                     else hyper * task.period // _gcd(hyper, task.period))
+        return hyper
+
+
+    ## Find the number of ticks in the hyperperiod, checking that it isn't
+    #  too many to keep track of.
+    #  @param tick The base tick of the frame in microseconds
+    #  @return The number of ticks in the hyperperiod
+    def _num_ticks(self, tick):
+        slots = self.hyperperiod() // tick
+        if slots > FRAME_MAX_TICKS:
+            raise ValueError(f'Task periods need {slots} ticks of {tick} us '
+                             f'in a frame; the limit is {FRAME_MAX_TICKS}')
+        return slots
+
+
+    ## Check whether each period in the frame divides all longer periods.
+    #  @return @c True if the periods are harmonic
+    def is_harmonic(self):
+        periods = sorted(task.period for task in self.tasks)
+        for index in range(1, len(periods)):
+            if periods[index] % periods[index - 1]:
+                return False
+        return True
+
+
+    ## Choose release offsets for the tasks and restart their schedules.
+    #
+    #  Tasks are placed one at a time, heaviest first. Each is given the
+    #  offset, from 0 up to one tick less than its period, which keeps the
+    #  heaviest tick in the frame as light as possible, so that heavy tasks
+    #  end up in different ticks. The first release of every task then comes
+    #  at its offset after the start of the frame.
+    #  @param start The time in microseconds at which the frame begins, or
+    #         @c None to begin one tick from now
+    #  @param task_list The task list holding the tasks, if @c heap_sched()
+    #         is used, so that its heap is rebuilt for the new run times
+    def align(self, start=None, task_list=None):
+        tick = self.tick()
+        if tick == 0:
+            return
+        slots = self._num_ticks(tick)
+        load = [0] * slots
+        order = sorted(range(len(self.tasks)),
+                       key=lambda index: self.tasks[index]._slowest,
+                       reverse=True)
+
+        for index in order:
+            task = self.tasks[index]
+            weight = task._slowest or 1
+            step = task.period // tick
+            best_shift = 0
+            best_peak = None
+            for shift in range(step):
+                peak = 0
+                for slot in range(shift, slots, step):
+                    if load[slot] > peak:
+                        peak = load[slot]
+                if best_peak is None or peak < best_peak:
+                    best_shift = shift
+                    best_peak = peak
+            for slot in range(best_shift, slots, step):
+                load[slot] += weight
+            self.offsets[index] = best_shift * tick
+
+        if start is None:
+            start = _clock.ticks_diff(_clock.ticks_us(), -tick)
+        for index, task in enumerate(self.tasks):
+            task._next_run = _clock.ticks_diff(start, -self.offsets[index])
+        if task_list is not None:
+            task_list._heap = None
+
+
+    ## Find the worst case load in each tick of the frame.
+    #
+    #  The load of a tick is the sum of the slowest run times of all tasks
+    #  which are released in that tick, which is the longest the processor
+    #  could be kept busy by those releases.
+    #  @return A list holding, for each tick in the hyperperiod, a list of
+    #          the tasks released in that tick and their total load in
+    #          microseconds
+    def tick_loads(self):
+        tick = self.tick()
+        if tick == 0:
+            return []
+        loads = [[[], 0] for slot in range(self._num_ticks(tick))]
+        for index, task in enumerate(self.tasks):
+            for slot in range(self.offsets[index] // tick, len(loads),
+                              task.period // tick):
+                loads[slot][0].append(task)
+                loads[slot][1] += task._slowest
+        return loads
+
+
+    ## Make a table showing the tasks released and the worst case load in
+    #  each tick of the frame, as a percentage of the tick's length. A load
+    #  over 100% means that the tasks released in that tick can't all finish
+    #  before the next tick begins.
+    #  @return A string holding the table
+    def load_report(self):
+        tick = self.tick()
+        hyper = self.hyperperiod()
+        ret_str = (f'Frame: tick {tick / 1000:.1f} ms, hyperperiod '
+                   f'{hyper / 1000:.1f} ms'
+                   f'{"" if self.is_harmonic() else " (not harmonic)"}\n'
+                   'TICK   TIME ms    LOAD µs  LOAD %  TASKS\n')
+        worst = 0
+        for slot, (tasks, load) in enumerate(self.tick_loads()):
+            worst = max(worst, load)
+            names = ' '.join(task.name for task in tasks)
+            ret_str += (f'{slot:<6d}{slot * tick / 1000:8.1f}{load:11d}'
+                        f'{load * 100 / tick:8.1f}  {names}\n')
+        if tick:
+            ret_str += (f'Worst tick: {worst} µs, '
+                        f'{worst * 100 / tick:.1f}% of the tick\n')
+        return ret_str
+
+
+## Find the greatest common divisor of two numbers.
+#  @param a A number which is zero or positive
+#  @param b Another number which is zero or positive
+#  @return The largest number which divides both
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+
+## A request from a task to be parked until something happens.
+#
+#  A task can yield a @c Wait object instead of its state. The scheduler then
+#  won't run the task again until a share or queue gets new data or a given
+#  time has passed, whichever comes first; this saves the time which would be
+#  wasted running a task over and over just to find out there's nothing for
+#  it to do. The task is woken by @c task_share.Queue.put() and by a 
+#  @c task_share.Share.put() which changes the share's value, including puts
+#  from interrupt callbacks. When the task runs again, it continues from the
+#  @c yield as usual. A task which has no period runs only when woken, so
+#  call its @c go() method once to get it started. Since creating an object
+#  allocates memory, it's best to create each @c Wait once before the task's
+#  loop:
+#  @code
+#     def consumer_fun(shares):
+#         the_queue = shares
+#         wait_data = cotask.Wait(the_queue, timeout=100)
+#         while True:
+#             while the_queue.any():
+#                 process(the_queue.get())
+#             yield wait_data        # Sleep until data arrives or 100 ms pass
+#  @endcode
+class Wait:
+
+    ## Create a wait request.
+    #  @param share The share or queue to wait on, or @c None to just sleep
+    #  @param timeout The longest time to wait in milliseconds, or @c None to
+    #         wait for the share or queue with no time limit
+    def __init__(self, share=None, timeout=None):
+        if share is None and timeout is None:
+            raise ValueError('Wait needs a share, a timeout, or both')
+
+        ## The share or queue which will wake the waiting task
+        self.share = share
+
+        ## The time limit in microseconds, or @c None if there isn't one
+        self.timeout = None if timeout is None else int(timeout * 1000)
+
 
+## Make a wait request which puts a task to sleep for a while.
+#  @param ms The time to sleep in milliseconds
+#  @return A @c Wait object which the task can yield
+def sleep(ms):
+    return Wait(timeout=ms)
 
 
+## Find which bucket of a log2 histogram holds the given time.
+#  @param value A time in microseconds
+#  @return The index of the histogram bucket for that time
+@micropython.native
+def _log2_bucket(value):
+    bucket = 0
+    while value > 0 and bucket < HIST_BUCKETS - 1:
+        value >>= 1
+        bucket += 1
+    return bucket
 
+
+## Estimate a percentile from a log2 histogram.
+#  @param hist An array of counts as kept by @c Task profiling
+#  @param fraction The fraction of counts, such as 0.5 for the median
+#  @return The upper edge in microseconds of the bucket in which the given
+#          fraction of counts is reached, or @c None if the histogram is empty
+def _hist_percentile(hist, fraction):
+    total = sum(hist)
+    if total == 0:
+        return None
+    target = fraction * total
+    count = 0
+    for bucket in range(HIST_BUCKETS):
+        count += hist[bucket]
+        if count >= target:
+            return (1 << bucket) - 1 if bucket else 0
+    return (1 << (HIST_BUCKETS - 1)) - 1
+
+
+## A fixed size record of state transitions shared by all traced tasks.
+#
+#  Each record holds the time in microseconds since the record before it, the
+#  ID number of the task which made a transition, and the state into which
+#  that task went. The records are kept in arrays which are allocated when the
+#  buffer is created, so recording a transition doesn't allocate any memory.
+#  When the buffer is full, the oldest records are overwritten, so the buffer
+#  always holds the most recent transitions. 
+#
+#  A trace buffer holding @c TRACE_SIZE records is created automatically when
+#  the first task with @c trace=True is created. To use a different size,
+#  make the buffer before creating any tasks:
+#  @code
+#     cotask.trace_buffer = cotask.TraceBuffer(2000)
+#  @endcode
+#  The buffer can be sent to a PC in compact binary form with @c dump(); the
+#  program @c examples/decode_trace.py turns the dump into a timeline for each
+#  task.
+class TraceBuffer:
+
+    ## Create a trace buffer, allocating memory for its records.
+    #  @param size The number of transitions which the buffer can hold
+    def __init__(self, size=TRACE_SIZE):
+        self._size = size
+        self._times = array.array('i', range(size))
+        self._states = array.array('h', range(size))
+        self._ids = array.array('B', range(size))
+
+        ## The names of the traced tasks; each task's ID is its index here
+        self.names = []
+
+        self.clear()
+
+
+    ## Add a task to the list of tasks whose transitions are recorded.
+    #  @param name The name of the task
+    #  @return The ID number which the task uses when recording transitions
+    def add_task(self, name):
+        if len(self.names) >= 255:
+            raise ValueError('Too many traced tasks')
+        self.names.append(name)
+        return len(self.names) - 1
+
+
+    ## Remove all records from the buffer.
+    def clear(self):
+        self._idx = 0
+        self._count = 0
+        self._lost = False
+        self._last = _clock.ticks_us()
+
+
+    ## Record a state transition.
+    #  @param task_id The ID number of the task which made the transition
+    #  @param state The state to which the task went. States which aren't
+    #         integers, such as @c None from a bare @c yield, are saved as -1;
+    #         integers which don't fit in 16 bits are clamped to fit
+    #  @param when The time of the transition from the clock's @c ticks_us()
+    @micropython.native
+    def record(self, task_id, state, when):
+        idx = self._idx
+        self._times[idx] = _clock.ticks_diff(when, self._last)
+        if type(state) is not int:
+            state = -1
+        elif state > 32767:
+            state = 32767
+        elif state < -32768:
+            state = -32768
+        self._states[idx] = state
+        self._ids[idx] = task_id
+        self._last = when
+        idx += 1
+        if idx >= self._size:
+            idx = 0
+        self._idx = idx
+        if self._count < self._size:
+            self._count += 1
+        else:
+            self._lost = True
+
+
+    ## Check whether old records have been overwritten by newer ones.
+    #  @return @c True if the buffer has filled and some records were lost
+    def wrapped(self):
+        return self._lost
+
+
+    ## Go through the records from oldest to newest.
+    #  This generator gives a tuple for each record holding the time in
+    #  microseconds since the oldest record, the ID of the task, and the state
+    #  to which that task went. It's meant for diagnostic printouts and
+    #  allocates memory, so it shouldn't be used while tasks are running.
+    def records(self):
+        idx = self._idx - self._count
+        if idx < 0:
+            idx += self._size
+        total = 0
+        for num in range(self._count):
+            if num > 0:
+                total += self._times[idx]
+            yield (total, self._ids[idx], self._states[idx])
+            idx += 1
+            if idx >= self._size:
+                idx = 0
+
+
+    ## Write the buffer to a stream such as @c pyb.USB_VCP in binary form.
+    #  The dump begins with @c TRACE_MAGIC and a header giving the number of
+    #  tasks, the buffer size, the number of records, the index of the next
+    #  record to be written and 1 if old records were lost or 0 if not, all
+    #  as little-endian unsigned 16-bit numbers. Then come the task names,
+    #  each as a length byte followed by the name, then the raw contents of
+    #  the time (signed 32-bit), state (signed 16-bit) and task ID (8-bit)
+    #  arrays. The arrays are written in the processor's own byte order,
+    #  which is little-endian on the STM32 and is what @c decode_trace.py
+    #  expects.
+    #  @param stream An object with a @c write() method which takes bytes
+    def dump(self, stream):
+        stream.write(TRACE_MAGIC)
+        stream.write(struct.pack('<HHHHH', len(self.names), self._size,
+                                 self._count, self._idx, self._lost))
+        for name in self.names:
+            name = name.encode()[:255]
+            stream.write(bytes((len(name),)))
+            stream.write(name)
+        stream.write(self._times)
+        stream.write(self._states)
+        stream.write(self._ids)
+
+
+## The trace buffer shared by all traced tasks, or @c None until a task with
+#  tracing turned on has been created.
+trace_buffer = None
+
+
+## Move a task up a heap of tasks until its parent's deadline isn't later.
+#  The heap is kept by hand rather than with @c heapq so that keys can be
+#  changed in place and nothing is allocated while the scheduler runs.
+#  @param heap The list of tasks which makes up the heap
+#  @param index The index in the heap of the task to be moved up
+@micropython.native
+def _heap_up(heap, index):
+    task = heap[index]
+    while index > 0:
+        parent = (index - 1) >> 1
+        if heap[parent]._hkey <= task._hkey:
+            break
+        heap[index] = heap[parent]
+        index = parent
+    heap[index] = task
+
+
+## Move a task down a heap of tasks until neither child's deadline is earlier.
+#  @param heap The list of tasks which makes up the heap
+#  @param index The index in the heap of the task to be moved down
+@micropython.native
+def _heap_down(heap, index):
+    size = len(heap)
+    task = heap[index]
+    while True:
+        child = 2 * index + 1
+        if child >= size:
+            break
+        if child + 1 < size and heap[child + 1]._hkey < heap[child]._hkey:
+            child += 1
+        if heap[child]._hkey >= task._hkey:
+            break
+        heap[index] = heap[child]
+        index = child
+    heap[index] = task
+
+
+## This is @b the main task list which is created for scheduling when 
+#  @c cotask.py is imported into a program. 
+task_list = TaskList()
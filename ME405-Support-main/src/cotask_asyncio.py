@@ -0,0 +1,259 @@
+"""!
+@file cotask_asyncio.py
+This file runs @c cotask tasks under Python's @c asyncio on a PC, so that a
+set of tasks can be tried out before it's put onto a microcontroller. The
+task functions are the same generators which are used with @c cotask on the
+microcontroller, and they're wrapped in the same @c cotask.Task objects, so
+profiling works as usual and the task list prints the same table.
+
+Each task is run by its own @c asyncio coroutine, which sleeps until the
+task's next run time with @c asyncio.sleep(). Tasks with no period, and tasks
+waiting for a share or queue, are checked every @c poll milliseconds. Task
+priorities aren't used, since @c asyncio has none; tasks which are due at
+the same time run in the order in which they were added to the task list.
+
+By default time is simulated: whenever every task is waiting, the clock jumps
+straight to the time at which the next one is due, so hours of task time go
+by in seconds. Task code can call @c advance() on the clock returned by
+@c clock() to pretend that it took some time to run.
+
+@b Example:
+@code
+import cotask_asyncio               # Must be imported before cotask
+import cotask
+import task_share
+
+share0 = task_share.Share('h', thread_protect=False, name="Share 0")
+q0 = task_share.Queue('L', 16, thread_protect=False, name="Queue 0")
+t_list = cotask.TaskList()
+t_list.append(cotask.Task(task1_fun, name="Task_1", priority=2, period=10,
+                          profile=True, shares=(share0, q0)))
+t_list.append(cotask.Task(task3_fun, name="Task_3", priority=1, period=15,
+                          profile=True, shares=(share0, q0)))
+
+cotask_asyncio.run(t_list, 3600)    # One simulated hour
+print(t_list)
+@endcode
+
+This file is @b not meant to be copied to a microcontroller.
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import asyncio
+import selectors
+
+import sim_time
+
+# If there's no real utime module, use the simulated one so that cotask can be
+# imported. The clock used by cotask is switched to the event loop's clock by
+# run()
+try:
+    import utime
+except ImportError:
+    sim_time.install ()
+
+import cotask
+
+
+class VirtualTimeLoop (asyncio.SelectorEventLoop):
+    """!
+    An @c asyncio event loop whose clock is simulated. Whenever the loop would
+    wait for something, the clock jumps forward by the time it would have
+    waited instead, so sleeping takes no real time at all.
+    """
+
+    def __init__ (self):
+        """!
+        Create an event loop whose time starts at zero.
+        """
+        ## The simulated time in seconds
+        self.virtual_time = 0.0
+        super ().__init__ (selector=_VirtualSelector (self))
+
+
+    def time (self):
+        """!
+        Get the loop's simulated time.
+        @returns The time in seconds
+        """
+        return self.virtual_time
+
+
+class _VirtualSelector (selectors.DefaultSelector):
+    """!
+    A selector which never blocks; it moves the loop's clock forward by the
+    time for which it was asked to wait.
+    """
+
+    def __init__ (self, loop):
+        super ().__init__ ()
+        self._loop = loop
+
+
+    def select (self, timeout=None):
+        ready = super ().select (0)
+        if not ready and timeout is not None and timeout > 0:
+            self._loop.virtual_time += timeout
+        return ready
+
+
+class LoopClock (sim_time.SimClock):
+    """!
+    A clock for @c cotask.set_clock() which reads the time from an @c asyncio
+    event loop, so that @c cotask and the loop agree on the time.
+    """
+
+    def __init__ (self, loop):
+        """!
+        Create a clock which follows the given event loop.
+        @param loop The event loop whose time is used
+        """
+        super ().__init__ ()
+        self._loop = loop
+        self.now = int (loop.time () * 1_000_000)
+
+
+    def ticks_us (self):
+        """!
+        Get the loop's time in microseconds, wrapped as @c utime does it.
+        @returns The wrapped time in microseconds
+        """
+        self.reads += 1
+        self.now = int (self._loop.time () * 1_000_000)
+        return self.now & sim_time.TICKS_MAX
+
+
+    def ticks_ms (self):
+        """!
+        Get the loop's time in milliseconds, wrapped as @c utime does it.
+        @returns The wrapped time in milliseconds
+        """
+        return int (self._loop.time () * 1000) & sim_time.TICKS_MAX
+
+
+    def advance (self, us):
+        """!
+        Pretend that some time has passed. This only works when the loop's
+        time is simulated; with real time, it does nothing.
+        @param us The number of microseconds which pass
+        """
+        if isinstance (self._loop, VirtualTimeLoop):
+            self._loop.virtual_time += us / 1_000_000
+
+
+## The clock used by the tasks while @c run() is running
+_clock = None
+
+
+def clock ():
+    """!
+    Get the clock which the tasks are using while @c run() is running.
+    @returns The @c LoopClock used by @c cotask, or @c None if nothing is
+             running
+    """
+    return _clock
+
+
+async def _drive (task, poll_s):
+    """!
+    Run one task for as long as the event loop keeps going.
+    @param task The @c cotask.Task to be run
+    @param poll_s How often, in seconds, to check tasks which have no period
+           or are waiting for a share or queue
+    """
+    while True:
+        if task.schedule ():
+            await asyncio.sleep (0)
+        elif task.period is not None and not task.is_parked ():
+            wait = _clock.ticks_diff (task.next_run (), _clock.ticks_us ())
+            await asyncio.sleep (max (wait, 1) / 1_000_000)
+        else:
+            await asyncio.sleep (poll_s)
+
+
+async def _run_for (task_list, duration, poll_s):
+    """!
+    Start a coroutine for each task, let them run, then stop them.
+    @param task_list The @c cotask.TaskList whose tasks are to be run
+    @param duration How long to run, in seconds
+    @param poll_s How often, in seconds, to check untimed or waiting tasks
+    """
+    runners = [asyncio.ensure_future (_drive (task, poll_s))
+               for pri in task_list.pri_list for task in pri[2:]]
+    await asyncio.sleep (duration)
+    for runner in runners:
+        runner.cancel ()
+    await asyncio.gather (*runners, return_exceptions=True)
+
+
+def run (task_list=None, duration=1.0, virtual=True, poll=1):
+    """!
+    Run the tasks in a task list under @c asyncio for a given time. When
+    this function returns, the task list holds the usual profiling data, so
+    @c print(task_list) shows the same table as on a microcontroller.
+    @param task_list The @c cotask.TaskList to run, by default
+           @c cotask.task_list
+    @param duration How long to run the tasks, in seconds
+    @param virtual @c True to simulate time, running as fast as possible, or
+           @c False to run in real time
+    @param poll How often, in milliseconds, to check tasks which have no
+           period or are waiting for a share or queue
+    @returns The task list
+    """
+    global _clock
+    if task_list is None:
+        task_list = cotask.task_list
+
+    loop = VirtualTimeLoop () if virtual else asyncio.new_event_loop ()
+    _clock = LoopClock (loop)
+    previous = cotask.get_clock ()
+    cotask.set_clock (_clock)
+
+    # Tasks were created before the loop's clock was in use, so start their
+    # schedules over from the loop's time
+    task_list.restart ()
+
+    try:
+        loop.run_until_complete (_run_for (task_list, duration, poll / 1000))
+    finally:
+        loop.close ()
+        _clock = None
+        cotask.set_clock (previous)
+    return task_list
+
+
+if __name__ == "__main__":
+    import time
+
+    ## Simulated run time of each task body in microseconds
+    COSTS = {"Task_1" : 400, "Task_2" : 50, "Task_3" : 300}
+
+    def make_fun (name):
+        def task_fun (shares):
+            the_share, the_queue = shares
+            state = 0
+            while True:
+                clock ().advance (COSTS[name])
+                state = 1 - state
+                yield state
+        return task_fun
+
+    import task_share
+    share0 = task_share.Share ('h', thread_protect=False, name="Share 0")
+    q0 = task_share.Queue ('L', 16, thread_protect=False, name="Queue 0")
+    for (name, pri, period) in (("Task_1", 2, 10), ("Task_2", 3, 10),
+                                ("Task_3", 1, 15)):
+        cotask.task_list.append (cotask.Task (make_fun (name), name=name,
+                                              priority=pri, period=period,
+                                              profile=True,
+                                              shares=(share0, q0)))
+
+    SIM_HOURS = 0.25
+    begin = time.perf_counter ()
+    run (cotask.task_list, SIM_HOURS * 3600)
+    elapsed = time.perf_counter () - begin
+    print (cotask.task_list)
+    print (f"{SIM_HOURS * 3 :.2f} simulated task-hours in {elapsed:.1f} s")
@@ -8,6 +8,19 @@ The code in this file is @b not the source code which makes the C queues work.
 That code is written in C as the file @c cqueues.c and compiled into the
 MicroPython image used in the ME405 course. 
 
+Where the C module isn't compiled in, such as on a stock MicroPython image or
+on a PC, importing this file gives the Python versions of the queues from
+@c cqueue_py.py, which work the same way but more slowly. On the ME405
+MicroPython image, the C module is found first and this file isn't used.
+Running this file as a program tests whichever queues @c import @c cqueue
+gives.
+
+Besides the queues for single integers, floats and bytes, a @c StructQueue
+holds records of several values packed together as by the @c struct module,
+such as a time stamp with a position and a duty cycle. Each record is put in
+and taken out whole, so a reader never gets the values of one sample mixed
+with those of another.
+
 @author JR Ridgely
 @date   2022-Feb-24 JRR Original file
 @copyright (c) 2022 by JR Ridgely and released under the GNU Public License V3.
@@ -127,6 +140,38 @@ if __name__ == "__not_me__":
             @return  The maximum number of items that have been in the queue
             """
 
+        def put_from(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Put a block of floats from a buffer into the queue.
+            @details The items are copied with at most two calls to
+                     @c memcpy(), so hundreds of items can be put in by one
+                     call, even in an interrupt callback. If there isn't room
+                     for all of them, the oldest data is overwritten just as
+                     by @c put(). The buffer may hold floats
+                     or raw bytes, which are taken to be floats in the
+                     processor's byte order; other types cause a
+                     @c TypeError.
+            @param   buffer An @c array, @c bytearray or @c memoryview
+            @param   start The index in the buffer of the first item
+            @param   count The number of items to put in, by default all of
+                     those from @c start to the end of the buffer
+            @returns The number of items put into the queue
+            """
+
+        def get_into(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Get as many floats as are available, up to a limit,
+                     into a buffer.
+            @details The items are copied with at most two calls to
+                     @c memcpy() and no memory is allocated.
+            @param   buffer A writable @c array, @c bytearray or @c memoryview
+            @param   start The index in the buffer at which to put the first
+                     item
+            @param   count The largest number of items to get, by default
+                     enough to fill the buffer from @c start to the end
+            @returns The number of items gotten from the queue
+            """
+
 
     class IntQueue:
         """!
@@ -226,6 +271,38 @@ if __name__ == "__not_me__":
             @return  The maximum number of items that have been in the queue
             """
 
+        def put_from(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Put a block of integers from a buffer into the queue.
+            @details The items are copied with at most two calls to
+                     @c memcpy(), so hundreds of items can be put in by one
+                     call, even in an interrupt callback. If there isn't room
+                     for all of them, the oldest data is overwritten just as
+                     by @c put(). The buffer may hold 32 bit
+                     integers or raw bytes, which are taken to be integers in
+                     the processor's byte order; other types cause a
+                     @c TypeError.
+            @param   buffer An @c array, @c bytearray or @c memoryview
+            @param   start The index in the buffer of the first item
+            @param   count The number of items to put in, by default all of
+                     those from @c start to the end of the buffer
+            @returns The number of items put into the queue
+            """
+
+        def get_into(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Get as many integers as are available, up to a limit,
+                     into a buffer.
+            @details The items are copied with at most two calls to
+                     @c memcpy() and no memory is allocated.
+            @param   buffer A writable @c array, @c bytearray or @c memoryview
+            @param   start The index in the buffer at which to put the first
+                     item
+            @param   count The largest number of items to get, by default
+                     enough to fill the buffer from @c start to the end
+            @returns The number of items gotten from the queue
+            """
+
     class ByteQueue:
         """!
         @brief   A fast, pre-allocated queue of characters for MicroPython.
@@ -326,144 +403,297 @@ if __name__ == "__not_me__":
             @return  The maximum number of items that have been in the queue
             """
 
+        def put_from(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Put a block of bytes from a buffer into the queue.
+            @details The items are copied with at most two calls to
+                     @c memcpy(), so hundreds of items can be put in by one
+                     call, even in an interrupt callback. If there isn't room
+                     for all of them, the oldest data is overwritten just as
+                     by @c put(). The buffer must hold bytes.
+            @param   buffer An @c array, @c bytearray or @c memoryview
+            @param   start The index in the buffer of the first item
+            @param   count The number of items to put in, by default all of
+                     those from @c start to the end of the buffer
+            @returns The number of items put into the queue
+            """
 
-import utime
-import cqueue
-
-## The number of times to call put() for each queue
-TEST_SIZE = 3000
-
-## The number of elements in each queue which we create and test
-NUM_QUEUE_SIZE = 2000
-
-## The number of characters in the test byte queue
-BYTE_QUEUE_SIZE = 20
-
-## The number of times we try to put something into the byte queue. It's kept
-#  somewhat small so we're putting in printable ASCII characters
-BYTE_T_SIZE = 94
-
-## The number of times we repeat the whole test
-NUM_RUNS = 25
-
-## The results of running tests repeatedly
-overall = {"Int Sum"   : 0,
-           "Int Max"   : 0,
-           "Float Sum" : 0,
-           "Float Max" : 0,
-           "Byte Sum"  : 0,
-           "Byte Max"  : 0
-          }
-
-
-def main():
-    """!
-    Run a test by creating queues, putting numbers into the queues, getting the
-    numbers back out, and checking for consistency. While we're at it, keep
-    track of the time it took to put things into the queues, as this can be
-    important if putting data into a queue within an interrupt callback.
-    """
-    int_queue = cqueue.IntQueue(NUM_QUEUE_SIZE)
-    float_queue = cqueue.FloatQueue(NUM_QUEUE_SIZE)
-    byte_queue = cqueue.ByteQueue(BYTE_QUEUE_SIZE)
-
-    intdursum = 0                        # Sums of durations of put() calls
-    floatdursum = 0
-    bytedursum = 0
-    intdurmax = 0                        # Maximum durations of the put() calls
-    floatdurmax = 0
-    bytedurmax = 0
-
-    # Write things into queues, overwriting some data to make sure that's OK
-    for count in range(TEST_SIZE):
-        count += 1                       # Prevent division by zero in test
-        begin_time = utime.ticks_us()
-        int_queue.put(count)
-        dur = utime.ticks_diff(utime.ticks_us(), begin_time)
-        intdursum += dur
-        intdurmax = dur if dur > intdurmax else intdurmax
-
-    for count in range(TEST_SIZE):
-        count += 1
-        begin_time = utime.ticks_us()
-        float_queue.put(count)
-        dur = utime.ticks_diff(utime.ticks_us(), begin_time)
-        floatdursum += dur
-        floatdurmax = dur if dur > floatdurmax else floatdurmax
-
-    # Put characters into the byte queue, either one character at a time or by
-    # making a string and dumping that into the queue. It seems putting known
-    # characters in the queue is very fast; construting f-strings, not so much
-    for count in range (BYTE_T_SIZE):
-        a_chr = chr(ord('!') + count)
-        count += 1
-        begin_time = utime.ticks_us()
-#         byte_queue.put (a_chr)                # A single character at a time
-#         byte_queue.put ('Floofala')             # Several characters at once
-        byte_queue.put (f"{a_chr}")           # An f-string of characters
-        dur = utime.ticks_diff(utime.ticks_us(), begin_time)
-        bytedursum += dur
-        bytedurmax = dur if dur > bytedurmax else bytedurmax
-
-    while int_queue.any() and float_queue.any():
-        got_this = int_queue.get()
-        got_that = float_queue.get()
-        if (float(got_this) - got_that) / got_that > 0.0001:
-            print (f"Error: got_this != got_that")
-
-    print(f"for {TEST_SIZE} calls to put() in {NUM_QUEUE_SIZE} size queues:")
-    print(f"Ints:    Avg {intdursum / TEST_SIZE:.1f}, Max {intdurmax} us")
-    print(f"Floats:  Avg {floatdursum / TEST_SIZE:.1f}, Max {floatdurmax} us")
-    print(f"Strings: Avg {bytedursum / BYTE_T_SIZE:.1f}, Max {bytedurmax} us")
-
-    # Print just the last 50 characters, or however many are available, from
-    # the byte queue. This has been used to verify that the contents are OK
-    count = 0
-    while byte_queue.any():
-        got_char = byte_queue.get()
-        if count < 50:
-            print(got_char.decode(), end='')
-            count += 1
-    print('')
+        def get_into(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Get as many bytes as are available, up to a limit,
+                     into a buffer.
+            @details The items are copied with at most two calls to
+                     @c memcpy() and no memory is allocated.
+            @param   buffer A writable @c array, @c bytearray or @c memoryview
+            @param   start The index in the buffer at which to put the first
+                     item
+            @param   count The largest number of items to get, by default
+                     enough to fill the buffer from @c start to the end
+            @returns The number of items gotten from the queue
+            """
+
+    class StructQueue:
+        """!
+        @brief   A fast queue of records, each holding several packed values.
+        @details Each record is packed into the queue's memory using a format
+                 string like those used by the @c struct module, for example
+                 @c '<hLf' for a 16 bit integer, a 32 bit unsigned integer and
+                 a float. Integer and floating point format codes of any size
+                 may be used, with or without a byte order prefix; strings,
+                 padding and pointers (@c 's', @c 'x' and @c 'P') cannot.
+                 As with the other C queues, putting records into the queue
+                 doesn't allocate memory and a full queue overwrites its
+                 oldest record:
+                 @code
+                 log = cqueue.StructQueue('<Lhf', 100)
+                 log.put(utime.ticks_ms(), position, duty)   # In a task or ISR
+                 ...
+                 while log.any():
+                     time, position, duty = log.get()
+                 @endcode
+                 Records can also be copied out as packed bytes with
+                 @c get_into(), which allocates no memory and can be much
+                 faster than calling @c get() for each record.
+        """
+
+        def __init__(self, format : str, size : int):
+            """!
+            @brief   Create a fast queue for records of packed values.
+            @param   format A @c struct format string describing each record
+            @param   size The maximum number of records the queue can hold
+            """
 
-    overall["Int Sum"] += intdursum
-    overall["Int Max"] = max(overall["Int Max"], intdurmax)
-    overall["Float Sum"] += floatdursum
-    overall["Float Max"] = max(overall["Float Max"], floatdurmax)
-    overall["Byte Sum"] += bytedursum
-    overall["Byte Max"] = max(overall["Byte Max"], bytedurmax)
+        def record_size() -> int:
+            """!
+            @brief   Get the number of bytes taken by each record.
+            @returns The size of one record, as @c struct.calcsize() gives it
+            """
+
+        def put(*values):
+            """!
+            @brief   Put a record into the queue.
+            @details If the queue is full, its oldest record is overwritten.
+                     If the wrong number of values is given, or a value can't
+                     be packed into its field, an exception is raised and the
+                     queue is not changed.
+            @param   values One value for each field in the format string
+            """
 
+        def get() -> tuple:
+            """!
+            @brief   Get the oldest record from the queue.
+            @details Because a new tuple is made, this method allocates memory
+                     and shouldn't be called in an interrupt callback.
+            @returns A tuple of the record's values, or @c None if the queue
+                     is empty
+            """
+
+        def any() -> bool:
+            """!
+            @brief   Checks if there are any records in the queue.
+            @returns @c True if there is at least one record in the queue
+            """
+
+        def available() -> int:
+            """!
+            @brief   Checks how many records can be read from the queue.
+            @returns The number of records in the queue
+            """
 
-# Run the test suite the given numer of times for a crude reliability test. A
-# memory allocation bug has been found in the past by creating and using queues
-# many times
-for run in range (NUM_RUNS):
+        def clear():
+            """!
+            @brief   Empty the queue without changing or allocating memory.
+            """
+
+        def full() -> bool:
+            """!
+            @brief   Check whether the queue is currently full.
+            @returns @c True if the queue is currently full or @c False if not
+            """
+
+        def max_full() -> int:
+            """!
+            @brief   Get the most records which have been in the queue since it
+                     was created or cleared.
+            @return  The maximum number of records that have been in the queue
+            """
+
+        def put_from(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Put a block of packed records from a buffer into the
+                     queue.
+            @details The records must already be packed in the queue's format,
+                     as by @c get_into() or @c struct.pack_into(). They're
+                     copied with at most two calls to @c memcpy(); if there
+                     isn't room, the oldest records are overwritten.
+            @param   buffer A @c bytearray, @c bytes or @c memoryview of bytes
+            @param   start The index of the first record in the buffer,
+                     counted in records rather than bytes
+            @param   count The number of records to put in, by default all of
+                     those from @c start to the end of the buffer
+            @returns The number of records put into the queue
+            """
+
+        def get_into(buffer, start : int = 0, count : int = None) -> int:
+            """!
+            @brief   Get as many packed records as are available, up to a
+                     limit, into a buffer.
+            @details The records are copied as raw bytes with at most two
+                     calls to @c memcpy() and no memory is allocated. They can
+                     be unpacked later with @c struct.unpack_from(), or
+                     written to a file or serial port as they are.
+            @param   buffer A writable @c bytearray or @c memoryview of bytes
+            @param   start The index in the buffer, counted in records, at
+                     which to put the first record
+            @param   count The largest number of records to get, by default
+                     as many as fit in the buffer after @c start
+            @returns The number of records gotten from the queue
+            """
+
+
+# If the C queues aren't compiled into MicroPython, use the Python ones
+from cqueue_py import IntQueue, FloatQueue, ByteQueue, StructQueue
+
+
+# The test program is run only if this file is run as a program
+if __name__ == "__main__":
+    import utime
+    import cqueue
+
+    ## The number of times to call put() for each queue
+    TEST_SIZE = 3000
+
+    ## The number of elements in each queue which we create and test
+    NUM_QUEUE_SIZE = 2000
+
+    ## The number of characters in the test byte queue
+    BYTE_QUEUE_SIZE = 20
+
+    ## The number of times we try to put something into the byte queue. It's kept
+    #  somewhat small so we're putting in printable ASCII characters
+    BYTE_T_SIZE = 94
+
+    ## The number of times we repeat the whole test
+    NUM_RUNS = 25
+
+    ## The results of running tests repeatedly
+    overall = {"Int Sum"   : 0,
+               "Int Max"   : 0,
+               "Float Sum" : 0,
+               "Float Max" : 0,
+               "Byte Sum"  : 0,
+               "Byte Max"  : 0
+              }
+
+
+    def main():
+        """!
+        Run a test by creating queues, putting numbers into the queues, getting the
+        numbers back out, and checking for consistency. While we're at it, keep
+        track of the time it took to put things into the queues, as this can be
+        important if putting data into a queue within an interrupt callback.
+        """
+        int_queue = cqueue.IntQueue(NUM_QUEUE_SIZE)
+        float_queue = cqueue.FloatQueue(NUM_QUEUE_SIZE)
+        byte_queue = cqueue.ByteQueue(BYTE_QUEUE_SIZE)
+
+        intdursum = 0                        # Sums of durations of put() calls
+        floatdursum = 0
+        bytedursum = 0
+        intdurmax = 0                        # Maximum durations of the put() calls
+        floatdurmax = 0
+        bytedurmax = 0
+
+        # Write things into queues, overwriting some data to make sure that's OK
+        for count in range(TEST_SIZE):
+            count += 1                       # Prevent division by zero in test
+            begin_time = utime.ticks_us()
+            int_queue.put(count)
+            dur = utime.ticks_diff(utime.ticks_us(), begin_time)
+            intdursum += dur
+            intdurmax = dur if dur > intdurmax else intdurmax
+
+        for count in range(TEST_SIZE):
+            count += 1
+            begin_time = utime.ticks_us()
+            float_queue.put(count)
+            dur = utime.ticks_diff(utime.ticks_us(), begin_time)
+            floatdursum += dur
+            floatdurmax = dur if dur > floatdurmax else floatdurmax
+
+        # Put characters into the byte queue, either one character at a time or by
+        # making a string and dumping that into the queue. It seems putting known
+        # characters in the queue is very fast; construting f-strings, not so much
+        for count in range (BYTE_T_SIZE):
+            a_chr = chr(ord('!') + count)
+            count += 1
+            begin_time = utime.ticks_us()
+    #         byte_queue.put (a_chr)                # A single character at a time
+    #         byte_queue.put ('Floofala')             # Several characters at once
+            byte_queue.put (f"{a_chr}")           # An f-string of characters
+            dur = utime.ticks_diff(utime.ticks_us(), begin_time)
+            bytedursum += dur
+            bytedurmax = dur if dur > bytedurmax else bytedurmax
+
+        while int_queue.any() and float_queue.any():
+            got_this = int_queue.get()
+            got_that = float_queue.get()
+            if (float(got_this) - got_that) / got_that > 0.0001:
+                print (f"Error: got_this != got_that")
+
+        print(f"for {TEST_SIZE} calls to put() in {NUM_QUEUE_SIZE} size queues:")
+        print(f"Ints:    Avg {intdursum / TEST_SIZE:.1f}, Max {intdurmax} us")
+        print(f"Floats:  Avg {floatdursum / TEST_SIZE:.1f}, Max {floatdurmax} us")
+        print(f"Strings: Avg {bytedursum / BYTE_T_SIZE:.1f}, Max {bytedurmax} us")
+
+        # Print just the last 50 characters, or however many are available, from
+        # the byte queue. This has been used to verify that the contents are OK
+        count = 0
+        while byte_queue.any():
+            got_char = byte_queue.get()
+            if count < 50:
+                print(got_char.decode(), end='')
+                count += 1
+        print('')
+
+        overall["Int Sum"] += intdursum
+        overall["Int Max"] = max(overall["Int Max"], intdurmax)
+        overall["Float Sum"] += floatdursum
+        overall["Float Max"] = max(overall["Float Max"], floatdurmax)
+        overall["Byte Sum"] += bytedursum
+        overall["Byte Max"] = max(overall["Byte Max"], bytedurmax)
+
+
+    # Run the test suite the given numer of times for a crude reliability test. A
+    # memory allocation bug has been found in the past by creating and using queues
+    # many times
+    for run in range (NUM_RUNS):
+        print("")
+        print(f"Run {run + 1} of {NUM_RUNS}", end=' ')
+        main()
+
+    print("")
+    print(f"Overall results from {NUM_RUNS} runs:")
+    print(f"Ints:    Avg {overall['Int Sum'] / (TEST_SIZE * NUM_RUNS):.1f}, " +
+          f"Max {overall['Int Max']} us")
+    print(f"Floats:  Avg {overall['Float Sum'] / (TEST_SIZE * NUM_RUNS):.1f}, " +
+          f"Max {overall['Float Max']} us")
+    print(f"Strings: Avg {overall['Byte Sum'] / (BYTE_T_SIZE * NUM_RUNS):.1f}, " +
+          f"Max {overall['Byte Max']} us")
     print("")
-    print(f"Run {run + 1} of {NUM_RUNS}", end=' ')
-    main()
-
-print("")
-print(f"Overall results from {NUM_RUNS} runs:")
-print(f"Ints:    Avg {overall["Int Sum"] / (TEST_SIZE * NUM_RUNS):.1f}, " +
-      f"Max {overall["Int Max"]} us")
-print(f"Floats:  Avg {overall["Float Sum"] / (TEST_SIZE * NUM_RUNS):.1f}, " +
-      f"Max {overall["Float Max"]} us")
-print(f"Strings: Avg {overall["Byte Sum"] / (BYTE_T_SIZE * NUM_RUNS):.1f}, " +
-      f"Max {overall["Byte Max"]} us")
-print("")
-
-# Check that if invalid data is sent to the queue, an exception is thrown
-# rather than having a crash and reboot. It seems particularly evil to try
-# to put a queue object into itself
-print("The following should throw some TypeErrors:")
-booq = cqueue.ByteQueue(10)
-for attempt in (1.234, [0, 1, 2], {'one' : 1}, main, "Hel", b"lo!"):
-    try:
-        booq.put(attempt)
-    except TypeError as ohnoes:
-        print(f"    Error \"{ohnoes}\" due to put({attempt})")
-
-print(booq)
-
-print("Test finished.")
+
+    # Check that if invalid data is sent to the queue, an exception is thrown
+    # rather than having a crash and reboot. It seems particularly evil to try
+    # to put a queue object into itself
+    print("The following should throw some TypeErrors:")
+    booq = cqueue.ByteQueue(10)
+    for attempt in (1.234, [0, 1, 2], {'one' : 1}, main, "Hel", b"lo!"):
+        try:
+            booq.put(attempt)
+        except TypeError as ohnoes:
+            print(f"    Error \"{ohnoes}\" due to put({attempt})")
+
+    print(booq)
+
+    print("Test finished.")
 
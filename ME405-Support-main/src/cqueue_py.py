@@ -0,0 +1,516 @@
+"""!
+@file cqueue_py.py
+This file contains queues written in Python which work the same way as the
+custom C queues @c cqueue.IntQueue, @c cqueue.FloatQueue,
+@c cqueue.ByteQueue and @c cqueue.StructQueue. They're used where the C
+module isn't available, such as on a board running a stock MicroPython image
+or on a PC, so that code written for the C queues still runs there:
+@code
+try:
+    import cqueue
+except ImportError:
+    import cqueue_py as cqueue
+@endcode
+
+The queues behave as the C ones do: memory for the items is allocated when a
+queue is created, in an @c array or @c bytearray, and @c put() and @c get()
+don't allocate any more, except that @c ByteQueue.get() makes a one byte
+@c bytes object as the C version does. Putting an item into a full queue
+overwrites the oldest item, @c get() returns @c None if the queue is empty,
+and @c max_full() and @c available() count items in the same way. Integers
+are stored as signed 32 bit numbers and floats as single precision ones, as
+in C. Being written in Python, these queues take several times as long to
+run as the C ones; @c test_cqueue.py shows by how much.
+
+Blocks of items can be copied into and out of a queue with @c put_from() and
+@c get_into(), which take an @c array, @c bytearray or @c memoryview as the
+C versions do, and copy the items in at most two slices rather than one at a
+time. A @c bytearray is taken to hold items in the processor's byte order.
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import array
+import struct
+
+try:
+    import micropython
+except ImportError:
+    # On a PC there's no native code emitter, so the decorator does nothing
+    class micropython:
+        @staticmethod
+        def native(fun):
+            return fun
+
+
+## The version of the C module whose behavior these queues match
+__version__ = "0.8.0"
+
+
+class _RawItems:
+    """!
+    @brief   A view of items held as bytes in a buffer.
+    @details This is used on MicroPython, whose @c memoryview can't be cast
+             to another type, to read and write the items in a @c bytearray
+             one at a time.
+    """
+
+    def __init__(self, buffer, type_code):
+        self._buffer = buffer
+        self._code = type_code
+        self._item_size = struct.calcsize(type_code)
+        self._len = len(buffer) // self._item_size
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, index):
+        return struct.unpack_from(self._code, self._buffer,
+                                  index * self._item_size)[0]
+
+    def __setitem__(self, index, value):
+        struct.pack_into(self._code, self._buffer, index * self._item_size,
+                         value)
+
+
+class _Ring:
+    """!
+    @brief   The parts of the queues which are the same for every type.
+    @details One should not create an object of this class; use one of its
+             child classes, which allocate the memory for the items in
+             @c _data and a view of it in @c _view.
+    """
+
+    ## The number of elements of @c _view which make up one item
+    _scale = 1
+
+    def clear(self):
+        """!
+        @brief   Empty the queue.
+        @details The pointers used to access data in the queue are reset to
+                 their empty positions. The contents of the memory are not
+                 changed and no new memory is allocated.
+        """
+        self._write_idx = 0
+        self._read_idx = 0
+        self._num_items = 0
+        self._max_full = 0
+
+    @micropython.native
+    def any(self):
+        """!
+        @brief   Checks if there are any items available in the queue.
+        @returns @c True if there is at least one item in the queue
+        """
+        return self._num_items > 0
+
+    @micropython.native
+    def available(self):
+        """!
+        @brief   Checks how many items are available to be read.
+        @returns The number of items in the queue
+        """
+        return self._num_items
+
+    @micropython.native
+    def full(self):
+        """!
+        @brief   Check whether the queue is currently full.
+        @returns @c True if writing an item would overwrite the oldest one
+        """
+        return self._num_items >= self._size
+
+    def max_full(self):
+        """!
+        @brief   Get the maximum number of unread items that have been in
+                 the queue since it was created or cleared.
+        @returns The maximum number of items that have been in the queue
+        """
+        return self._max_full
+
+    def put_from(self, buffer, start=0, count=None):
+        """!
+        @brief   Put a block of items from a buffer into the queue.
+        @details If there isn't room for all the items, the oldest ones are
+                 overwritten, just as if they had been put in one at a time.
+        @param   buffer An @c array, @c bytearray or @c memoryview holding
+                 the items
+        @param   start The index in the buffer of the first item to put in
+        @param   count The number of items to put in, by default all those
+                 from @c start to the end of the buffer
+        @returns The number of items put into the queue
+        """
+        items = self._items(buffer)
+        count = _block(items, start, count, self._scale)
+        return self._put_block(items, start, count)
+
+    def get_into(self, buffer, start=0, count=None):
+        """!
+        @brief   Get as many items as are available, up to a limit, from the
+                 queue into a buffer.
+        @param   buffer A writable @c array, @c bytearray or @c memoryview
+        @param   start The index in the buffer at which to put the first item
+        @param   count The largest number of items to get, by default enough
+                 to fill the buffer from @c start to the end
+        @returns The number of items gotten from the queue
+        """
+        items = self._items(buffer)
+        k = self._scale
+        count = min(_block(items, start, count, k), self._num_items)
+        first = min(count, self._size - self._read_idx)
+        _copy(items, start * k, self._view, self._read_idx * k, first * k)
+        if count > first:
+            _copy(items, (start + first) * k, self._view, 0,
+                  (count - first) * k)
+        self._read_idx = (self._read_idx + count) % self._size
+        self._num_items -= count
+        return count
+
+    def _put_block(self, items, start, count):
+        """!
+        @brief   Put a block of items into the queue in at most two slices,
+                 overwriting the oldest items if there isn't room.
+        @param   items A sequence of items of the queue's type
+        @param   start The index of the first item to put in
+        @param   count The number of items to put in
+        @returns The number of items put in
+        """
+        size = self._size
+        putted = count
+        overwritten = self._num_items + count - size
+
+        # If there are more items than fit, only the last ones are kept, but
+        # the pointers move as if every item had been written
+        if count > size:
+            start += count - size
+            self._write_idx = (self._write_idx + count - size) % size
+            count = size
+
+        k = self._scale
+        first = min(count, size - self._write_idx)
+        _copy(self._view, self._write_idx * k, items, start * k, first * k)
+        if count > first:
+            _copy(self._view, 0, items, (start + first) * k,
+                  (count - first) * k)
+        self._write_idx = (self._write_idx + count) % size
+
+        if overwritten > 0:
+            self._read_idx = (self._read_idx + overwritten) % size
+            self._num_items = size
+        else:
+            self._num_items += count
+        if self._num_items > self._max_full:
+            self._max_full = self._num_items
+        return putted
+
+
+def _block(items, start, count, scale):
+    """!
+    @brief   Check that a block of items lies within a buffer.
+    @param   items The items in the buffer
+    @param   start The index of the first item in the block
+    @param   count The number of items in the block, or @c None for all the
+             items from @c start to the end of the buffer
+    @param   scale The number of elements of the buffer in each item
+    @returns The number of items in the block
+    """
+    num_items = len(items) // scale
+    if count is None:
+        count = num_items - start
+    if start < 0 or count < 0 or start + count > num_items:
+        raise ValueError("Block is outside the buffer")
+    return count
+
+
+def _copy(dest, dest_start, src, src_start, count):
+    """!
+    @brief   Copy items from one buffer to another, in one slice if the two
+             buffers hold the same type, or else one item at a time.
+    """
+    if count <= 0:
+        return
+    try:
+        dest[dest_start:dest_start + count] = src[src_start:src_start + count]
+    except (TypeError, ValueError, NotImplementedError):
+        for index in range(count):
+            dest[dest_start + index] = src[src_start + index]
+
+
+class _NumQueue(_Ring):
+    """!
+    @brief   The parts of @c IntQueue and @c FloatQueue which are the same.
+    @details One should not create an object of this class; use one of its
+             child classes, which each give the type code used to store
+             their items.
+    """
+
+    ## The @c array type code used to store items
+    _TYPE_CODE = None
+
+    def __init__(self, size):
+        """!
+        @brief   Create a queue and allocate memory for its items.
+        @param   size The maximum number of items that the queue can hold
+        """
+        self._size = size
+        self._data = array.array(self._TYPE_CODE, (0 for n in range(size)))
+        self._view = memoryview(self._data)
+        self.clear()
+
+    @micropython.native
+    def put(self, data):
+        """!
+        @brief   Put an item into the queue.
+        @details If the queue is already full, the oldest data will be
+                 overwritten.
+        @param   data The item to be put into the back of the queue
+        """
+        self._data[self._write_idx] = data
+        self._write_idx += 1
+        if self._write_idx >= self._size:
+            self._write_idx = 0
+
+        # If the queue was full before writing, move the read pointer so
+        # we'll read old data, not new data
+        if self._num_items >= self._size:
+            self._read_idx += 1
+            if self._read_idx >= self._size:
+                self._read_idx = 0
+        else:
+            self._num_items += 1
+            if self._num_items > self._max_full:
+                self._max_full = self._num_items
+
+    @micropython.native
+    def get(self):
+        """!
+        @brief   Get an item from the queue if one is available.
+        @returns The oldest item in the queue, or @c None if the queue is
+                 empty
+        """
+        if self._num_items == 0:
+            return None
+
+        to_return = self._data[self._read_idx]
+        self._read_idx += 1
+        if self._read_idx >= self._size:
+            self._read_idx = 0
+        self._num_items -= 1
+        return to_return
+
+    def _items(self, buffer):
+        """!
+        @brief   Get the items in a buffer, for @c put_from() or
+                 @c get_into().
+        @details A buffer of bytes is taken to hold items of the queue's
+                 type, as the C queues take it; a buffer of any other type
+                 must hold 32 bit integers for an @c IntQueue or single
+                 precision floats for a @c FloatQueue.
+        @returns A sequence of the buffer's items
+        """
+        code = getattr(buffer, 'typecode', None) \
+            or getattr(buffer, 'format', None)
+        if isinstance(buffer, (bytes, bytearray)) or code in ('B', 'b', 'c'):
+            view = memoryview(buffer)
+            try:
+                whole = len(view) - len(view) % self._data.itemsize
+                return view[:whole].cast(self._TYPE_CODE)
+            except AttributeError:          # MicroPython can't cast views
+                return _RawItems(buffer, self._TYPE_CODE)
+        if code is not None and (
+                struct.calcsize(code) != struct.calcsize(self._TYPE_CODE)
+                or (code == 'f') != (self._TYPE_CODE == 'f')):
+            raise TypeError("Buffer type doesn't match queue")
+        try:
+            return memoryview(buffer)
+        except TypeError:
+            return buffer
+
+    def __repr__(self):
+        return (type(self).__name__ + '[' + str(self._size) + ']:'
+                + ''.join(repr(item) + ',' for item in self._data)
+                + 'W:' + str(self._write_idx) + ',R:' + str(self._read_idx))
+
+
+class IntQueue(_NumQueue):
+    """!
+    @brief   A pre-allocated queue of 32 bit signed integers.
+    @details This works the same way as @c cqueue.IntQueue. Putting a float,
+             or an integer too big to fit in 32 bits, raises an exception.
+    """
+
+    _TYPE_CODE = 'i'
+
+
+class FloatQueue(_NumQueue):
+    """!
+    @brief   A pre-allocated queue of single precision floats.
+    @details This works the same way as @c cqueue.FloatQueue. Integers which
+             are put into the queue come out as floats.
+    """
+
+    _TYPE_CODE = 'f'
+
+
+class ByteQueue(_Ring):
+    """!
+    @brief   A pre-allocated queue of characters.
+    @details This works the same way as @c cqueue.ByteQueue. Either bytes or
+             strings may be put into the queue, and single bytes are gotten
+             out. A string is stored as its UTF-8 bytes.
+    """
+
+    def __init__(self, size):
+        """!
+        @brief   Create a queue and allocate memory for its characters.
+        @param   size The maximum number of bytes that the queue can hold
+        """
+        self._size = size
+        self._data = bytearray(size)
+        self._view = memoryview(self._data)
+        self.clear()
+
+    def put(self, data):
+        """!
+        @brief   Put a character or string into the queue.
+        @details If there isn't room for all the characters, the oldest ones
+                 are overwritten. The characters are copied in at most two
+                 blocks rather than one at a time.
+        @param   data A @c bytes object or string to be put into the queue
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        elif not isinstance(data, bytes):
+            raise TypeError("Bytes or string required")
+
+        self._put_block(memoryview(data), 0, len(data))
+
+    @micropython.native
+    def get(self):
+        """!
+        @brief   Get a character from the queue if one is available.
+        @returns The oldest character in the queue as a one byte @c bytes
+                 object, or @c None if the queue is empty
+        """
+        if self._num_items == 0:
+            return None
+
+        to_return = bytes((self._data[self._read_idx],))
+        self._read_idx += 1
+        if self._read_idx >= self._size:
+            self._read_idx = 0
+        self._num_items -= 1
+        return to_return
+
+    def _items(self, buffer):
+        """!
+        @brief   Get the bytes in a buffer, for @c put_from() or
+                 @c get_into(). Buffers of larger items are refused.
+        @returns A view of the buffer's bytes
+        """
+        code = getattr(buffer, 'typecode', None) \
+            or getattr(buffer, 'format', None)
+        if code is not None and code not in ('B', 'b', 'c'):
+            raise TypeError("Buffer type doesn't match queue")
+        return memoryview(buffer)
+
+    def __repr__(self):
+        chars = ''.join(chr(byte) if 31 < byte < 127 else '\\x%02x' % byte
+                        for byte in self._data)
+        return ('ByteQueue[' + str(self._size) + "]:b'" + chars + "' W:"
+                + str(self._write_idx) + ', R:' + str(self._read_idx))
+
+
+class StructQueue(_Ring):
+    """!
+    @brief   A pre-allocated queue of records packed by @c struct.
+    @details This works the same way as @c cqueue.StructQueue. Each record
+             holds several values whose types are given by a @c struct
+             format, such as @c '<hLf' for an int16 position, a uint32 time
+             stamp and a float duty cycle. All of a record goes into the
+             queue or comes out together, so values which belong together
+             can't get out of step. Strings and padding aren't supported in
+             the format.
+    """
+
+    def __init__(self, format, size):
+        """!
+        @brief   Create a queue and allocate memory for its records.
+        @param   format A @c struct format string for one record
+        @param   size The maximum number of records that the queue can hold
+        """
+        if not isinstance(format, str):
+            raise TypeError("Format string required")
+        for code in ('s', 'x', 'P'):
+            if code in format:
+                raise ValueError("Unsupported format code")
+        self._format = format
+        self._rec_size = struct.calcsize(format)
+        self._num_fields = len(struct.unpack(format, bytes(self._rec_size)))
+        self._size = size
+        self._scale = self._rec_size
+        self._data = bytearray(self._rec_size * size)
+        self._view = memoryview(self._data)
+        self._scratch = bytearray(self._rec_size)
+        self._scratch_view = memoryview(self._scratch)
+        self.clear()
+
+    def put(self, *values):
+        """!
+        @brief   Put a record into the queue.
+        @details If the queue is already full, the oldest record will be
+                 overwritten. If a value is of the wrong type, an exception
+                 is raised and the queue isn't changed.
+        @param   values The values in the record, in the order given by the
+                 format
+        """
+        if len(values) != self._num_fields:
+            raise TypeError("Wrong number of values")
+        # The record is packed into a scratch buffer first, so a bad value
+        # is found before anything in the queue is changed
+        struct.pack_into(self._format, self._scratch, 0, *values)
+        self._put_block(self._scratch_view, 0, 1)
+
+    def get(self):
+        """!
+        @brief   Get a record from the queue if one is available.
+        @returns A tuple holding the values in the oldest record, or @c None
+                 if the queue is empty
+        """
+        if self._num_items == 0:
+            return None
+
+        to_return = struct.unpack_from(self._format, self._data,
+                                       self._read_idx * self._rec_size)
+        self._read_idx += 1
+        if self._read_idx >= self._size:
+            self._read_idx = 0
+        self._num_items -= 1
+        return to_return
+
+    def record_size(self):
+        """!
+        @brief   Get the size of one record in bytes, which is needed to make
+                 a buffer for @c get_into() and to unpack what it gets.
+        @returns The size of a record in bytes
+        """
+        return self._rec_size
+
+    def _items(self, buffer):
+        """!
+        @brief   Get the bytes in a buffer, for @c put_from() or
+                 @c get_into(), in which records are counted by their size
+                 in bytes.
+        @returns A view of the buffer's bytes
+        """
+        code = getattr(buffer, 'typecode', None) \
+            or getattr(buffer, 'format', None)
+        if code is not None and code not in ('B', 'b', 'c'):
+            raise TypeError("Buffer type doesn't match queue")
+        return memoryview(buffer)
+
+    def __repr__(self):
+        return ('StructQueue[' + str(self._size) + ']:' + repr(self._format)
+                + ' W:' + str(self._write_idx) + ', R:' + str(self._read_idx))
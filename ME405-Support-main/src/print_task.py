@@ -1,11 +1,23 @@
 ## @file print_task.py
-#  This file contains code for a task which prints things from a queue. It helps
-#  to reduce latency in a system having tasks which print because it sends
-#  things to be printed out the serial port one character at a time, even when
-#  other tasks put whole strings into the queue at once. When run as a
-#  low-priority task, this allows higher priority tasks to interrupt the
-#  printing between characters, even when all the tasks are being cooperatively
-#  scheduled with a priority-based scheduler. 
+#  This file contains code for a task which prints things from a buffer. It
+#  helps to reduce latency in a system having tasks which print, because the
+#  tasks only copy what they print into a ring buffer, which takes little
+#  time and never blocks; a low priority task then sends the buffer's
+#  contents out the serial port a chunk at a time, with one call to the
+#  stream's @c write() for each chunk of up to @c PT_CHUNK_SIZE bytes. Higher
+#  priority tasks can run between chunks, even when all the tasks are being
+#  cooperatively scheduled with a priority-based scheduler.
+#
+#  Numbers are printed with @c put_int() and @c put_float(), which write
+#  their digits straight into the buffer rather than making a string with an
+#  f-string or @c format() first. Integers and bytes are printed without
+#  allocating any memory; see @c put_float() for floats. If there isn't room
+#  in the buffer for something, the whole thing is dropped and counted, so
+#  lines which do get printed are never cut short.
+#
+#  Older versions of this module kept the text in a @c task_share.Queue
+#  called @c print_queue. There is no such queue now; code which looked at
+#  @c print_queue.num_in() should call @c num_in() instead.
 #
 #  Example code:
 #  @code
@@ -13,14 +25,16 @@
 #  import print_task
 # 
 #  # In the main module or wherever tasks are created:
-#  print_task = cotask.Task (print_task_function, name = 'Printing', 
-#                           priority = 0, profile = True)
-#  cotask.task_list.append (print_task)
+#  cotask.task_list.append (print_task.print_task)
 # 
 #  # In a task which needs to print something:
-#  print_queue.put ("This is a string")
-#  print_queue.put_bytes (bytearray ("A bytearray"))
-#  print_queue.put ("A number: {:d}\r\n".format (number))
+#  print_task.put ("This is a string")
+#  print_task.put_bytes (b"Bytes are copied as a block")
+#  print_task.put (b"Position: ")
+#  print_task.put_int (position, 6)
+#  print_task.put (b"  Duty: ")
+#  print_task.put_float (duty, 1)
+#  print_task.put (b"\r\n")
 #  @endcode
 # 
 #  @copyright This program is copyright (c) 2018-2023 by JR Ridgely and
@@ -39,9 +53,9 @@
 #  ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 #  POSSIBILITY OF SUCH DAMAGE.
 
-# import pyb
+import sys
+import micropython
 import cotask
-import task_share
 from micropython import const
 
 
@@ -49,74 +63,330 @@ from micropython import const
 #  print task has time to print them. 
 PT_BUF_SIZE = const (1000)
 
+## The largest number of bytes the print task writes each time it runs.
+PT_CHUNK_SIZE = const (64)
+
+## Powers of ten for the number of places after the decimal point which
+#  @c put_float() can print.
+_POW10 = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+## The ring buffer holding characters waiting to be printed, and a view of it
+#  used to copy blocks in and out of it.
+_buffer = bytearray (PT_BUF_SIZE)
+_view = memoryview (_buffer)
+
+## Scratch space in which @c put_int() and @c put_float() build numbers from
+#  the last digit to the first, before copying them into the ring buffer.
+_digits = bytearray (32)
+
+## Integers this large or larger, either way from zero, have too many digits
+#  to fit in @c _digits with a minus sign, so @c put_int() formats them as a
+#  string instead.
+_INT_LIMIT = 10 ** 31
+
+## The index in the ring buffer where the next byte will be written
+_wr_idx = 0
+
+## The index in the ring buffer of the next byte to be printed
+_rd_idx = 0
+
+## The number of bytes in the ring buffer waiting to be printed
+_num_in = 0
+
+## The number of bytes dropped because there wasn't room for them
+_dropped = 0
+
+## The stream to which the print task writes, or @c None to use
+#  @c sys.stdout
+_stream = None
+
+
+## Choose the stream to which the print task writes, such as a @c pyb.UART
+#  or @c pyb.USB_VCP. By default the print task writes to the byte stream
+#  underneath @c sys.stdout.
+#  @param stream An object with a @c write() method which takes bytes, or
+#         @c None to go back to @c sys.stdout
+def set_stream (stream):
+    global _stream
+    _stream = stream
+
+
+## Get the number of bytes waiting to be printed.
+#  @return The number of bytes in the print buffer
+def num_in ():
+    return _num_in
+
+
+## Get the number of bytes which have been dropped since the print task
+#  module was imported because the print buffer was too full to hold them.
+#  @return The number of bytes which were not printed
+def dropped ():
+    return _dropped
+
+
+## Make room for some bytes in the ring buffer. If there is room, the bytes
+#  are counted as being in the buffer and the index at which they should be
+#  written is returned; if not, they're counted as dropped.
+#  @param count The number of bytes which are to be written
+#  @return The index at which to write the first byte, or -1 if there's no
+#          room
+@micropython.native
+def _reserve (count):
+    global _wr_idx, _num_in, _dropped
+    if count > PT_BUF_SIZE - _num_in:
+        _dropped += count
+        return -1
+    index = _wr_idx
+    _wr_idx = (index + count) % PT_BUF_SIZE
+    _num_in += count
+    print_task.go ()
+    return index
+
 
-## Put a string into the print queue so it can be printed by the printing 
-#  task whenever that task gets a chance. If the print queue is full, 
-#  characters are lost; this is better than blocking to wait for space in the
-#  queue, as we'd block the printing task and space would never open up. When 
-#  a character has been put into the queue, the @c go() method of the print 
-#  task is called so that the run method will be called as soon as the print 
-#  task is run by the task scheduler. 
-#  @param a_string A string to be put into the queue
+## Put a string into the print buffer so it can be printed by the printing 
+#  task whenever that task gets a chance. If there isn't room in the buffer
+#  for the whole string, it is dropped; this is better than blocking to wait
+#  for space, as we'd block the printing task and space would never open up.
+#  The @c go() method of the print task is called so that it will run as
+#  soon as the task scheduler gets to it. A @c bytes object such as
+#  @c b"Speed: " is copied as a block, without allocating memory, so it's
+#  the quickest thing to print; a string is encoded as UTF-8 one character
+#  at a time, also without allocating memory.
+#  @param a_string A string, or bytes, to be put into the buffer
 @micropython.native
 def put (a_string):
+    if not isinstance (a_string, str):
+        put_bytes (a_string)
+        return
+
+    # Count the encoded bytes first so that room is made for all of them
+    count = 0
+    for a_ch in a_string:
+        code = ord (a_ch)
+        if code < 0x80:
+            count += 1
+        elif code < 0x800:
+            count += 2
+        elif code < 0x10000:
+            count += 3
+        else:
+            count += 4
+    index = _reserve (count)
+    if index < 0:
+        return
     for a_ch in a_string:
-        print_task.go ()
-#         if not print_queue.full ():
-#             print_queue.put (ord (a_ch))
-#             print_task.go ()
+        code = ord (a_ch)
+        if code < 0x80:
+            index = _put_byte (index, code)
+        elif code < 0x800:
+            index = _put_byte (index, 0xC0 | code >> 6)
+            index = _put_byte (index, 0x80 | code & 0x3F)
+        elif code < 0x10000:
+            index = _put_byte (index, 0xE0 | code >> 12)
+            index = _put_byte (index, 0x80 | code >> 6 & 0x3F)
+            index = _put_byte (index, 0x80 | code & 0x3F)
+        else:
+            index = _put_byte (index, 0xF0 | code >> 18)
+            index = _put_byte (index, 0x80 | code >> 12 & 0x3F)
+            index = _put_byte (index, 0x80 | code >> 6 & 0x3F)
+            index = _put_byte (index, 0x80 | code & 0x3F)
+
+
+## Write one byte into space in the ring buffer which has been reserved.
+#  @param index The index in the ring buffer at which to write the byte
+#  @param a_byte The byte to be written
+#  @return The index at which the next byte should be written
+@micropython.native
+def _put_byte (index, a_byte):
+    _buffer[index] = a_byte
+    index += 1
+    if index == PT_BUF_SIZE:
+        index = 0
+    return index
 
 
-## Put bytes from a @c bytearray or @c bytes into the print queue. When 
-#  characters have been put into the queue, the @c go() method of the print
-#  task is called so that the run method will be called as soon as the print 
-#  task is run by the task scheduler. 
-#  @param b_arr The bytearray whose contents go into the queue
+## Put bytes from a @c bytearray or @c bytes into the print buffer. The bytes
+#  are copied into the buffer in at most two blocks, one up to the end of the
+#  buffer and one from its beginning; if there isn't room for all of them,
+#  they are all dropped.
+#  @param b_arr The bytearray whose contents go into the buffer
 @micropython.native
 def put_bytes (b_arr):
+    count = len (b_arr)
+    index = _reserve (count)
+    if index < 0:
+        return
+    first = PT_BUF_SIZE - index
+    if first > count:
+        first = count
+    source = memoryview (b_arr)
+    _view[index:index + first] = source[0:first]
+    if count > first:
+        _view[0:count - first] = source[first:count]
 
-    for byte in b_arr:
-        if not print_queue.full ():
-            print_queue.put (byte)
-            print_task.go ()
+
+## Copy the number which has been built at the end of @c _digits into the
+#  print buffer, padded with spaces in front to the given width.
+#  @param first The index in @c _digits of the number's first character
+#  @param width The smallest number of characters to print
+@micropython.native
+def _put_digits (first, width):
+    length = len (_digits) - first
+    pad = width - length
+    if pad < 0:
+        pad = 0
+    index = _reserve (pad + length)
+    if index < 0:
+        return
+    for count in range (pad):
+        _buffer[index] = 32             # A space
+        index += 1
+        if index == PT_BUF_SIZE:
+            index = 0
+    for place in range (first, len (_digits)):
+        _buffer[index] = _digits[place]
+        index += 1
+        if index == PT_BUF_SIZE:
+            index = 0
+
+
+## Write the digits of a whole number which isn't negative into @c _digits,
+#  ending just before the given index.
+#  @param value The number whose digits are written
+#  @param end The index in @c _digits after the last digit
+#  @param min_digits The least number of digits to write, with zeros in
+#         front if needed
+#  @return The index in @c _digits of the first digit
+@micropython.native
+def _fill_digits (value, end, min_digits = 1):
+    place = end
+    while value > 0 or end - place < min_digits:
+        place -= 1
+        _digits[place] = 48 + value % 10      # 48 is the character '0'
+        value //= 10
+    return place
+
+
+## Put an integer into the print buffer as decimal digits, without making a
+#  string from it first. Small integers are printed without allocating any
+#  memory. Integers with more than 31 digits don't fit in @c _digits; they
+#  are formatted as a string, which allocates memory.
+#  @param value The integer to be printed
+#  @param width The smallest number of characters to print; shorter numbers
+#         have spaces put in front of them
+@micropython.native
+def put_int (value, width = 0):
+    if not -_INT_LIMIT < value < _INT_LIMIT:
+        text = str (value)
+        put (" " * (width - len (text)) + text)
+        return
+    first = _fill_digits (-value if value < 0 else value, len (_digits))
+    if value < 0:
+        first -= 1
+        _digits[first] = 45             # A minus sign
+    _put_digits (first, width)
+
+
+## Put a floating point number into the print buffer with a fixed number of
+#  places after the decimal point, like @c "{:.2f}" but without making a
+#  string from it first; the last digit is rounded to the nearest, with
+#  halves rounded away from zero. The number is scaled to an integer
+#  and its digits are written as by @c put_int(); on ports where floats are
+#  kept on the heap, the scaling makes one temporary float, which is still
+#  much less than @c format() or an f-string allocates. Numbers of 1e18 or
+#  more, which with six places would need more digits than @c _digits
+#  holds, infinities and NaN's are printed as @c "inf", @c "-inf" and
+#  @c "nan".
+#  @param value The number to be printed
+#  @param places The number of digits after the decimal point, from 0 to 6
+#  @param width The smallest number of characters to print; shorter numbers
+#         have spaces put in front of them
+@micropython.native
+def put_float (value, places = 2, width = 0):
+    scale = _POW10[places]
+    negative = value < 0
+    if negative:
+        value = -value
+    if not value < 1e18:                # True for infinity and NaN
+        if value != value:
+            _put_special (b"nan", width)
+        else:
+            _put_special (b"-inf" if negative else b"inf", width)
+        return
+    scaled = int (value * scale + 0.5)
+    end = len (_digits)
+    if places > 0:
+        end = _fill_digits (scaled % scale, end, places) - 1
+        _digits[end] = 46               # A decimal point
+    first = _fill_digits (scaled // scale, end)
+    if negative and scaled > 0:
+        first -= 1
+        _digits[first] = 45
+    _put_digits (first, width)
+
+
+## Put a short word, such as @c "nan", into the print buffer padded to a
+#  width as a number would be.
+#  @param word The bytes to be printed
+#  @param width The smallest number of characters to print
+def _put_special (word, width):
+    first = len (_digits) - len (word)
+    _digits[first:] = word
+    _put_digits (first, width)
 
 
-## Task function for the task which prints stuff. This function checks for
-#  any characters to be printed in the queue; if any characters are found 
-#  then one character is printed, after which the print task yields so other 
-#  tasks can run. This function must be called periodically; the normal way 
-#  is to make it the run function of a low priority task in a cooperatively 
-#  multitasked system so that the task scheduler calls this function when 
-#  the higher priority tasks don't need to run.
+## Task function for the task which prints stuff. Each time it runs, this
+#  function writes the bytes waiting in the print buffer to the stream in one
+#  call to the stream's @c write() method, up to @c PT_CHUNK_SIZE bytes and
+#  up to the end of the ring buffer; if more bytes are waiting, it tells the
+#  task to run again as soon as possible. Only as many bytes as @c write()
+#  says it wrote are taken from the buffer; the rest are sent next time. A
+#  stream which returns @c None, as a UART does when it times out, is taken
+#  to have written nothing. This function must be called
+#  periodically; the normal way is to make it the run function of a low
+#  priority task in a cooperatively multitasked system so that the task
+#  scheduler calls this function when the higher priority tasks don't need
+#  to run.
 def print_task_function ():
+    global _rd_idx, _num_in
 
     while True:
-        # If there's a character in the queue, print it
-        if print_queue.any ():
-            print (chr (print_queue.get ()), end = '')
+        count = _num_in
+        if count > 0:
+            if count > PT_CHUNK_SIZE:
+                count = PT_CHUNK_SIZE
+            if count > PT_BUF_SIZE - _rd_idx:
+                count = PT_BUF_SIZE - _rd_idx
+            stream = _stream
+            if stream is None:
+                stream = getattr (sys.stdout, "buffer", sys.stdout)
+            written = stream.write (_view[_rd_idx:_rd_idx + count])
+            if written is None:
+                written = 0
+            elif written > count:
+                written = count
+            _rd_idx = (_rd_idx + written) % PT_BUF_SIZE
+            _num_in -= written
 
-        # If there's another character, tell this task to run again ASAP
-        if print_queue.any ():
+        # If there's more to print, tell this task to run again ASAP
+        if _num_in > 0:
             print_task.go ()
 
         yield 0
 
 
-## This queue holds characters to be printed when the print task gets around
-#  to it. It is always created when print_task is imported as a module.
-global print_queue
-print_queue = task_share.Queue ('B', PT_BUF_SIZE, name = "Print Queue", 
-                                thread_protect = False, overwrite = False)
+## The task which prints things from the print buffer. It is always created
+#  when print_task is imported as a module; add it to the task list to have
+#  it run.
+print_task = cotask.Task (print_task_function, name = "Print Task",
+                          priority = 0, profile = True)
 
 
 ## @cond DO_NOT_DOXY_THIS
 # This test code is only run when this file is used as the main file; it isn't
 # run when the file is imported as a module
 if __name__ == "__main__":
-    import utime
     import task_share
-    from micropython import const
-    from pyb import USB_VCP
 
     print ("Testing print_task")
 
@@ -127,7 +397,9 @@ if __name__ == "__main__":
         counter = 0
         while True:
             counter += 1
-            put (f"The current value of the first counter: {counter}\r\n")
+            put (b"The current value of the first counter: ")
+            put_int (counter)
+            put (b"\r\n")
             yield 0
 
     def print_direct_task_fun ():
@@ -146,8 +418,6 @@ if __name__ == "__main__":
                           priority = 2, period = 1000, profile = True)
     task_2 = cotask.Task (print_direct_task_fun, name = "Print Directly",
                           priority = 2, period = 1000, profile = True)
-    print_task = cotask.Task (print_task_function, name = "Print Task", 
-                              priority = 0, profile = True)
     cotask.task_list.append (task_1)
     cotask.task_list.append (task_2)
     cotask.task_list.append (print_task)
@@ -162,6 +432,7 @@ if __name__ == "__main__":
     # Print a table of task data and a table of shared information data
     print ('\n' + str (cotask.task_list))
     print (task_share.show_all ())
+    print (f"Print buffer: {num_in ()} bytes waiting, {dropped ()} dropped")
     print ('\r\n')
 
 ## @endcond
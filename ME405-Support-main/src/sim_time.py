@@ -0,0 +1,368 @@
+"""!
+@file sim_time.py
+This file contains stand-ins for the MicroPython @c utime and @c micropython
+modules so that scheduler code such as @c cotask.py and @c task_share.py can
+be run, tested and benchmarked under regular Python on a PC. Time is kept by
+a simulated clock which only moves when somebody tells it to, so scheduler
+behavior is exactly repeatable from one run to the next.
+
+This file is @b not meant to be copied to a microcontroller.
+
+@b Example:
+@code
+import sim_time
+clock = sim_time.install ()     # Must happen before cotask is imported
+import cotask
+# ... create tasks, then run the scheduler, moving time along by hand
+while clock.now < 1_000_000:
+    cotask.task_list.pri_sched ()
+    clock.advance (10)
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+
+It is intended for educational use only, but its use is not limited thereto.
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS" AND
+ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR
+ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+(INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON
+ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+(INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+
+import sys
+import time
+import types
+
+## The number of distinct values held by MicroPython's @c ticks_xx() timers.
+#  On the STM32 port the tick counters wrap around at 2**30.
+TICKS_PERIOD = 1 << 30
+
+## A bit mask used to wrap tick counts around as MicroPython does
+TICKS_MAX = TICKS_PERIOD - 1
+
+## Half the tick period, used to compute signed tick differences
+TICKS_HALF = TICKS_PERIOD // 2
+
+
+class SimClock:
+    """!
+    A simulated microsecond clock which behaves like the @c utime tick
+    functions. Time only advances when @c advance() or @c sleep_us() is
+    called, or by @c read_cost microseconds each time @c ticks_us() is read.
+    The read cost is a crude model of the time a real CPU spends checking
+    the time; setting it to zero makes clock reads free.
+    """
+
+    def __init__ (self, start_us=0, read_cost=0):
+        """!
+        Create a simulated clock.
+        @param start_us The time in microseconds at which the clock starts
+        @param read_cost The number of microseconds by which each call to
+               @c ticks_us() advances the clock
+        """
+        ## The current time in microseconds. This number does not wrap.
+        self.now = start_us
+
+        ## Number of microseconds added to the time by each @c ticks_us()
+        self.read_cost = read_cost
+
+        ## How many times @c ticks_us() has been called
+        self.reads = 0
+
+
+    def advance (self, us):
+        """!
+        Move the clock forward by the given number of microseconds.
+        @param us How far to move the time forward, in microseconds
+        """
+        self.now += int (us)
+
+
+    def ticks_us (self):
+        """!
+        Get the time in microseconds, wrapped as @c utime.ticks_us() does.
+        @returns The wrapped time in microseconds
+        """
+        self.reads += 1
+        self.now += self.read_cost
+        return self.now & TICKS_MAX
+
+
+    def ticks_ms (self):
+        """!
+        Get the time in milliseconds, wrapped as @c utime.ticks_ms() does.
+        @returns The wrapped time in milliseconds
+        """
+        return (self.now // 1000) & TICKS_MAX
+
+
+    @staticmethod
+    def ticks_diff (ticks1, ticks2):
+        """!
+        Compute the signed difference between two wrapped tick values.
+        @param ticks1 The later time
+        @param ticks2 The earlier time
+        @returns @c ticks1 - @c ticks2, allowing for wraparound
+        """
+        return ((ticks1 - ticks2 + TICKS_HALF) & TICKS_MAX) - TICKS_HALF
+
+
+    @staticmethod
+    def ticks_add (ticks, delta):
+        """!
+        Add an offset to a wrapped tick value.
+        @param ticks A time from @c ticks_us() or @c ticks_ms()
+        @param delta The number of ticks to add, which may be negative
+        @returns The wrapped sum
+        """
+        return (ticks + delta) & TICKS_MAX
+
+
+    def sleep_us (self, us):
+        """!
+        Sleep by moving the clock forward.
+        @param us The number of microseconds to sleep
+        """
+        if us > 0:
+            self.now += int (us)
+
+
+    def sleep_ms (self, ms):
+        """!
+        Sleep by moving the clock forward.
+        @param ms The number of milliseconds to sleep
+        """
+        self.sleep_us (ms * 1000)
+
+
+class VirtualClock (SimClock):
+    """!
+    A simulated clock which charges each run of a task for the time it would
+    take on the microcontroller, so a whole control run can be replayed on a
+    PC in a tiny fraction of the real time. Each task's cost can be declared
+    in microseconds, which makes the results exactly the same every time, or
+    measured by timing the task's code on the PC and multiplying by a scale
+    factor, which is more realistic but not exactly repeatable. Time during
+    which no task is ready is skipped over.
+
+    @b Example:
+    @code
+    clock = sim_time.VirtualClock (pass_cost=5)
+    clock.attach (cotask.task_list, costs={"Task_1" : 400, "Task_3" : 300})
+    clock.run (cotask.task_list, 10 * 60 * 1_000_000)   # Ten minutes
+    print (cotask.task_list)
+    @endcode
+    """
+
+    def __init__ (self, start_us=0, read_cost=0, pass_cost=0, default_cost=0,
+                  scale=None):
+        """!
+        Create a virtual clock.
+        @param start_us The time in microseconds at which the clock starts
+        @param read_cost Microseconds added to the time by each clock reading
+        @param pass_cost Microseconds taken by each pass through the scheduler
+        @param default_cost Microseconds charged for each run of a task whose
+               cost hasn't been declared
+        @param scale If not @c None, tasks whose cost isn't declared are
+               charged the time their code takes on the PC times this factor
+               instead of @c default_cost
+        """
+        super ().__init__ (start_us, read_cost)
+        self.pass_cost = pass_cost
+        self.default_cost = default_cost
+        self.scale = scale
+        self._ran = False
+
+
+    def attach (self, task_list, costs=None):
+        """!
+        Make the tasks in a task list run on this clock. Each task's code is
+        wrapped so that every run moves the clock forward by the task's cost,
+        this clock is given to @c cotask.set_clock(), and the tasks' schedules
+        are restarted from this clock's time.
+        @param task_list The @c cotask.TaskList holding the tasks
+        @param costs A dictionary of task names and run costs in microseconds
+        """
+        import cotask
+        costs = costs or {}
+        for pri in task_list.pri_list:
+            for task in pri[2:]:
+                task._run_gen = self._costed (task._run_gen,
+                                              costs.get (task.name, None))
+        cotask.set_clock (self)
+        task_list.restart ()
+
+
+    def _costed (self, gen, cost):
+        """!
+        Wrap a task's generator so that each run advances the clock.
+        @param gen The task's generator
+        @param cost The cost of each run in microseconds, or @c None to use
+               the default cost or measure the cost
+        """
+        sent = None
+        while True:
+            begin = time.perf_counter ()
+            try:
+                state = gen.send (sent)
+            except StopIteration:
+                return
+            if cost is not None:
+                self.now += cost
+            elif self.scale is not None:
+                self.now += int ((time.perf_counter () - begin)
+                                 * 1_000_000 * self.scale)
+            else:
+                self.now += self.default_cost
+            self._ran = True
+            sent = yield state
+
+
+    def run (self, task_list, duration, sched="pri_sched"):
+        """!
+        Run the scheduler until the given amount of virtual time has passed.
+        When a pass through the scheduler runs no task, the clock jumps to
+        the next time at which a task is due to run.
+        @param task_list The @c cotask.TaskList whose scheduler is run
+        @param duration How long to run, in microseconds
+        @param sched The name of the scheduler method to use
+        @returns The number of passes made through the scheduler
+        """
+        scheduler = getattr (task_list, sched)
+        end = self.now + duration
+        passes = 0
+        while self.now < end:
+            self._ran = False
+            scheduler ()
+            passes += 1
+            self.now += self.pass_cost
+            if not self._ran:
+                self.now = min (end, self._next_event (task_list))
+        return passes
+
+
+    def _next_event (self, task_list):
+        """!
+        Find the time at which the next task will be ready, assuming that no
+        task's @c go() method is called before then.
+        @param task_list The @c cotask.TaskList holding the tasks
+        @returns The time in microseconds, without wraparound
+        """
+        now = self.now & TICKS_MAX
+        soonest = None
+        for pri in task_list.pri_list:
+            for task in pri[2:]:
+                for when in (task._next_run, task._wake_at):
+                    if when is not None:
+                        wait = self.ticks_diff (when, now)
+                        if soonest is None or wait < soonest:
+                            soonest = wait
+        if soonest is None:
+            return self.now + 1000
+        return self.now + max (soonest, 0) + 1
+
+
+class FakeWDT:
+    """!
+    A stand-in for @c pyb.WDT, the hardware watchdog timer, which reads the
+    time from the simulated clock. Instead of resetting anything, it counts
+    how often it was fed and remembers whether it ever ran out of time, so
+    tests can check that a program feeds its watchdog when it should and
+    not when it shouldn't.
+    """
+
+    def __init__ (self, id=0, timeout=5000):
+        """!
+        Create and start a fake watchdog.
+        @param id The watchdog number, which is ignored
+        @param timeout The time in milliseconds after which the watchdog
+               would reset the microcontroller if not fed
+        """
+        ## The watchdog's timeout in microseconds
+        self.timeout = timeout * 1000
+
+        ## The number of times @c feed() has been called
+        self.feeds = 0
+
+        ## @c True if the watchdog has ever gone hungry past its timeout
+        self.fired = False
+
+        self._clock = sys.modules["utime"].clock
+        self._last_feed = self._clock.now
+
+
+    def feed (self):
+        """!
+        Feed the watchdog, starting its timeout over.
+        """
+        self.check ()
+        self.feeds += 1
+        self._last_feed = self._clock.now
+
+
+    def check (self):
+        """!
+        Check whether the watchdog would have reset the microcontroller.
+        @returns @c True if the time since the last feeding has ever been
+                 longer than the timeout
+        """
+        if self._clock.now - self._last_feed > self.timeout:
+            self.fired = True
+        return self.fired
+
+
+def _identity (thing):
+    """!
+    Stand-in for MicroPython decorators and @c const(), which do nothing
+    useful under regular Python.
+    """
+    return thing
+
+
+def install (clock=None):
+    """!
+    Put fake @c utime, @c micropython and (if needed) @c pyb modules into
+    @c sys.modules so that MicroPython code can be imported on a PC. This
+    function must be called before importing @c cotask or @c task_share.
+    Calling it again later switches the fake @c utime module to a new clock.
+    @param clock The simulated clock to use, or @c None to make a new one
+    @returns The simulated clock which drives the fake @c utime module
+    """
+    if clock is None:
+        clock = SimClock ()
+
+    utime = sys.modules.get ("utime")
+    if not isinstance (utime, types.ModuleType) \
+            or not getattr (utime, "_is_sim_time", False):
+        utime = types.ModuleType ("utime")
+        utime._is_sim_time = True
+        sys.modules["utime"] = utime
+    utime.clock = clock
+    for name in ("ticks_us", "ticks_ms", "ticks_diff", "ticks_add",
+                 "sleep_us", "sleep_ms"):
+        setattr (utime, name, getattr (clock, name))
+
+    if "micropython" not in sys.modules:
+        upy = types.ModuleType ("micropython")
+        upy.native = _identity
+        upy.viper = _identity
+        upy.const = _identity
+        upy.alloc_emergency_exception_buf = lambda size: None
+        sys.modules["micropython"] = upy
+
+    if "pyb" not in sys.modules:
+        pyb = types.ModuleType ("pyb")
+        pyb.disable_irq = lambda: True
+        pyb.enable_irq = lambda state=True: None
+        pyb.wfi = lambda: None
+        pyb.WDT = FakeWDT
+        sys.modules["pyb"] = pyb
+
+    return clock
@@ -23,7 +23,9 @@
 
 import array
 import gc
+import struct
 import pyb
+import utime
 import micropython
 
 
@@ -31,6 +33,10 @@ import micropython
 #  used to create diagnostic printouts. 
 share_list = []
 
+## The value returned by @c Queue.try_get() when there's nothing to get. It
+#  can't be mistaken for an item, since queues only hold numbers.
+NO_DATA = None
+
 ## This dictionary allows readable printouts of queue and share data types.
 type_code_strings = {'b' : "int8",   'B' : "uint8",
                      'h' : "int16",  'H' : "uint16",
@@ -48,6 +54,79 @@ def show_all ():
     return '\n'.join (gen)
 
 
+## Make a list of dictionaries holding statistics about each queue and share
+#  in the system, for a program on a PC which needs the numbers rather than
+#  a printout. Queues give the numbers from @c Queue.stats(); shares give
+#  their name and type. The list can be sent to a PC as JSON text:
+#  @code
+#  import json
+#  print (json.dumps (task_share.stats_all ()))
+#  @endcode
+#  @return A list holding one dictionary for each queue and share
+def stats_all ():
+    return [item.stats () for item in share_list]
+
+
+## Check the start and count of a block of items against the length of the
+#  sequence which holds them. This is done before interrupts are turned off,
+#  so that a bad index can't leave them off.
+#  @param length The number of items in the sequence
+#  @param start The index of the first item in the block
+#  @param count The number of items asked for, or @c None for all of them
+#         from @c start to the end
+#  @return The number of items in the block, cut down to fit if needed
+def _block_count (length, start, count):
+    if start < 0 or start > length:
+        raise IndexError ("Start index out of range")
+    if count is None or count > length - start:
+        return length - start
+    return count if count > 0 else 0
+
+
+## Get a memoryview through which a block of items can be copied to or from
+#  a queue as raw memory, if the items are of the queue's type. Copying items
+#  of another type that way would copy their bits rather than their values,
+#  for example putting the bits of a float into an integer queue, so in that
+#  case @c None is returned and the items are copied one at a time.
+#  @param items The array, bytes, memoryview or other sequence of items
+#  @param type_code The type code of the queue's items
+#  @param index The index of an item in @c items which will be copied
+#  @return A memoryview of @c items, or @c None
+def _same_type_view (items, type_code, index):
+    if isinstance (items, (bytes, bytearray)):
+        code = 'B'
+    else:
+        code = getattr (items, 'typecode', None)
+    try:
+        view = memoryview (items)
+    except TypeError:
+        return None
+    if code is None:
+        code = getattr (view, 'format', None)
+    if code is not None:
+        return view if code == type_code else None
+
+    # MicroPython's arrays and memoryviews don't tell their type codes, so
+    # check that an item is the same kind of number as the queue's and takes
+    # up the same number of bytes. Arrays of the other signedness are told
+    # apart by that item's sign, so an unsigned array is best put into a
+    # signed queue only with small values
+    try:
+        item = items[index]
+        size = len (bytes (view[index:index + 1]))
+    except (IndexError, TypeError):
+        return None
+    if isinstance (item, float) != (type_code in 'fd') \
+            or size != struct.calcsize (type_code):
+        return None
+    if type_code in 'BHILQ':
+        if item < 0:
+            return None
+    elif type_code not in 'fd' and item >= 1 << (8 * size - 1):
+        return None
+    return view
+
+
 ## Base class for queues and shares which exchange data between tasks.
 # 
 #  One should never create an object from this class; it doesn't do anything
@@ -62,10 +141,45 @@ class BaseShare:
         self._type_code = type_code
         self._thread_protect = thread_protect
 
+        # Tasks which are parked by cotask, waiting for new data to arrive
+        self._waiters = []
+
         # Add this queue to the global share and queue list
         share_list.append (self)
 
 
+    ## Get statistics about the share in a dictionary; see @c stats_all().
+    #  Child classes which keep more statistics add them to the dictionary.
+    #  @return A dictionary holding the share's name, class and type
+    def stats (self):
+        return {'name' : self._name, 'kind' : type (self).__name__,
+                'type' : self._type_code}
+
+
+    ## Add a task to the list of tasks to be woken when new data arrives.
+    #  This is used by @c cotask when a task yields a @c cotask.Wait.
+    #  @param task The task which is waiting
+    def _add_waiter (self, task):
+        if task not in self._waiters:
+            self._waiters.append (task)
+
+
+    ## Remove a task from the list of tasks to be woken when data arrives.
+    #  @param task The task which is no longer waiting
+    def _remove_waiter (self, task):
+        if task in self._waiters:
+            self._waiters.remove (task)
+
+
+    ## Wake all the tasks which are waiting for new data. The tasks take
+    #  themselves off the list of waiters when they run. Waking a task only
+    #  sets a flag, so this can be done in an interrupt callback.
+    @micropython.native
+    def _wake_waiters (self):
+        for task in self._waiters:
+            task.go ()
+
+
 ## A queue which is used to transfer data from one task to another.
 #
 #  If parameter 'thread_protect' is @c True when a queue is created, transfers
@@ -128,9 +242,10 @@ class Queue (BaseShare):
             else 'Queue' + str (Queue.ser_num)
         Queue.ser_num += 1
 
-        # Allocate memory in which the queue's data will be stored
+        # Allocate memory in which the queue's data will be stored. It's
+        # filled with zeros, which fit in every type
         try:
-            self._buffer = array.array (type_code, range (size))
+            self._buffer = array.array (type_code, (0 for n in range (size)))
         except MemoryError:
             self._buffer = None
             raise
@@ -138,6 +253,12 @@ class Queue (BaseShare):
             self._buffer = None
             raise
 
+        # A view of the buffer through which blocks of items are copied
+        self._view = memoryview (self._buffer)
+
+        # The queue is counted as nearly full when it holds this many items
+        self._high_mark = (3 * size + 3) // 4
+
         # Initialize pointers to be used for reading and writing data
         self.clear ()
 
@@ -169,11 +290,13 @@ class Queue (BaseShare):
         # If we're in an ISR and the queue is full and we're not allowed to
         # overwrite data, we have to give up and exit
         if self.full ():
-            if in_ISR:
+            if in_ISR and not self._overwrite:
+                self._overflows += 1
                 return
 
             # Wait (if needed) until there's room in the buffer for the data
             if not self._overwrite:
+                self._put_blocks += 1
                 while self.full ():
                     pass
 
@@ -181,21 +304,32 @@ class Queue (BaseShare):
         if self._thread_protect and not in_ISR:
             _irq_state = pyb.disable_irq ()
 
-        # Write the data and advance the counts and pointers
+        # Write the data and advance the counts and pointers. If the queue
+        # was full, the oldest item has just been overwritten, so the read
+        # pointer moves along to the next oldest
         self._buffer[self._wr_idx] = item
         self._wr_idx += 1
         if self._wr_idx >= self._size:
             self._wr_idx = 0
+        self._puts += 1
         self._num_items += 1
-        if self._num_items >= self._size:        # Can't be fuller than full
+        if self._num_items > self._size:         # Can't be fuller than full
             self._num_items = self._size
+            self._rd_idx = self._wr_idx
+            self._overflows += 1
         if self._num_items > self._max_full:     # Record maximum fillage
             self._max_full = self._num_items
+        if self._num_items >= self._high_mark and self._high_since < 0:
+            self._high_since = utime.ticks_ms ()
 
         # Re-enable interrupts
         if self._thread_protect and not in_ISR:
             pyb.enable_irq (_irq_state)
 
+        # Wake any tasks which are waiting for data
+        if self._waiters:
+            self._wake_waiters ()
+
 
     ## Read an item from the queue.
     # 
@@ -217,8 +351,10 @@ class Queue (BaseShare):
     @micropython.native
     def get (self, in_ISR = False):
         # Wait until there's something in the queue to be returned
-        while self.empty ():
-            pass
+        if self.empty ():
+            self._get_blocks += 1
+            while self.empty ():
+                pass
 
         # Prevent data corruption by blocking interrupts during data transfer
         if self._thread_protect and not in_ISR:
@@ -231,9 +367,12 @@ class Queue (BaseShare):
         self._rd_idx += 1
         if self._rd_idx >= self._size:
             self._rd_idx = 0
+        self._gets += 1
         self._num_items -= 1
         if self._num_items < 0:
             self._num_items = 0
+        if self._high_since >= 0 and self._num_items < self._high_mark:
+            self._end_high ()
 
         # Re-enable interrupts
         if self._thread_protect and not in_ISR:
@@ -242,6 +381,309 @@ class Queue (BaseShare):
         return (to_return)
 
 
+    ## Put an item into the queue if there's room for it, without waiting.
+    #
+    #  If the queue is full, the item isn't put in, unless the queue was
+    #  created with @c overwrite set to @c True, in which case the oldest item
+    #  is overwritten as by @c put(). If a timeout is given, this method
+    #  waits up to that long for room to become available; this is only
+    #  useful if the room can be made by an interrupt callback, since no
+    #  other task can run while this method waits. Each time the queue is
+    #  found full, it's counted, so that queues which are too small can be
+    #  found; see @c blocked().
+    #  @param item The item to be placed into the queue
+    #  @param timeout_us The longest time to wait in microseconds, by default
+    #         0 for no waiting at all
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return @c True if the item was put into the queue, @c False if not
+    @micropython.native
+    def try_put (self, item, timeout_us = 0, in_ISR = False):
+        if self._num_items >= self._size and not self._overwrite:
+            self._put_blocks += 1
+            if timeout_us <= 0 or in_ISR:
+                return False
+            start = utime.ticks_us ()
+            while self._num_items >= self._size:
+                if utime.ticks_diff (utime.ticks_us (), start) >= timeout_us:
+                    return False
+        self.put (item, in_ISR)
+        return True
+
+
+    ## Get an item from the queue if there is one, without waiting.
+    #
+    #  If a timeout is given, this method waits up to that long for an item
+    #  to arrive; this is only useful if an interrupt callback puts items
+    #  into the queue, since no other task can run while this method waits.
+    #  Each time the queue is found empty, it's counted; see @c blocked().
+    #  @code
+    #     item = my_queue.try_get ()
+    #     if item is not task_share.NO_DATA:
+    #         do_something_with (item)
+    #  @endcode
+    #  @param timeout_us The longest time to wait in microseconds, by default
+    #         0 for no waiting at all
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The item, or @c NO_DATA if the queue was empty
+    @micropython.native
+    def try_get (self, timeout_us = 0, in_ISR = False):
+        if self._num_items <= 0:
+            self._get_blocks += 1
+            if timeout_us <= 0 or in_ISR:
+                return NO_DATA
+            start = utime.ticks_us ()
+            while self._num_items <= 0:
+                if utime.ticks_diff (utime.ticks_us (), start) >= timeout_us:
+                    return NO_DATA
+        return self.get (in_ISR)
+
+
+    ## Get an item from the queue in a task, letting other tasks run until
+    #  one arrives.
+    #
+    #  This is a generator to be used with @c yield @c from inside a task's
+    #  generator. While the queue is empty it yields, which lets the
+    #  scheduler run other tasks, so the task which puts items into the queue
+    #  gets a chance to do so. It's best to yield a @c cotask.Wait for this
+    #  queue, so the waiting task isn't run again until an item arrives:
+    #  @code
+    #     def consumer_fun (shares):
+    #         the_queue = shares
+    #         wait_data = cotask.Wait (the_queue)
+    #         while True:
+    #             item = yield from the_queue.get_async (wait_data)
+    #             do_something_with (item)
+    #  @endcode
+    #  If there are more items in the queue, the task goes on to the next one
+    #  without yielding, so in a task with no period, don't yield anything
+    #  but the @c Wait; the task won't be run again unless it's waiting.
+    #  Each time the queue is found empty, it's counted; see @c blocked().
+    #  @param wait The value to yield while waiting, such as the task's state
+    #         or a @c cotask.Wait
+    #  @return The item from the queue
+    def get_async (self, wait = None):
+        while self._num_items <= 0:
+            self._get_blocks += 1
+            yield wait
+        return self.get ()
+
+
+    ## Find how often callers found the queue empty when getting items or
+    #  full when putting them. Every @c get() or @c put() which had to wait,
+    #  every @c try_get() or @c try_put() which found nothing or no room,
+    #  every @c put_many() which couldn't fit all its items, and every time
+    #  @c get_async() had to yield is counted. If the queue is
+    #  often full, it may be too small, or the task which reads it may need
+    #  to run more often.
+    #  @return A tuple holding the number of gets and the number of puts
+    #          which found the queue empty or full
+    def blocked (self):
+        return (self._get_blocks, self._put_blocks)
+
+
+    ## Put a block of items into the queue.
+    #
+    #  The items are copied into the queue's buffer in at most two pieces,
+    #  one up to the end of the buffer and one from its beginning, which is
+    #  much faster than putting them in one at a time. The items should be
+    #  in an @c array.array with the queue's type code, or in a @c bytes or
+    #  @c bytearray for a queue of type @c 'B'; other sequences such as
+    #  lists also work, but they're copied one item at a time, as are arrays
+    #  of another type, so that their values rather than their bits are
+    #  copied. This method never waits and never overwrites old data: if
+    #  there isn't room for all the items, only as many as fit are put into
+    #  the queue. A @c count which runs past the end of @c items is cut
+    #  short; a @c start outside @c items raises an @c IndexError.
+    #  @param items The array, bytes or other sequence holding the items
+    #  @param start The index in @c items of the first item to be put
+    #  @param count The number of items to put, by default all of them from
+    #         @c start to the end
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items which were put into the queue
+    @micropython.native
+    def put_many (self, items, start = 0, count = None, in_ISR = False):
+        count = _block_count (len (items), start, count)
+        source = _same_type_view (items, self._type_code, start)
+
+        # Prevent data corruption by blocking interrupts during data transfer.
+        # They're turned back on even if copying an item fails
+        protect = self._thread_protect and not in_ISR
+        if protect:
+            irq_state = pyb.disable_irq ()
+        try:
+            room = self._size - self._num_items
+            if count > room:
+                count = room
+                self._put_blocks += 1
+            wr_idx = self._wr_idx
+            first = self._size - wr_idx
+            if first > count:
+                first = count
+
+            # Copy the items in one or two pieces, or one at a time if they
+            # aren't in a buffer of the queue's type
+            if source is not None:
+                self._view[wr_idx:wr_idx + first] = \
+                    source[start:start + first]
+                if count > first:
+                    self._view[0:count - first] = \
+                        source[start + first:start + count]
+            else:
+                buf = self._buffer
+                index = wr_idx
+                for item in range (start, start + count):
+                    buf[index] = items[item]
+                    index += 1
+                    if index >= self._size:
+                        index = 0
+
+            # Advance the counts and pointers
+            wr_idx += count
+            if wr_idx >= self._size:
+                wr_idx -= self._size
+            self._wr_idx = wr_idx
+            self._puts += count
+            self._num_items += count
+            if self._num_items > self._max_full:     # Record maximum fillage
+                self._max_full = self._num_items
+            if self._num_items >= self._high_mark and self._high_since < 0:
+                self._high_since = utime.ticks_ms ()
+
+        # Re-enable interrupts
+        finally:
+            if protect:
+                pyb.enable_irq (irq_state)
+
+        # Wake any tasks which are waiting for data
+        if count and self._waiters:
+            self._wake_waiters ()
+        return count
+
+
+    ## Get a block of items from the queue.
+    #
+    #  Items are copied from the queue's buffer into the destination in at
+    #  most two pieces. The destination should be an @c array.array with the
+    #  queue's type code, or a @c bytearray for a queue of type @c 'B'; a
+    #  list, or an array of another type, also works but is filled one item
+    #  at a time. This method never waits; if the queue holds fewer items
+    #  than were asked for, all the items in the queue are copied. A
+    #  @c count which runs past the end of @c dest is cut short; a @c start
+    #  outside @c dest raises an @c IndexError.
+    #  @param dest The array, bytearray or list into which items are copied
+    #  @param start The index in @c dest at which the first item goes
+    #  @param count The largest number of items to get, by default enough
+    #         to fill @c dest from @c start to its end
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items which were copied into @c dest
+    @micropython.native
+    def get_many (self, dest, start = 0, count = None, in_ISR = False):
+        count = _block_count (len (dest), start, count)
+        target = _same_type_view (dest, self._type_code, start)
+
+        # Prevent data corruption by blocking interrupts during data transfer.
+        # They're turned back on even if copying an item fails
+        protect = self._thread_protect and not in_ISR
+        if protect:
+            irq_state = pyb.disable_irq ()
+        try:
+            if count > self._num_items:
+                count = self._num_items
+            rd_idx = self._rd_idx
+            first = self._size - rd_idx
+            if first > count:
+                first = count
+
+            # Copy the items in one or two pieces, or one at a time if the
+            # destination isn't a buffer of the queue's type
+            if target is not None:
+                target[start:start + first] = \
+                    self._view[rd_idx:rd_idx + first]
+                if count > first:
+                    target[start + first:start + count] = \
+                        self._view[0:count - first]
+            else:
+                buf = self._buffer
+                index = rd_idx
+                for item in range (start, start + count):
+                    dest[item] = buf[index]
+                    index += 1
+                    if index >= self._size:
+                        index = 0
+
+            # Move the read pointer and adjust the number of items in the
+            # queue
+            rd_idx += count
+            if rd_idx >= self._size:
+                rd_idx -= self._size
+            self._rd_idx = rd_idx
+            self._gets += count
+            self._num_items -= count
+            if self._high_since >= 0 and self._num_items < self._high_mark:
+                self._end_high ()
+
+        # Re-enable interrupts
+        finally:
+            if protect:
+                pyb.enable_irq (irq_state)
+
+        return count
+
+
+    ## Look at the items in the queue without taking them out or copying
+    #  them.
+    #
+    #  The items are returned in two memoryviews of the queue's buffer: the
+    #  first holds the oldest items, up to the end of the buffer, and the
+    #  second holds the rest, which wrap around to the buffer's beginning; it
+    #  is empty if they don't wrap. The views are only valid until more items
+    #  are put into the queue. After using the items, call @c skip() to take
+    #  them out of the queue:
+    #  @code
+    #     (older, newer) = print_queue.peek ()
+    #     sent = uart.write (older)
+    #     print_queue.skip (sent)
+    #  @endcode
+    #  @return A tuple holding two memoryviews of the items in the queue
+    def peek (self):
+        count = self._num_items
+        rd_idx = self._rd_idx
+        first = self._size - rd_idx
+        if first > count:
+            first = count
+        return (self._view[rd_idx:rd_idx + first],
+                self._view[0:count - first])
+
+
+    ## Take items out of the queue without reading them, usually after they
+    #  have been used through the views returned by @c peek().
+    #  @param count The number of items to take out; if it's more than the
+    #         number in the queue, the queue is emptied
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items which were taken out
+    @micropython.native
+    def skip (self, count, in_ISR = False):
+        # Prevent data corruption by blocking interrupts during data transfer
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        if count > self._num_items:
+            count = self._num_items
+        self._rd_idx += count
+        if self._rd_idx >= self._size:
+            self._rd_idx -= self._size
+        self._gets += count
+        self._num_items -= count
+        if self._high_since >= 0 and self._num_items < self._high_mark:
+            self._end_high ()
+
+        # Re-enable interrupts
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        return count
+
+
     ## Check if there are any items in the queue.
     # 
     #  Returns @c True if there are any items in the queue and @c False
@@ -287,16 +729,376 @@ class Queue (BaseShare):
         self._rd_idx = 0
         self._wr_idx = 0
         self._num_items = 0
+        self._reset_stats ()
+
+
+    ## Set the queue's statistics to zero and start timing from now.
+    def _reset_stats (self):
         self._max_full = 0
+        self._get_blocks = 0
+        self._put_blocks = 0
+
+        # Statistics: items put and gotten, items lost or overwritten because
+        # the queue was full, and how long and how many times the queue has
+        # been at least 75% full, in milliseconds since the time in
+        # _stats_start. While the queue is that full, _high_since holds the
+        # time at which it got there; otherwise it's -1
+        self._puts = 0
+        self._gets = 0
+        self._overflows = 0
+        self._high_ms = 0
+        self._high_count = 0
+        self._high_since = -1
+        self._stats_start = utime.ticks_ms ()
+
+
+    ## Add the time for which the queue has been at least 75% full to the
+    #  total, now that it's less full.
+    def _end_high (self):
+        self._high_ms += utime.ticks_diff (utime.ticks_ms (), self._high_since)
+        self._high_count += 1
+        self._high_since = -1
+
+
+    ## Suggest a size for the queue from what has been seen so far.
+    #
+    #  If the queue has never been full, the suggestion is the largest number
+    #  of items it has held plus a quarter of that for safety. If it has been
+    #  full, so that items were lost or overwritten or a caller had to wait,
+    #  there's no telling how many items it would have needed to hold, and
+    #  the suggestion is twice the present size. Suggestions are only as good
+    #  as the test run which produced them; run the system through its
+    #  busiest moments before believing them.
+    #  @return The suggested number of items
+    def recommended_size (self):
+        if self._overflows or self._put_blocks:
+            return 2 * self._size
+        return max (1, self._max_full + (self._max_full + 3) // 4)
+
+
+    ## Get statistics about the queue in a dictionary, for a program on a PC.
+    #  The times are in milliseconds; @c elapsed_ms is the time since the
+    #  queue was created or cleared.
+    #  @return A dictionary holding the queue's name, type and statistics
+    def stats (self):
+        stats = super ().stats ()
+        high_ms = self._high_ms
+        if self._high_since >= 0:
+            high_ms += utime.ticks_diff (utime.ticks_ms (), self._high_since)
+        stats.update ({'size' : self._size, 'num_in' : self._num_items,
+                       'max_full' : self._max_full, 'puts' : self._puts,
+                       'gets' : self._gets, 'overflows' : self._overflows,
+                       'get_blocks' : self._get_blocks,
+                       'put_blocks' : self._put_blocks,
+                       'high_ms' : high_ms, 'high_count' : self._high_count,
+                       'elapsed_ms' : utime.ticks_diff (utime.ticks_ms (),
+                                                        self._stats_start),
+                       'recommended' : self.recommended_size ()})
+        return stats
 
 
     ## This method puts diagnostic information about the queue into a string.
     # 
     #  It shows the queue's name and type as well as the maximum number of
-    #  items and queue size. 
+    #  items and queue size, the numbers of items put in and gotten out, the
+    #  number lost or overwritten because the queue was full, the percentage
+    #  of time the queue has been at least 75% full, and a suggested size.
     def __repr__ (self):
-        return ('{:<12s} Queue<{:s}> Max Full {:d}/{:d}'.format (self._name,
-                type_code_strings[self._type_code], self._max_full, self._size))
+        stats = self.stats ()
+        elapsed = stats['elapsed_ms'] if stats['elapsed_ms'] > 0 else 1
+        return ('{:<12s} Queue<{:s}> Max Full {:d}/{:d} Puts {:d} Gets {:d} '
+                'Overflows {:d} >75% {:.1f}% Suggest {:d}'.format (self._name,
+                type_code_strings[self._type_code], self._max_full, self._size,
+                self._puts, self._gets, self._overflows,
+                100.0 * stats['high_ms'] / elapsed, stats['recommended']))
+
+
+## A queue for one producer and one consumer which never disables interrupts.
+#
+#  A regular @c Queue keeps a count of the items it holds, which both the
+#  writer and the reader change, so with @c thread_protect each @c put() and
+#  @c get() has to disable interrupts while it works. That delays interrupts
+#  a little every time. In the common case of exactly one writer, such as an
+#  interrupt callback, and one reader, such as a task, there's no need for
+#  that. In this queue the writer changes only the write pointer and the
+#  reader changes only the read pointer, and the number of items is worked
+#  out from the two. The writer stores an item before moving the write
+#  pointer, and the reader reads an item before moving the read pointer, so
+#  neither can ever see a half finished change by the other.
+#
+#  The buffer has one slot more than the queue's size, which is always left
+#  empty so that a full queue can be told apart from an empty one. Only one
+#  task or callback may put items in and only one may take them out, and the
+#  queue can't overwrite old data. The statistics are kept by both ends
+#  without locking, so the times spent nearly full may be a little off.
+#
+#  @code
+#  import task_share
+#
+#  # Encoder counts go from an interrupt callback to a task
+#  counts = task_share.SPSCQueue ('l', 64, name="Counts")
+#
+#  # In the interrupt callback
+#  counts.put (encoder_count, in_ISR=True)
+#
+#  # In the task
+#  while counts.any ():
+#      process (counts.get ())
+#  @endcode
+class SPSCQueue (Queue):
+
+    ## Create a single producer, single consumer queue.
+    #  @param type_code The type of data items which the queue can hold, as
+    #         for @c Queue
+    #  @param size The maximum number of items which the queue can hold
+    #  @param name A short name for the queue, default @c QueueN where @c N
+    #         is a serial number for the queue
+    def __init__ (self, type_code, size, name = None):
+        # The buffer holds one empty slot which is never filled
+        self._slots = size + 1
+        super ().__init__ (type_code, size + 1, thread_protect = False,
+                           overwrite = False, name = name)
+        self._size = size
+        self._high_mark = (3 * size + 3) // 4
+
+
+    ## The number of items in the queue, worked out from the pointers. The
+    #  methods inherited from @c Queue which only read the number of items
+    #  use this.
+    @property
+    def _num_items (self):
+        count = self._wr_idx - self._rd_idx
+        if count < 0:
+            count += self._slots
+        return count
+
+
+    ## Put an item into the queue. This must only be called by the one
+    #  producer. If the queue is full, wait until there's room, or give up
+    #  if called from an interrupt callback, counting the lost item.
+    #  @param item The item to be placed into the queue
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    @micropython.native
+    def put (self, item, in_ISR = False):
+        wr_idx = self._wr_idx
+        next_idx = wr_idx + 1
+        if next_idx >= self._slots:
+            next_idx = 0
+        if next_idx == self._rd_idx:
+            if in_ISR:
+                self._overflows += 1
+                return
+            self._put_blocks += 1
+            while next_idx == self._rd_idx:
+                pass
+
+        # Store the item, then publish it by moving the write pointer
+        self._buffer[wr_idx] = item
+        self._wr_idx = next_idx
+        self._puts += 1
+
+        count = next_idx - self._rd_idx
+        if count < 0:
+            count += self._slots
+        if count > self._max_full:               # Record maximum fillage
+            self._max_full = count
+        if count >= self._high_mark and self._high_since < 0:
+            self._high_since = utime.ticks_ms ()
+
+        # Wake any tasks which are waiting for data
+        if self._waiters:
+            self._wake_waiters ()
+
+
+    ## Read an item from the queue. This must only be called by the one
+    #  consumer. If the queue is empty, wait until an item arrives.
+    #  @param in_ISR Set this to @c True if calling from within an ISR; it
+    #         makes no difference, as no interrupts are disabled
+    #  @return The oldest item in the queue
+    @micropython.native
+    def get (self, in_ISR = False):
+        rd_idx = self._rd_idx
+        if rd_idx == self._wr_idx:
+            self._get_blocks += 1
+            while rd_idx == self._wr_idx:
+                pass
+
+        # Read the item, then free its slot by moving the read pointer
+        to_return = self._buffer[rd_idx]
+        rd_idx += 1
+        if rd_idx >= self._slots:
+            rd_idx = 0
+        self._rd_idx = rd_idx
+        self._gets += 1
+
+        if self._high_since >= 0 and self._num_items < self._high_mark:
+            self._end_high ()
+        return to_return
+
+
+    ## Check if there are any items in the queue.
+    #  @return @c True if items are in the queue, @c False if not
+    @micropython.native
+    def any (self):
+        return self._rd_idx != self._wr_idx
+
+
+    ## Check if the queue is empty.
+    #  @return @c True if queue is empty, @c False if it's not empty
+    @micropython.native
+    def empty (self):
+        return self._rd_idx == self._wr_idx
+
+
+    ## Check if the queue is full.
+    #  @return @c True if the queue is full
+    @micropython.native
+    def full (self):
+        return self._num_items >= self._size
+
+
+    ## Check how many items are in the queue.
+    #  @return The number of items in the queue
+    @micropython.native
+    def num_in (self):
+        return self._num_items
+
+
+    ## Put a block of items into the queue, as @c Queue.put_many() does.
+    #  This must only be called by the one producer.
+    #  @param items The array, bytes or other sequence holding the items
+    #  @param start The index in @c items of the first item to be put
+    #  @param count The number of items to put, by default all of them from
+    #         @c start to the end
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items which were put into the queue
+    @micropython.native
+    def put_many (self, items, start = 0, count = None, in_ISR = False):
+        count = _block_count (len (items), start, count)
+        source = _same_type_view (items, self._type_code, start)
+        room = self._size - self._num_items
+        if count > room:
+            count = room
+            self._put_blocks += 1
+        wr_idx = self._wr_idx
+        first = self._slots - wr_idx
+        if first > count:
+            first = count
+
+        if source is not None:
+            self._view[wr_idx:wr_idx + first] = source[start:start + first]
+            if count > first:
+                self._view[0:count - first] = \
+                    source[start + first:start + count]
+        else:
+            buf = self._buffer
+            index = wr_idx
+            for item in range (start, start + count):
+                buf[index] = items[item]
+                index += 1
+                if index >= self._slots:
+                    index = 0
+
+        # Publish the items by moving the write pointer
+        wr_idx += count
+        if wr_idx >= self._slots:
+            wr_idx -= self._slots
+        self._wr_idx = wr_idx
+        self._puts += count
+
+        num_in = self._num_items
+        if num_in > self._max_full:              # Record maximum fillage
+            self._max_full = num_in
+        if num_in >= self._high_mark and self._high_since < 0:
+            self._high_since = utime.ticks_ms ()
+
+        if count and self._waiters:
+            self._wake_waiters ()
+        return count
+
+
+    ## Get a block of items from the queue, as @c Queue.get_many() does.
+    #  This must only be called by the one consumer.
+    #  @param dest The array, bytearray or list into which items are copied
+    #  @param start The index in @c dest at which the first item goes
+    #  @param count The largest number of items to get, by default enough
+    #         to fill @c dest from @c start to its end
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items which were copied into @c dest
+    @micropython.native
+    def get_many (self, dest, start = 0, count = None, in_ISR = False):
+        count = _block_count (len (dest), start, count)
+        target = _same_type_view (dest, self._type_code, start)
+        num_in = self._num_items
+        if count > num_in:
+            count = num_in
+        rd_idx = self._rd_idx
+        first = self._slots - rd_idx
+        if first > count:
+            first = count
+
+        if target is not None:
+            target[start:start + first] = self._view[rd_idx:rd_idx + first]
+            if count > first:
+                target[start + first:start + count] = \
+                    self._view[0:count - first]
+        else:
+            buf = self._buffer
+            index = rd_idx
+            for item in range (start, start + count):
+                dest[item] = buf[index]
+                index += 1
+                if index >= self._slots:
+                    index = 0
+
+        self._advance_read (count)
+        return count
+
+
+    ## Look at the items in the queue without taking them out, as
+    #  @c Queue.peek() does. This must only be called by the one consumer.
+    #  @return A tuple holding two memoryviews of the items in the queue
+    def peek (self):
+        rd_idx = self._rd_idx
+        wr_idx = self._wr_idx
+        if wr_idx >= rd_idx:
+            return (self._view[rd_idx:wr_idx], self._view[0:0])
+        return (self._view[rd_idx:self._slots], self._view[0:wr_idx])
+
+
+    ## Take items out of the queue without reading them, as @c Queue.skip()
+    #  does. This must only be called by the one consumer.
+    #  @param count The number of items to take out
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of items which were taken out
+    def skip (self, count, in_ISR = False):
+        num_in = self._num_items
+        if count > num_in:
+            count = num_in
+        self._advance_read (count)
+        return count
+
+
+    ## Move the read pointer past items which have been used, freeing their
+    #  slots for the producer.
+    #  @param count The number of items which have been used
+    @micropython.native
+    def _advance_read (self, count):
+        rd_idx = self._rd_idx + count
+        if rd_idx >= self._slots:
+            rd_idx -= self._slots
+        self._rd_idx = rd_idx
+        self._gets += count
+        if self._high_since >= 0 and self._num_items < self._high_mark:
+            self._end_high ()
+
+
+    ## Remove all contents from the queue. This should only be done when
+    #  neither the producer nor the consumer is using the queue.
+    def clear (self):
+        self._rd_idx = 0
+        self._wr_idx = 0
+        self._reset_stats ()
 
 
 # ============================================================================
@@ -365,6 +1167,8 @@ class Share (BaseShare):
     #  This code disables interrupts during the writing so as to prevent
     #  data corrupting by an interrupt service routine which might access
     #  the same data.
+    #  If any tasks are waiting for this share to change and the new data is
+    #  different from the old, those tasks are woken.
     #  @param data The data to be put into this share
     #  @param in_ISR Set this to True if calling from within an ISR
     @micropython.native
@@ -374,12 +1178,17 @@ class Share (BaseShare):
         if self._thread_protect and not in_ISR:
             irq_state = pyb.disable_irq ()
 
+        changed = self._buffer[0] != data
         self._buffer[0] = data
 
         # Re-enable interrupts
         if self._thread_protect and not in_ISR:
             pyb.enable_irq (irq_state)
 
+        # Wake any tasks which are waiting for the share to change
+        if changed and self._waiters:
+            self._wake_waiters ()
+
 
     ## Read an item of data from the share.
     # 
@@ -410,3 +1219,744 @@ class Share (BaseShare):
                 type_code_strings[self._type_code]))
 
 
+# ============================================================================
+
+## A mask which keeps the sequence numbers of record shares small enough to
+#  be held in MicroPython's small integers, which need no memory allocation.
+_SEQ_MASK = 0x3FFFFFFF
+
+
+## A share which holds a record of several values which belong together.
+#
+#  A record such as an encoder position, velocity, time stamp and motor duty
+#  cycle could be passed between tasks in four @c Share objects, but then a
+#  reader might get a position from one run of the control task and a time
+#  stamp from the next. A record share holds all the values in one record
+#  whose layout is given by a @c struct format, and a reader always gets
+#  values which were written together.
+#
+#  This is done without disabling interrupts. The record is kept in two
+#  buffers. The writer fills the buffer which readers aren't using, then
+#  publishes it in one step by counting up a sequence number whose lowest bit
+#  says which buffer is current. A reader notes the sequence number, reads
+#  the current buffer, and checks the sequence number again; only if the
+#  writer has published twice in the meantime could the buffer have been
+#  changed under the reader, and then the reader simply reads again. There
+#  must be only one writer and there may be any number of readers. The
+#  writer may be an interrupt callback if it uses @c put_packed(), since
+#  @c put() makes a tuple of its arguments, which allocates memory and so
+#  can't be done in a hard interrupt.
+#
+#  @code
+#  import task_share
+#
+#  # Position (int32), velocity (float), time in µs (uint32), duty (int16)
+#  motor_data = task_share.RecordShare ('<lfLh', name="Motor 1")
+#
+#  # In the control task, write a whole record at once
+#  motor_data.put (position, velocity, utime.ticks_us (), duty)
+#
+#  # In the logging task, read a consistent record
+#  (position, velocity, time, duty) = motor_data.get ()
+#
+#  # In an interrupt callback, pack into a buffer made ahead of time
+#  packed = bytearray (motor_data.record_size ())
+#  ...
+#  struct.pack_into ('<lfLh', packed, 0, position, velocity, now, duty)
+#  motor_data.put_packed (packed)
+#  @endcode
+class RecordShare (BaseShare):
+
+    ## A counter used to give serial numbers to record shares for diagnostic
+    #  use.
+    ser_num = 0
+
+    ## Create a record share.
+    #  @param format A @c struct format string giving the types of the values
+    #         in the record, such as @c '<lfLh'
+    #  @param name A short name for the share, default @c RecordN where @c N
+    #         is a serial number for the share
+    def __init__ (self, format, name = None):
+        # First call the parent class initializer
+        super ().__init__ (format, False, name)
+
+        self._format = format
+        self._buffers = (bytearray (struct.calcsize (format)),
+                         bytearray (struct.calcsize (format)))
+
+        # The sequence number; its lowest bit tells which buffer is current
+        self._seq = 0
+
+        # How many times a reader had to read again because of a write
+        self._retries = 0
+
+        self._name = str (name) if name != None \
+            else 'Record' + str (RecordShare.ser_num)
+        RecordShare.ser_num += 1
+
+
+    ## Write a whole record into the share.
+    #
+    #  The values are packed into the buffer which readers aren't using, and
+    #  then that buffer is made current. Waiting tasks are woken.
+    #  @param values The values in the record, in the order given by the
+    #         share's format
+    @micropython.native
+    def put (self, *values):
+        seq = (self._seq + 1) & _SEQ_MASK
+        struct.pack_into (self._format, self._buffers[seq & 1], 0, *values)
+        self._seq = seq
+
+        # Wake any tasks which are waiting for new data
+        if self._waiters:
+            self._wake_waiters ()
+
+
+    ## Write a record which has already been packed in the share's format.
+    #
+    #  The bytes are copied one at a time into the buffer which readers
+    #  aren't using, so nothing is allocated and this method can be called
+    #  from an interrupt callback.
+    #  @param record A @c bytearray, @c bytes or @c memoryview holding
+    #         @c record_size() bytes packed in the share's format
+    @micropython.native
+    def put_packed (self, record):
+        seq = (self._seq + 1) & _SEQ_MASK
+        dest = self._buffers[seq & 1]
+        if len (record) != len (dest):
+            raise ValueError ("Packed record is the wrong size")
+        for index in range (len (dest)):
+            dest[index] = record[index]
+        self._seq = seq
+
+        # Wake any tasks which are waiting for new data
+        if self._waiters:
+            self._wake_waiters ()
+
+
+    ## Get the number of bytes in one packed record.
+    #  @return The size of a record in the share's format
+    def record_size (self):
+        return len (self._buffers[0])
+
+
+    ## Read the most recent record from the share.
+    #
+    #  If the writer writes twice while the record is being read, which can
+    #  only happen if the reader is interrupted, the record is read again.
+    #  @return A tuple holding the values in the record
+    @micropython.native
+    def get (self):
+        while True:
+            seq = self._seq
+            values = struct.unpack_from (self._format, self._buffers[seq & 1])
+            if ((self._seq - seq) & _SEQ_MASK) < 2:
+                return values
+            self._retries += 1
+
+
+    ## Get the share's sequence number, which goes up by one each time a
+    #  record is written. A task can compare it with the number it saw last
+    #  time to find out whether there's a new record.
+    #  @return The sequence number
+    def sequence (self):
+        return self._seq
+
+
+    ## Get statistics about the record share in a dictionary, for a program
+    #  on a PC.
+    #  @return A dictionary holding the share's name, format, the number of
+    #          records written and the number of reads which were repeated
+    def stats (self):
+        stats = super ().stats ()
+        stats.update ({'writes' : self._seq, 'retries' : self._retries})
+        return stats
+
+
+    ## Puts diagnostic information about the record share into a string.
+    #
+    #  This shows the share's name, its format, the number of records which
+    #  have been written, and the number of times a read had to be repeated.
+    def __repr__ (self):
+        return ('{:<12s} Record<{:s}> Writes {:d} Retries {:d}'.format (
+                self._name, self._format, self._seq, self._retries))
+
+
+# ============================================================================
+
+## A queue which holds frames of samples from several channels, for logging.
+#
+#  When a step response or an encoder trace is logged, each sample time gives
+#  several values which belong together, such as the time, the position and
+#  the duty cycle. Keeping them in Python lists uses more memory with every
+#  sample, and keeping them in one @c Queue per channel means the channels
+#  can get out of step. A sample queue holds whole frames whose layout is
+#  given by a @c struct format, packed one after another into a single
+#  buffer which is allocated when the queue is created, so logging at full
+#  rate uses no more memory as time goes on.
+#
+#  Putting a frame never waits. If the queue is full, the new frame is
+#  dropped and counted, or if @c overwrite is @c True the oldest frame is
+#  overwritten instead. If only every Nth frame is wanted, for example to
+#  log a long run at a lower rate, set @c decimate to N; the other frames
+#  are counted and thrown away without being packed.
+#
+#  Frames can be read one at a time with @c get(), or many at once with
+#  @c drain_into(), which copies the packed bytes into a buffer that can be
+#  written straight to a serial port. A program on a PC can unpack them with
+#  the same format, using @c struct.iter_unpack().
+#
+#  @code
+#  import task_share
+#
+#  # Time in ms (uint32), position (int32), duty cycle (float)
+#  step_log = task_share.SampleQueue ('<Llf', 200, name="Step Log")
+#
+#  # In the control task, log a frame each run
+#  step_log.put (utime.ticks_diff (utime.ticks_ms (), start), position, duty)
+#
+#  # In the printing task, send as many frames as fit in a buffer
+#  upload = bytearray (32 * step_log.frame_size ())
+#  count = step_log.drain_into (upload)
+#  uart.write (memoryview (upload)[:count])
+#  @endcode
+class SampleQueue (BaseShare):
+
+    ## A counter used to give serial numbers to sample queues for diagnostic
+    #  use.
+    ser_num = 0
+
+    ## Create a sample queue and allocate the memory for its frames.
+    #  @param format A @c struct format string giving the types of the values
+    #         in each frame, such as @c '<Llf'
+    #  @param size The maximum number of frames which the queue can hold
+    #  @param decimate Keep only one frame out of every this many put in
+    #  @param thread_protect @c True if interrupts are to be disabled while
+    #         frames are moved, which is needed if an interrupt callback puts
+    #         frames into the queue
+    #  @param overwrite If @c True, the oldest frame is overwritten when a
+    #         frame is put into a full queue; if @c False, the new frame is
+    #         dropped
+    #  @param name A short name for the queue, default @c SamplesN where
+    #         @c N is a serial number for the queue
+    def __init__ (self, format, size, decimate = 1, thread_protect = False,
+                  overwrite = False, name = None):
+        # First call the parent class initializer
+        super ().__init__ (format, thread_protect, name)
+
+        self._format = format
+        self._frame = struct.calcsize (format)
+        self._size = size
+        self._overwrite = overwrite
+        self._name = str (name) if name != None \
+            else 'Samples' + str (SampleQueue.ser_num)
+        SampleQueue.ser_num += 1
+
+        # All the frames are packed into one buffer, through a view of which
+        # blocks of frames are copied out
+        self._buffer = bytearray (size * self._frame)
+        self._view = memoryview (self._buffer)
+
+        self.set_decimation (decimate)
+        self.clear ()
+
+        # Since we may have allocated a bunch of memory, call the garbage
+        # collector to neaten up what memory is left for future use
+        gc.collect ()
+
+
+    ## Set how many of the frames which are put into the queue are kept.
+    #  @param decimate Keep only one frame out of every this many; 1 keeps
+    #         every frame. The next frame put in is always kept
+    def set_decimation (self, decimate):
+        if decimate < 1:
+            raise ValueError ("Decimation must be at least 1")
+        self._decimate = decimate
+        self._countdown = 0
+
+
+    ## Put a frame into the queue.
+    #  @param values The values in the frame, in the order given by the
+    #         queue's format
+    @micropython.native
+    def put (self, *values):
+        self.put_frame (values)
+
+
+    ## Put a frame whose values are held in a list or tuple into the queue.
+    #  A task which logs at a high rate can keep one list, change its values
+    #  for each frame and pass it here, so that no new tuple is made for each
+    #  frame as it is by @c put().
+    #  @param values A list or tuple holding the values in the frame
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    @micropython.native
+    def put_frame (self, values, in_ISR = False):
+        # Keep only every Nth frame if the queue is decimating
+        if self._countdown > 0:
+            self._countdown -= 1
+            self._decimated += 1
+            return
+        self._countdown = self._decimate - 1
+
+        # Logging must never hold up the task which is logging, so if there's
+        # no room and no overwriting, the frame is dropped
+        if self._num_items >= self._size and not self._overwrite:
+            self._dropped += 1
+            return
+
+        # Prevent data corruption by blocking interrupts during data transfer
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        struct.pack_into (self._format, self._buffer,
+                          self._wr_idx * self._frame, *values)
+        self._wr_idx += 1
+        if self._wr_idx >= self._size:
+            self._wr_idx = 0
+        self._puts += 1
+        self._num_items += 1
+        if self._num_items > self._size:         # The oldest was overwritten
+            self._num_items = self._size
+            self._rd_idx = self._wr_idx
+            self._dropped += 1
+        if self._num_items > self._max_full:
+            self._max_full = self._num_items
+
+        # Re-enable interrupts
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        # Wake any tasks which are waiting for data
+        if self._waiters:
+            self._wake_waiters ()
+
+
+    ## Read the oldest frame from the queue.
+    #
+    #  If the queue is empty, wait until a frame is put in, as with
+    #  @c Queue.get(); call @c any() first to avoid waiting.
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return A tuple holding the values in the frame
+    @micropython.native
+    def get (self, in_ISR = False):
+        while self._num_items <= 0:
+            pass
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        values = struct.unpack_from (self._format, self._buffer,
+                                     self._rd_idx * self._frame)
+        self._advance_read (1)
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        return values
+
+
+    ## Copy as many whole frames as will fit from the queue into a buffer.
+    #
+    #  The frames are copied as packed bytes, oldest first, in at most two
+    #  blocks, and are then removed from the queue. This is much faster than
+    #  getting the frames one at a time, and the buffer can be written to a
+    #  serial port as it is.
+    #  @param buffer A @c bytearray or writable @c memoryview into which
+    #         frames are copied
+    #  @param start The index in @c buffer at which to start copying
+    #  @param in_ISR Set this to @c True if calling from within an ISR
+    #  @return The number of bytes copied, which is a whole number of frames
+    def drain_into (self, buffer, start = 0, in_ISR = False):
+        frame = self._frame
+        count = min (self._num_items, (len (buffer) - start) // frame)
+        if count <= 0:
+            return 0
+        dest = memoryview (buffer)
+
+        if self._thread_protect and not in_ISR:
+            irq_state = pyb.disable_irq ()
+
+        # Copy from the read pointer to the end of the buffer, then whatever
+        # is left from the beginning of the buffer
+        first = min (count, self._size - self._rd_idx)
+        begin = self._rd_idx * frame
+        dest[start:start + first * frame] = \
+            self._view[begin:begin + first * frame]
+        if count > first:
+            dest[start + first * frame:start + count * frame] = \
+                self._view[0:(count - first) * frame]
+        self._advance_read (count)
+
+        if self._thread_protect and not in_ISR:
+            pyb.enable_irq (irq_state)
+
+        return count * frame
+
+
+    ## Move the read pointer past frames which have been read.
+    #  @param count The number of frames which have been read
+    @micropython.native
+    def _advance_read (self, count):
+        self._rd_idx += count
+        if self._rd_idx >= self._size:
+            self._rd_idx -= self._size
+        self._num_items -= count
+        self._gets += count
+
+
+    ## Get the number of bytes in each frame, which is needed to size a
+    #  buffer for @c drain_into() and to unpack the frames on a PC.
+    #  @return The size of a frame in bytes
+    def frame_size (self):
+        return self._frame
+
+
+    ## Check if there are any frames in the queue.
+    #  @return @c True if there are any frames in the queue
+    @micropython.native
+    def any (self):
+        return (self._num_items > 0)
+
+
+    ## Check if the queue is empty.
+    #  @return @c True if there are no frames in the queue
+    @micropython.native
+    def empty (self):
+        return (self._num_items == 0)
+
+
+    ## Check if the queue is full.
+    #  @return @c True if the queue can't hold another frame
+    @micropython.native
+    def full (self):
+        return (self._num_items >= self._size)
+
+
+    ## Check how many frames are in the queue.
+    #  @return The number of frames in the queue
+    @micropython.native
+    def num_in (self):
+        return (self._num_items)
+
+
+    ## Remove all frames from the queue and set its statistics to zero. The
+    #  next frame put in is kept even if the queue is decimating.
+    def clear (self):
+        self._rd_idx = 0
+        self._wr_idx = 0
+        self._num_items = 0
+        self._countdown = 0
+        self._max_full = 0
+
+        # Statistics: frames kept, frames read, frames dropped or overwritten
+        # because the queue was full, and frames thrown away by decimation
+        self._puts = 0
+        self._gets = 0
+        self._dropped = 0
+        self._decimated = 0
+
+
+    ## Get statistics about the sample queue in a dictionary, for a program
+    #  on a PC.
+    #  @return A dictionary holding the queue's name, format and statistics
+    def stats (self):
+        stats = super ().stats ()
+        stats.update ({'size' : self._size, 'frame_size' : self._frame,
+                       'num_in' : self._num_items,
+                       'max_full' : self._max_full, 'puts' : self._puts,
+                       'gets' : self._gets, 'dropped' : self._dropped,
+                       'decimate' : self._decimate,
+                       'decimated' : self._decimated})
+        return stats
+
+
+    ## Puts diagnostic information about the sample queue into a string.
+    #
+    #  This shows the queue's name and format, the maximum number of frames
+    #  it has held and its size, the numbers of frames put in and gotten out,
+    #  and the number dropped or overwritten because the queue was full.
+    def __repr__ (self):
+        return ('{:<12s} Samples<{:s}> Max Full {:d}/{:d} Puts {:d} Gets {:d} '
+                'Dropped {:d}'.format (self._name, self._format,
+                self._max_full, self._size, self._puts, self._gets,
+                self._dropped))
+
+
+# ============================================================================
+
+## A topic to which one producer publishes items which any number of
+#  subscribers read.
+#
+#  If several tasks need the same data, such as encoder readings which go to
+#  a controller, a logger and a task which streams data to a PC, one could
+#  make a @c Queue for each of them and put every reading into all three.
+#  A topic instead keeps its items once, in one ring buffer allocated when
+#  the topic is created. Each subscriber is a @c Subscription with its own
+#  read pointer into the ring, so publishing an item costs the same however
+#  many subscribers there are, and a slow subscriber doesn't hold up the
+#  others or the producer.
+#
+#  Publishing never waits. If a subscriber falls so far behind that items it
+#  hasn't read are overwritten, it skips ahead to the oldest item still in
+#  the ring, and the items it missed are counted as dropped. Each
+#  subscription keeps track of how far behind it has been.
+#
+#  There must be only one producer, which may be an interrupt callback. No
+#  interrupts are disabled; a subscriber which is interrupted while reading
+#  an item which then gets overwritten notices this and reads again.
+#
+#  @code
+#  import task_share
+#
+#  positions = task_share.Topic ('l', 16, name="Position")
+#  control_sub = positions.subscribe ("Control")
+#  log_sub = positions.subscribe ("Log")
+#
+#  # In the encoder task
+#  positions.publish (encoder.read ())
+#
+#  # In the control task, only the newest position matters
+#  position = control_sub.latest ()
+#
+#  # In the logging task, every position is wanted
+#  while log_sub.any ():
+#      log (log_sub.get ())
+#  @endcode
+class Topic (BaseShare):
+
+    ## A counter used to give serial numbers to topics for diagnostic use.
+    ser_num = 0
+
+    ## Create a topic and allocate the ring buffer for its items.
+    #  @param type_code The type of data items which the topic carries, as
+    #         for @c Queue
+    #  @param size The number of recent items which are kept for subscribers
+    #         which haven't read them yet
+    #  @param name A short name for the topic, default @c TopicN where @c N
+    #         is a serial number for the topic
+    def __init__ (self, type_code, size, name = None):
+        # First call the parent class initializer
+        super ().__init__ (type_code, False, name)
+
+        self._size = size
+        self._name = str (name) if name != None \
+            else 'Topic' + str (Topic.ser_num)
+        Topic.ser_num += 1
+
+        self._buffer = array.array (type_code, (0 for n in range (size)))
+        self._wr_idx = 0
+
+        # The number of items published so far, which is also the sequence
+        # number of the next item to be published
+        self._seq = 0
+
+        self._subscribers = []
+
+        # Since we may have allocated a bunch of memory, call the garbage
+        # collector to neaten up what memory is left for future use
+        gc.collect ()
+
+
+    ## Publish an item to all the topic's subscribers.
+    #
+    #  The item is stored before the sequence number is counted up, so a
+    #  subscriber never sees a sequence number for an item which isn't there.
+    #  Waiting tasks are woken.
+    #  @param item The item to be published
+    @micropython.native
+    def publish (self, item):
+        self._buffer[self._wr_idx] = item
+        self._wr_idx += 1
+        if self._wr_idx >= self._size:
+            self._wr_idx = 0
+        self._seq = (self._seq + 1) & _SEQ_MASK
+
+        # Wake any tasks which are waiting for data
+        if self._waiters:
+            self._wake_waiters ()
+
+
+    ## Make a new subscription to the topic. The subscriber gets the items
+    #  which are published from now on.
+    #  @param name A short name for the subscriber, used in printouts
+    #  @return A @c Subscription from which the subscriber reads items
+    def subscribe (self, name = None):
+        sub = Subscription (self, name if name != None
+                            else 'Sub' + str (len (self._subscribers)))
+        self._subscribers.append (sub)
+        return sub
+
+
+    ## End a subscription, so that it no longer shows in printouts and
+    #  statistics.
+    #  @param sub The subscription which is no longer needed
+    def unsubscribe (self, sub):
+        self._subscribers.remove (sub)
+
+
+    ## Get statistics about the topic in a dictionary, for a program on a
+    #  PC.
+    #  @return A dictionary holding the topic's name, type, size, the number
+    #          of items published, and a list holding a dictionary of
+    #          statistics for each subscriber
+    def stats (self):
+        stats = super ().stats ()
+        stats.update ({'size' : self._size, 'published' : self._seq,
+                       'subscribers' : [sub.stats ()
+                                        for sub in self._subscribers]})
+        return stats
+
+
+    ## Puts diagnostic information about the topic into a string.
+    #
+    #  This shows the topic's name, type and size and the number of items
+    #  published, then a line for each subscriber showing how far behind it
+    #  is, the most it has been behind, and the number of items it missed.
+    def __repr__ (self):
+        lines = ['{:<12s} Topic<{:s}> Size {:d} Published {:d}'.format (
+                 self._name, type_code_strings[self._type_code], self._size,
+                 self._seq)]
+        for sub in self._subscribers:
+            lines.append ('  {:<10s} Lag {:d} Max Lag {:d} Gets {:d} '
+                          'Dropped {:d}'.format (sub.name, sub.lag (),
+                          sub._max_lag, sub._gets, sub._dropped))
+        return '\n'.join (lines)
+
+
+## One subscriber's view of a @c Topic.
+#
+#  A subscription is made by @c Topic.subscribe(). It holds the subscriber's
+#  read pointer into the topic's ring buffer, and items are read straight
+#  from there. A task can wait for new items by yielding a
+#  @c cotask.Wait for the subscription; it's woken when anything is
+#  published to the topic.
+class Subscription:
+
+    ## Create a subscription; this is done by @c Topic.subscribe().
+    #  @param topic The topic to which this is a subscription
+    #  @param name A short name for the subscriber
+    def __init__ (self, topic, name):
+        self._topic = topic
+        self.name = name
+
+        # The sequence number of the next item to read and where it is in
+        # the topic's buffer; these always move together
+        self._seq = topic._seq
+        self._rd_idx = topic._wr_idx
+
+        self._gets = 0
+        self._dropped = 0
+        self._max_lag = 0
+
+
+    ## Read the next item which this subscriber hasn't read, if there is one.
+    #
+    #  If the subscriber is so far behind that unread items have been
+    #  overwritten, it skips ahead to the oldest item still in the topic, and
+    #  the skipped items are counted as dropped.
+    #  @return The item, or @c NO_DATA if there's nothing new
+    @micropython.native
+    def try_get (self):
+        topic = self._topic
+        size = topic._size
+        while True:
+            lag = (topic._seq - self._seq) & _SEQ_MASK
+            if lag == 0:
+                return NO_DATA
+            if lag > self._max_lag:
+                self._max_lag = lag
+
+            # If unread items were overwritten, skip past them
+            if lag > size:
+                skip = lag - size
+                self._dropped += skip
+                self._seq = (self._seq + skip) & _SEQ_MASK
+                self._rd_idx = (self._rd_idx + skip) % size
+
+            item = topic._buffer[self._rd_idx]
+
+            # If the producer got around the ring to this item while it was
+            # being read, the item might be the wrong one, so read again
+            if ((topic._seq - self._seq) & _SEQ_MASK) > size:
+                continue
+
+            self._seq = (self._seq + 1) & _SEQ_MASK
+            self._rd_idx += 1
+            if self._rd_idx >= size:
+                self._rd_idx = 0
+            self._gets += 1
+            return item
+
+
+    ## Read the next item which this subscriber hasn't read.
+    #
+    #  If there isn't one, wait until one is published, as with
+    #  @c Queue.get(); call @c any() first to avoid waiting.
+    #  @return The item
+    @micropython.native
+    def get (self):
+        while True:
+            item = self.try_get ()
+            if item is not NO_DATA:
+                return item
+
+
+    ## Read the newest item in the topic, skipping any older ones which this
+    #  subscriber hasn't read. This suits a controller which only needs the
+    #  latest measurement. Skipped items aren't counted as dropped.
+    #  @return The newest item, or @c NO_DATA if there's nothing new
+    @micropython.native
+    def latest (self):
+        topic = self._topic
+        lag = (topic._seq - self._seq) & _SEQ_MASK
+        if lag > 1:
+            if lag > self._max_lag:
+                self._max_lag = lag
+            self._seq = (self._seq + lag - 1) & _SEQ_MASK
+            self._rd_idx = (self._rd_idx + lag - 1) % topic._size
+        return self.try_get ()
+
+
+    ## Find how many items have been published which this subscriber hasn't
+    #  read. If this is more than the topic's size, some of them have been
+    #  overwritten and will be dropped.
+    #  @return The number of unread items
+    @micropython.native
+    def lag (self):
+        return (self._topic._seq - self._seq) & _SEQ_MASK
+
+
+    ## Check if there are any items which this subscriber hasn't read.
+    #  @return @c True if there are unread items
+    @micropython.native
+    def any (self):
+        return self._topic._seq != self._seq
+
+
+    ## Check how many unread items this subscriber can still read.
+    #  @return The number of unread items still in the topic
+    @micropython.native
+    def num_in (self):
+        return min (self.lag (), self._topic._size)
+
+
+    ## Get statistics about the subscription in a dictionary.
+    #  @return A dictionary holding the subscriber's name, present and
+    #          greatest lag, number of items read and number dropped
+    def stats (self):
+        return {'name' : self.name, 'lag' : self.lag (),
+                'max_lag' : self._max_lag, 'gets' : self._gets,
+                'dropped' : self._dropped}
+
+
+    ## Have a task woken when an item is published to the topic. This is
+    #  used by @c cotask when a task yields a @c cotask.Wait.
+    #  @param task The task which is waiting
+    def _add_waiter (self, task):
+        self._topic._add_waiter (task)
+
+
+    ## Stop waking a task when items are published.
+    #  @param task The task which is no longer waiting
+    def _remove_waiter (self, task):
+        self._topic._remove_waiter (task)
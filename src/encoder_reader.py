@@ -4,6 +4,12 @@ This file contains code which creates an encoder class for completion of ME-405
 read motor posiiton values during its use. Once the encoder is initialized properly, the read function can read the position change of the motor, and the zero function
 can reset the position count from the encoder. The class and its functions are described in further detail below. 
 
+Because read() only samples the encoder when the control task runs, a velocity found from it is quantized to the task period. The capture
+functions fix this: start_capture() sets up a timer interrupt which logs (encoder count, ticks_us) pairs into a preallocated cqueue.StructQueue
+at a fixed rate, and velocity() uses the time stamped deltas to find the speed in counts per second. The capture interrupt only avoids
+allocating memory when the cqueue C module is compiled into MicroPython, so start_capture() refuses to run on a board which only has the
+Python version of cqueue. The file test_encoder_capture.py simulates quadrature edges on a PC to check the capture path. 
+
 @author Abe Muldrow
 @author Lucas Rambo
 @author Peter Tomson
@@ -12,9 +18,17 @@ can reset the position count from the encoder. The class and its functions are d
 
 import micropython
 import time
+import sys
+import struct
+import utime
 import pyb  # have to import pyb for it work on the board when imported as a class
 # import motor_driver.py    # can use the previous MotorDriver class to test the encoder 
 
+## capture format
+# each capture record holds the encoder count and the ticks_us() time stamp, both as unsigned 32 bit numbers so that the counts of the
+# 32 bit timers (TIM2 and TIM5) fit as well as those of the 16 bit ones
+CAPTURE_FORMAT = '<LL'
+
 
 class EncoderReader:
     """! 
@@ -56,6 +70,12 @@ class EncoderReader:
         ## previous position 
         # this variable holds the previous number from each encoder read
         self.prev_pos=0
+        ## capture queue
+        # holds (count, time) records logged by the capture interrupt, or None until start_capture() is called
+        self.captures=None
+        ## velocity
+        # the most recent velocity found by velocity() in encoder counts per second
+        self.velocity_cps=0.0
         print ("Creating an encoder!")
 
     def read (self):
@@ -86,6 +106,87 @@ class EncoderReader:
         self.delta=0    # reset delta
         self.pos=0	# reset absolute total position
         self.prev_pos=self.value    # store value in prev_pos again, if this is reset as well the read calculations can result in negative delta values
+
+    def start_capture (self, timer, freq=2000, size=64):
+        """!
+        This function starts logging the encoder count and the time in microseconds from a timer interrupt. The records go into a
+        cqueue.StructQueue which is allocated here. The queue should hold more records than are captured between calls to velocity();
+        if it fills, the oldest records are overwritten and velocity() starts over from the oldest one left. 
+
+        Timer callbacks are hard interrupts, which must not allocate memory. Only the cqueue C module's StructQueue.put() avoids
+        allocating; the Python version in cqueue_py.py makes a tuple and memoryviews each time. So on a MicroPython board without the
+        C module this function raises a RuntimeError rather than starting the interrupt. On a PC, where the simulation in
+        test_encoder_capture.py calls capture() directly, the Python version is used. On a 32 bit timer, keep the encoder timer's
+        period below 2**30 so that its counts are small integers, which don't allocate memory either. 
+
+        @param timer The number of a spare timer (not the encoder's timer) used to trigger the captures. Set as a integer. 
+        @param freq How many times per second to capture the encoder count. 
+        @param size The number of records the capture queue can hold. 
+        """
+        import cqueue   # imported here so that boards without cqueue can still use read() and zero()
+        if sys.implementation.name == 'micropython' and hasattr(cqueue, '__file__'):
+            # the C module is built in and has no file; a file means this is the Python version, which allocates
+            raise RuntimeError('Encoder capture needs the cqueue C module')
+        self.captures=cqueue.StructQueue(CAPTURE_FORMAT, size)
+        self.cap_buffer=bytearray(size*self.captures.record_size())   # velocity() copies the records in here all at once
+        self.cap_modulus=self.enc_timer.period()+1  # the counter wraps around after this many counts
+        self.cap_count=None # the last record used by velocity(); None means there isn't one yet
+        self.cap_time=0
+        self.cap_timer=pyb.Timer(timer, freq=freq, callback=self.capture)  # the bound method is made once here, not in the interrupt
+
+    def stop_capture (self):
+        """!
+        This function stops the capture interrupt. Records already in the capture queue can still be used by velocity(). 
+        """
+        self.cap_timer.callback(None)
+
+    def capture (self, source):
+        """!
+        This function is the interrupt callback which logs one (count, time) record. It can also be attached to any other timer or
+        pin interrupt. With the cqueue C module it only calls C functions with small integers, so it doesn't allocate memory. 
+
+        @param source The timer or pin which caused the interrupt; it isn't used. 
+        """
+        self.captures.put(self.enc_timer.counter(), utime.ticks_us())
+
+    def velocity (self):
+        """!
+        This function finds the velocity of the motor from the records logged since the last call. All the waiting records are copied
+        out of the capture queue at once with interrupts turned off, then the change in count between each pair of records is corrected for
+        under or overflow as in read() and the total is divided by the time between the first and last records. If no new records have
+        come in, the last velocity is returned again. 
+
+        @returns The velocity in encoder counts per second. 
+        """
+        irq_state=pyb.disable_irq() # keep the interrupt from changing the queue while we copy it
+        overran=self.captures.full()    # a full queue may have lost records, so the last one we used may not be next
+        num_new=self.captures.get_into(self.cap_buffer)
+        pyb.enable_irq(irq_state)
+        if num_new==0:
+            return self.velocity_cps
+
+        rec_size=self.captures.record_size()
+        first=0
+        if overran or self.cap_count is None:   # start over from the oldest record we got
+            self.cap_count,self.cap_time=struct.unpack_from(CAPTURE_FORMAT, self.cap_buffer, 0)
+            first=1
+        start_time=self.cap_time
+        counts=0
+        for index in range(first, num_new):
+            count,stamp=struct.unpack_from(CAPTURE_FORMAT, self.cap_buffer, index*rec_size)
+            delta=count-self.cap_count  # calculate delta the same way read() does
+            if delta<=-self.cap_modulus/2:
+                delta=delta+self.cap_modulus
+            elif delta>=self.cap_modulus/2:
+                delta=delta-self.cap_modulus
+            counts=counts+delta
+            self.cap_count=count
+            self.cap_time=stamp
+
+        dt=utime.ticks_diff(self.cap_time, start_time)  # ticks_diff handles the time stamps wrapping around
+        if dt>0:
+            self.velocity_cps=counts*1000000/dt
+        return self.velocity_cps
         
 
 
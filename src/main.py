@@ -90,11 +90,13 @@ def task2_fun(shares):
 
 def task3_fun(shares):
     """!
-    Task that controls the motion of the second motor
-    @param shares A list holding the share and queue used by this task
+    Task that controls the motion of the second motor and logs its step
+    response
+    @param shares A list holding the share, queue and step response log used
+           by this task
     """
-    # Get references to the share and queue which have been passed to this task
-    my_share, my_queue = shares
+    # Get references to the shares and queues which have been passed to this task
+    my_share, my_queue, step_log = shares
 
     state = 0
     
@@ -113,6 +115,8 @@ def task3_fun(shares):
             state = 2
             yield
         elif state == 2:
+            step_log.clear()
+            start = utime.ticks_ms()
             for i in range(100):
                 # utime.sleep_ms(1) should need this
                 controller2.input_obj.read()
@@ -123,6 +127,8 @@ def task3_fun(shares):
                 PWM=controller2.PWM
                 
                 motor2.set_duty_cycle(PWM)
+                step_log.put(utime.ticks_diff(utime.ticks_ms(), start),
+                             meas_output, PWM)
                 if i == 99:
                     state = 3
                     controller2.input_obj.zero()
@@ -132,10 +138,11 @@ def task3_fun(shares):
                     yield
                 yield
         elif state == 3:
-            # print the results
+            # print the results, one frame of the log per run
             print('start')
-            for i in range(len(controller2.pos_output)):
-                print(i*35,controller2.pos_output[i])
+            while step_log.any():
+                (t_ms, pos, duty) = step_log.get()
+                print(t_ms, pos)
                 yield
             print('end')
             state = 4
@@ -157,33 +164,57 @@ if __name__ == "__main__":
     q0 = task_share.Queue('L', 16, thread_protect=False, overwrite=False,
                           name="Queue 0")
 
-    # Create the tasks. If trace is enabled for any task, memory will be
-    # allocated for state transition tracing, and the application will run out
-    # of memory after a while and quit. Therefore, use tracing only for 
-    # debugging and set trace to False when it's not needed
+    # The step response of motor 2 is logged here, as frames holding the time
+    # in ms, the encoder position and the duty cycle; the memory for the whole
+    # run is allocated now, so logging doesn't use any more as it goes
+    step_log = task_share.SampleQueue('<Llf', 200, name="Step Log")
+
+    # Create the tasks. If trace is enabled for any task, state transitions
+    # are kept in a fixed size buffer shared by all traced tasks; it holds only
+    # the most recent transitions, and recording them takes a little time, so
+    # set trace to False when it's not needed
     task1 = cotask.Task(task1_fun, name="Task_1", priority=2, period=10,
                         profile=True, trace=False, shares=(share0, q0))
     task2 = cotask.Task(task2_fun, name="Task_2", priority=3, period=10,
                         profile=True, trace=False, shares=(share0, q0))
     task3 = cotask.Task(task3_fun, name="Task_3", priority=1, period=15,
-                        profile=True, trace=False, shares=(share0, q0))
+                        profile=True, trace=False,
+                        shares=(share0, q0, step_log))
     cotask.task_list.append(task1)
     cotask.task_list.append(task2)
     cotask.task_list.append(task3)
 
+    # Line up the tasks' release times on a common frame so that the two
+    # 10 ms tasks and the 15 ms task don't all come due in the same tick.
+    # Before the tasks have run, their run times aren't known and they're
+    # only spread out evenly, so the frame is aligned again after a warm-up
+    # to weigh the tasks by their measured run times
+    frame = cotask.TaskFrame((task1, task2, task3))
+    WARM_UP_MS = 2000
+
     # Run the memory garbage collector to ensure memory is as defragmented as
     # possible before the real-time scheduler is started
     gc.collect()
 
     # Run the scheduler with the chosen scheduling algorithm. Quit if ^C pressed
+    frame.align()
+    realign_at = utime.ticks_add(utime.ticks_ms(), WARM_UP_MS)
+    warmed_up = False
     while True:
         try:
             cotask.task_list.pri_sched()
+            if not warmed_up \
+                    and utime.ticks_diff(utime.ticks_ms(), realign_at) >= 0:
+                frame.align()
+                warmed_up = True
         except KeyboardInterrupt:
             break
 
     # Print a table of task data and a table of shared information data
     print('\n' + str (cotask.task_list))
+    print(cotask.task_list.hist_report())
+    print(cotask.task_list.load_report())
+    print(frame.load_report())
     print(task_share.show_all())
     print(task1.get_trace())
     print('')
@@ -0,0 +1,322 @@
+"""!
+@file test_encoder_capture.py
+This file tests the interrupt capture path of @c EncoderReader on a PC. A
+simulated motor turns a quadrature encoder, whose A and B edges are decoded
+by a fake encoder timer just as the STM32's timer does it in hardware, while
+a second fake timer calls @c EncoderReader.capture() at its set rate and a
+simulated control task calls @c velocity() every so often. The tests check
+that the velocity is right at steady speeds, in reverse, across counter
+wrap-around on 16 and 32 bit timers, when the queue overruns, and when the
+control task runs late, and that @c encoder_reader can be imported and used
+without @c cqueue as long as capture isn't started.
+
+Run as a program, it also simulates a fast motor to show how many edges and
+captures per second the capture path keeps up with:
+@code
+python test_encoder_capture.py
+@endcode
+
+@date   2026-Oct-18 Original file
+@copyright (c) 2026 by the ME405 contributors and released under the GNU
+           Public License V3.
+"""
+
+import importlib
+import os
+import random
+import sys
+import time
+import types
+
+sys.path.insert (0, os.path.join (os.path.dirname (__file__), "..",
+                                  "ME405-Support-main", "src"))
+
+import sim_time
+clock = sim_time.install ()
+import pyb
+
+
+class FakePin:
+    """!
+    A stand-in for @c pyb.Pin which only remembers its name.
+    """
+    IN = 0
+
+    class board:
+        """!
+        Looks up pins by name, as in @c getattr(pyb.Pin.board, "PC6").
+        """
+        def __getattr__ (self, name):
+            return name
+
+    board = board ()
+
+    def __init__ (self, name, mode=IN):
+        self.name = name
+
+
+class FakeTimer:
+    """!
+    A stand-in for @c pyb.Timer. As an encoder timer its counter is moved by
+    quadrature edges from @c edge(); as a capture timer it holds the
+    callback which the simulation calls at the timer's frequency.
+    """
+    ENC_AB = 3
+
+    ## The timers made so far, by timer number
+    made = {}
+
+    # Quadrature states in order for forward motion, as (A << 1) | B
+    _STEP = {(0, 1) : 1, (1, 3) : 1, (3, 2) : 1, (2, 0) : 1,
+             (1, 0) : -1, (3, 1) : -1, (2, 3) : -1, (0, 2) : -1}
+
+    def __init__ (self, num, freq=1000, callback=None, period=16000):
+        self.num = num
+        self.freq = freq
+        self._callback = callback
+        self._period = period
+        self._count = 0
+        self._state = 0
+        FakeTimer.made[num] = self
+
+    def channel (self, num, mode, pin=None):
+        return None
+
+    def callback (self, fun):
+        self._callback = fun
+
+    def counter (self):
+        return self._count
+
+    def period (self):
+        return self._period
+
+    def edge (self, state):
+        """!
+        Decode one change of the A and B signals, as the timer's encoder
+        mode does, counting up or down and wrapping at the period.
+        @param state The new quadrature state, @c (A << 1) | B
+        """
+        step = FakeTimer._STEP.get ((self._state, state), 0)
+        self._count = (self._count + step) % (self._period + 1)
+        self._state = state
+
+
+pyb.Pin = FakePin
+pyb.Timer = FakeTimer
+
+from encoder_reader import EncoderReader
+
+## Quadrature states in forward order
+GRAY = (0, 1, 3, 2)
+
+## The capture timer's number
+CAP_TIMER = 6
+
+
+def simulate (speed, duration, task_period=10_000, freq=2000, size=64,
+              jitter=0, seed=1, period=16000, start_count=0):
+    """!
+    Turn a simulated encoder and run the capture interrupt and a control task
+    which calls @c velocity().
+    @param speed A function giving the motor speed in counts per second at a
+           time in microseconds
+    @param duration How long to simulate, in microseconds
+    @param task_period Microseconds between runs of the control task
+    @param freq Captures per second
+    @param size The size of the capture queue
+    @param jitter Each control task run is late by up to this many
+           microseconds
+    @param seed The seed for the random lateness
+    @param period The encoder timer's period; its counter wraps after this
+    @param start_count The encoder timer's count when the simulation begins
+    @returns A tuple holding the encoder reader, a list of each control task
+             run's (time, capture velocity, read() velocity, true average
+             speed) and the number of simulated edges
+    """
+    rand = random.Random (seed)
+    clock.now = 0
+    reader = EncoderReader ('PC6', 'PC7', 8)
+    reader.enc_timer._period = period
+    reader.enc_timer._count = start_count
+    reader.read ()
+    reader.start_capture (CAP_TIMER, freq=freq, size=size)
+    enc_timer = reader.enc_timer
+    cap_timer = FakeTimer.made[CAP_TIMER]
+
+    phase = 0
+    edges = 0
+    position = 0
+    next_edge = 0.0
+    next_capture = 0.0
+    release = task_period
+    next_task = task_period
+    last_task = 0
+    last_read = 0
+    last_position = 0
+    results = []
+
+    while clock.now < duration:
+        moment = min (next_edge, next_capture, next_task)
+        clock.now = int (moment)
+        if moment == next_edge:
+            rate = speed (moment)
+            if rate:
+                step = 1 if rate > 0 else -1
+                phase = (phase + step) % 4
+                position += step
+                enc_timer.edge (GRAY[phase])
+                edges += 1
+                next_edge += 1_000_000 / abs (rate)
+            else:
+                next_edge += 100
+        elif moment == next_capture:
+            cap_timer._callback (cap_timer)
+            next_capture += 1_000_000 / freq
+        else:
+            # The control task's velocity from read() assumes that it ran
+            # exactly one period after its last run
+            reader.read ()
+            by_read = (reader.pos - last_read) * 1_000_000 / task_period
+            by_capture = reader.velocity ()
+            true = ((position - last_position) * 1_000_000
+                    / (moment - last_task))
+            results.append ((moment, by_capture, by_read, true))
+            last_read = reader.pos
+            last_position = position
+            last_task = moment
+            release += task_period
+            next_task = release + rand.uniform (0, jitter)
+    return reader, results, edges
+
+
+def test_constant_speed ():
+    """!
+    At a steady speed every velocity after the first is right to within the
+    one count a window can be off by.
+    """
+    _, results, _ = simulate (lambda t: 20_000, 500_000)
+    for (_, by_capture, _, _) in results[1:]:
+        assert abs (by_capture - 20_000) < 110
+
+
+def test_reverse_and_wrap ():
+    """!
+    Running backward fast enough to wrap the counter several times gives
+    the right negative velocity every time.
+    """
+    reader, results, _ = simulate (lambda t: -50_000, 1_000_000)
+    assert reader.velocity_cps < 0
+    for (_, by_capture, _, _) in results[1:]:
+        assert abs (by_capture + 50_000) < 110
+
+
+def test_32_bit_timer ():
+    """!
+    On a 32 bit timer, counts above 16 bits are kept whole, and the velocity
+    is right as the counter wraps from its top back to zero.
+    """
+    top = 0xFFFFFFFF
+    reader, results, _ = simulate (lambda t: 40_000, 500_000, period=top,
+                                   start_count=top - 5000)
+    assert reader.enc_timer.counter () < 20_000
+    for (_, by_capture, _, _) in results[1:]:
+        assert abs (by_capture - 40_000) < 110
+
+
+def test_without_cqueue ():
+    """!
+    The encoder reader imports without @c cqueue, and only starting capture
+    needs it; on MicroPython, the Python version of @c cqueue is refused.
+    """
+    global EncoderReader
+    saved = sys.modules.get ("cqueue")
+    sys.modules["cqueue"] = None            # Makes "import cqueue" fail
+    try:
+        module = importlib.reload (sys.modules["encoder_reader"])
+        reader = module.EncoderReader ('PC6', 'PC7', 8)
+        reader.read ()
+        try:
+            reader.start_capture (CAP_TIMER)
+            assert False, "Capture started without cqueue"
+        except ImportError:
+            pass
+    finally:
+        del sys.modules["cqueue"]
+        if saved is not None:
+            sys.modules["cqueue"] = saved
+    EncoderReader = module.EncoderReader
+
+    implementation = sys.implementation
+    sys.implementation = types.SimpleNamespace (name="micropython")
+    try:
+        reader.start_capture (CAP_TIMER)
+        assert False, "Capture started with the Python cqueue on MicroPython"
+    except RuntimeError:
+        pass
+    finally:
+        sys.implementation = implementation
+
+
+def test_ramp ():
+    """!
+    While the speed ramps up, each velocity is close to the average speed
+    over its window.
+    """
+    _, results, _ = simulate (lambda t: 1000 + t / 20, 1_000_000)
+    for (_, by_capture, _, true) in results[1:]:
+        assert abs (by_capture - true) / true < 0.05
+
+
+def test_overrun ():
+    """!
+    When the control task is so slow that the queue fills and records are
+    lost, the velocity is still found from the records that are left.
+    """
+    reader, results, _ = simulate (lambda t: 30_000, 500_000,
+                                   task_period=50_000, size=16)
+    assert reader.captures.max_full () == 16
+    for (_, by_capture, _, _) in results[1:]:
+        assert abs (by_capture - 30_000) < 300
+
+
+def test_late_task ():
+    """!
+    When the control task runs late by random amounts, the time stamped
+    captures give a much better velocity than counts from @c read() divided
+    by the task period.
+    """
+    _, results, _ = simulate (lambda t: 10_000, 2_000_000, jitter=3000)
+    capture_err = max (abs (r[1] - 10_000) for r in results[2:])
+    read_err = max (abs (r[2] - 10_000) for r in results[2:])
+    assert capture_err < 200
+    assert read_err > 5 * capture_err
+
+
+if __name__ == "__main__":
+    for test in (test_constant_speed, test_reverse_and_wrap,
+                 test_32_bit_timer, test_without_cqueue, test_ramp,
+                 test_overrun, test_late_task):
+        test ()
+        print (f"{test.__name__}: passed")
+
+    # A fast motor, with the control task running late now and then
+    SPEED = 100_000
+    FREQ = 5000
+    begin = time.perf_counter ()
+    reader, results, edges = simulate (lambda t: SPEED, 1_000_000, freq=FREQ,
+                                       jitter=2000)
+    elapsed = time.perf_counter () - begin
+    worst = max (abs (r[1] - SPEED) for r in results[1:])
+    print (f"\n{edges} edges and {FREQ} captures in one simulated second, "
+           f"{elapsed:.2f} s on this computer")
+    print (f"Most records waiting: {reader.captures.max_full ()} of 64, "
+           f"worst velocity error {worst:.0f} counts/s")
+
+    # How long the capture callback itself takes here
+    COUNT = 100_000
+    begin = time.perf_counter ()
+    for index in range (COUNT):
+        reader.capture (None)
+    per_call = (time.perf_counter () - begin) * 1_000_000 / COUNT
+    print (f"capture() takes {per_call:.2f} us per call on this computer")